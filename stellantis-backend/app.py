@@ -2,7 +2,7 @@ from datetime import datetime
 import sqlite3
 import math
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, Response, request, jsonify, make_response
 from flask_cors import CORS
 import pandas as pd
 
@@ -10,10 +10,16 @@ import os
 from svix.webhooks import Webhook, WebhookVerificationError
 
 # Core business logic imports
+from core import (
+    history_sync, instrumentation, mapping_cache, model_registry, near_duplicate, scheduler, shadow_scoring,
+    slow_query_log,
+)
 from utils.helpers import safe_float, sanitize_jobs
 from core.dynamic_estimator import get_dynamic_job_estimate, get_dynamic_task_estimate
 from core.gemini_mapping import get_matching_services
 from core.job_card_creator import create_job_from_ui_input
+from core.model_features import MODEL_NAME
+from core.model_serving import ACTIVE_MODEL, request_incremental_update
 from recommender import recommend_engineers_memory_cf
 from job_manager import (
     get_connection, 
@@ -25,6 +31,7 @@ from job_manager import (
     fetch_available_engineers,
     mark_engineer_unavailable,
     mark_engineer_available,
+    complete_tasks_in_bulk,
 )
 
 # Flask app initialization
@@ -32,7 +39,33 @@ app = Flask(__name__)
 CORS(app)
 
 # Configuration
-DB_PATH = "database/workshop.db"
+# WORKSHOP_DB_PATH points the whole backend at another database (e.g. a load-test fixture)
+DB_PATH = os.getenv("WORKSHOP_DB_PATH", "database/workshop.db")
+
+# Opt-in: set SLOW_QUERY_LOG_MS to log statements slower than that threshold
+slow_query_log.enable_from_env()
+
+# A fresh deploy on an existing database builds the feature store in the background
+history_sync.catch_up_if_unbuilt()
+
+# Opt-in: set SCHEDULER_ENABLED=1 to run the batch jobs (profiles, retraining, maintenance) on a schedule
+if scheduler.ENABLED:
+    scheduler.start()
+
+# =============================================================================
+# REQUEST INSTRUMENTATION
+# =============================================================================
+
+@app.before_request
+def start_request_metrics():
+    instrumentation.begin_request()
+
+@app.after_request
+def record_request_metrics(response):
+    # Label by the route template (e.g. /api/v1/jobs/<string:job_id>) to keep cardinality bounded
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    instrumentation.end_request(request.method, route, response.status_code)
+    return response
 
 # =============================================================================
 # USER MANAGEMENT ROUTES
@@ -80,7 +113,7 @@ def create_user_in_db(clerk_user_id, first_name, last_name, email):
     # Use absolute path for SQLite database
     db_path = DB_PATH
     
-    conn = sqlite3.connect(db_path)
+    conn = instrumentation.connect(db_path)
     cursor = conn.cursor()
     
     try:
@@ -217,7 +250,7 @@ def get_engineer_details(engineer_id):
 
 @app.route('/api/v1/engineer-dashboard/<string:engineer_id>', methods=['GET'])
 def get_engineer_dashboard(engineer_id):
-    conn = sqlite3.connect(DB_PATH)
+    conn = instrumentation.connect(DB_PATH)
     cursor = conn.cursor()
     
     try:
@@ -713,6 +746,8 @@ def assign_engineer_to_task():
         
         # Mark the engineer as unavailable
         mark_engineer_unavailable(engineer_assigned)
+        # Queue the decision for the challenger model (a no-op unless SHADOW_SCORING=1)
+        shadow_scoring.submit(job_card_id, task_id, engineer_assigned, engineer_score)
 
         # Get dynamic estimated time for the task
         _, dynamic_estimated_time = get_dynamic_task_estimate(task_id, engineer_assigned)
@@ -764,6 +799,7 @@ def assign_engineer_to_all_tasks_for_job():
                     if engineer_assigned and engineer_score:
                         update_task_assignment(task_id, job_card_id, engineer_assigned, engineer_score)
                         mark_engineer_unavailable(engineer_assigned)
+                        shadow_scoring.submit(job_card_id, task_id, engineer_assigned, engineer_score)
                         status = "Assigned"
                         _, dynamic_estimated_time = get_dynamic_task_estimate(task_id, engineer_assigned)
                         save_dynamic_estimated_time(task_id, job_card_id, dynamic_estimated_time)
@@ -836,6 +872,21 @@ def start_task():
         print(f"Error starting task: {e}")
         return jsonify({'error': 'Failed to start task'}), 500
 
+def _on_tasks_completed():
+    """
+    Has background threads fold the new history rows into the feature store and the
+    engineers' performance scores, and train the online success model on them; never
+    fails or delays a completion.
+    """
+    try:
+        history_sync.request_update()
+    except Exception as e:
+        print(f"Could not schedule feature store and engineer score updates: {e}")
+    try:
+        request_incremental_update()
+    except Exception as e:
+        print(f"Could not schedule incremental model update: {e}")
+
 @app.route('/api/v1/jobs/mark-complete', methods=['POST'])
 def mark_task_complete():
     """Move a completed task from the job_card table to the job_history table."""
@@ -891,6 +942,7 @@ def mark_task_complete():
                 mark_engineer_available(conn, record['Engineer_Id'])
 
             conn.commit()
+            _on_tasks_completed()
             return jsonify({'message': 'Task marked as complete and moved to history'}), 200
 
     except sqlite3.Error as e:
@@ -899,6 +951,46 @@ def mark_task_complete():
         print(f"Error completing task: {e}")
         return jsonify({'error': 'Failed to complete task'}), 500
 
+@app.route('/api/v1/jobs/mark-complete-bulk', methods=['POST'])
+def mark_tasks_complete_bulk():
+    """
+    Move many completed tasks from job_card to job_history in one transaction.
+    Safe to retry: tasks already moved are reported as 'already_completed'.
+    """
+    try:
+        data = request.get_json()
+        tasks = data.get('tasks') if data else None
+
+        if not tasks or not isinstance(tasks, list):
+            return jsonify({'error': 'tasks must be a non-empty list'}), 400
+
+        batch = []
+        for task in tasks:
+            job_id = task.get('job_id') if isinstance(task, dict) else None
+            task_id = task.get('task_id') if isinstance(task, dict) else None
+            outcome_score = task.get('outcome_score') if isinstance(task, dict) else None
+            if not job_id or not task_id or outcome_score is None:
+                return jsonify({'error': 'Each task needs job_id, task_id and outcome_score'}), 400
+            batch.append((job_id, task_id, outcome_score))
+
+        time_ended = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with get_connection() as conn:
+            results = complete_tasks_in_bulk(conn, batch, time_ended)
+        if results['completed']:
+            _on_tasks_completed()
+
+        return jsonify({
+            'message': f"{len(results['completed'])} tasks marked as complete and moved to history",
+            'time_ended': time_ended,
+            **results
+        }), 200
+
+    except sqlite3.Error as e:
+        return jsonify({'error': str(e)}), 500
+    except Exception as e:
+        print(f"Error completing tasks in bulk: {e}")
+        return jsonify({'error': 'Failed to complete tasks'}), 500
+
 # =============================================================================
 # SERVICE MAPPING ROUTES
 # =============================================================================
@@ -909,11 +1001,17 @@ def select_services():
     try:
         data = request.get_json()
         user_input = data.get('description')
+        mileage = data.get('mileage')
 
         if not user_input:
             return jsonify({"error": "Description is required"}), 400
-        
-        services = get_matching_services(user_input)
+        if mileage is not None:
+            try:
+                mileage = int(mileage)
+            except (TypeError, ValueError):
+                return jsonify({"error": "mileage must be an integer"}), 400
+
+        services = get_matching_services(user_input, mileage)
         return jsonify({"services": services}), 200
     except Exception as e:
         print(f"Error in service mapping: {e}")
@@ -943,6 +1041,73 @@ def reset_database():
     except sqlite3.Error as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/v1/admin/slow-queries", methods=["GET", "DELETE"])
+def slow_queries():
+    """Summarize the slowest SQL statements by total time (DELETE clears the log)."""
+    if request.method == "DELETE":
+        slow_query_log.reset()
+        return jsonify({"message": "Slow-query log cleared"}), 200
+
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    return jsonify(slow_query_log.summarize(limit=limit)), 200
+
+@app.route("/api/v1/admin/mapping-cache", methods=["GET", "DELETE"])
+def service_mapping_cache():
+    """Show service-mapping cache sizes (DELETE empties both cache tiers)."""
+    if request.method == "DELETE":
+        removed = mapping_cache.clear()
+        near_duplicate.clear()
+        return jsonify({"message": "Service-mapping cache cleared", "removed_entries": removed}), 200
+    return jsonify({**mapping_cache.stats(), "near_duplicate": near_duplicate.stats()}), 200
+
+@app.route("/api/v1/admin/models", methods=["GET"])
+def model_versions():
+    """List the job success model versions, the active one and the one this process serves."""
+    return jsonify({
+        "active_version": model_registry.active_version(MODEL_NAME),
+        "serving_version": ACTIVE_MODEL.version,
+        "versions": model_registry.list_versions(MODEL_NAME),
+    }), 200
+
+@app.route("/api/v1/admin/models/activate", methods=["POST"])
+def activate_model_version():
+    """Activate (or roll back to) a job success model version."""
+    data = request.get_json(silent=True) or {}
+    version = data.get("version")
+    if not isinstance(version, int):
+        return jsonify({"error": "version must be an integer"}), 400
+
+    success, message = model_registry.set_active(MODEL_NAME, version)
+    if not success:
+        return jsonify({"error": message}), 404
+    # Swap now in this process; other processes pick the change up on their next poll.
+    ACTIVE_MODEL.refresh()
+    return jsonify({"message": message, "serving_version": ACTIVE_MODEL.version}), 200
+
+@app.route("/api/v1/admin/shadow-scoring", methods=["GET"])
+def shadow_scoring_report():
+    """Compare the live recommender with the shadow-scored challenger model on completed tasks."""
+    try:
+        return jsonify({"enabled": shadow_scoring.ENABLED, **shadow_scoring.report()}), 200
+    except sqlite3.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/v1/admin/scheduler", methods=["GET"])
+def scheduler_status():
+    """Schedule, next run, current lease and last run (with its duration) of each scheduled job."""
+    try:
+        return jsonify(scheduler.status()), 200
+    except sqlite3.Error as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Expose request, SQL and core-function metrics in the Prometheus text format."""
+    return Response(instrumentation.render_metrics(), mimetype='text/plain; version=0.0.4')
+
 # =============================================================================
 # APPLICATION ENTRY POINT
 # =============================================================================
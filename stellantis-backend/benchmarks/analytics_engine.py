@@ -0,0 +1,100 @@
+# In benchmarks/analytics_engine.py
+"""
+Time of the engineer profile aggregations (core.analytics_engine.profile_metrics) on
+the pandas engine and on the polars engine at several thread counts, reading history
+from the fixture database and from a Parquet snapshot of it.
+
+Each measurement runs in a fresh interpreter (POLARS_MAX_THREADS is fixed when polars
+is imported) and reports the load and aggregation times separately; for the polars
+engine the Parquet scan is part of the aggregation plan, so its load time is ~0.
+Fixtures come from benchmarks/micro.py.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.analytics_engine --sizes 1000000 4000000 --threads 1 2 4 8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from benchmarks.micro import ensure_fixture
+
+
+def measure(engine, source):
+    """Loads and aggregates the history once in this process; returns the timings."""
+    from core import analytics_engine
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        history = analytics_engine.load_history(engine, source)
+        loaded = time.perf_counter()
+        metrics = analytics_engine.profile_metrics(history, engine)
+    end = time.perf_counter()
+    return {
+        'load_seconds': round(loaded - start, 3),
+        'aggregate_seconds': round(end - loaded, 3),
+        'total_seconds': round(end - start, 3),
+        'engineers': len(metrics),
+        'columns': metrics.shape[1],
+    }
+
+
+def run_in_subprocess(engine, threads, db_path, source):
+    env = dict(os.environ, WORKSHOP_DB_PATH=db_path, POLARS_MAX_THREADS=str(threads), PYTHONWARNINGS='ignore')
+    command = [sys.executable, '-m', 'benchmarks.analytics_engine', '--child', engine]
+    if source:
+        command += ['--source', source]
+    output = subprocess.run(command, capture_output=True, text=True, check=True, env=env)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the pandas and polars analytics engines.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000000])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1],
+                        help="POLARS_MAX_THREADS values for the polars engine.")
+    parser.add_argument('--engineers', type=int, default=18)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON here.")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--source', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.source)))
+        return 0
+
+    from core import analytics_engine
+
+    thread_counts = sorted(set(args.threads))
+    print(f"{'rows':>10}  {'source':<8}{'engine':<8}{'threads':>8}{'load s':>9}{'aggregate s':>13}{'total s':>9}")
+    results = []
+    for size in args.sizes:
+        db_path = ensure_fixture(size, args.seed, args.engineers)
+        snapshot = os.path.splitext(db_path)[0] + '.parquet'
+        if not os.path.exists(snapshot):
+            with contextlib.closing(sqlite3.connect(db_path)) as conn:
+                analytics_engine.write_snapshot(snapshot, conn)
+        for source_name, source in (('sqlite', None), ('parquet', snapshot)):
+            runs = [('pandas', 1)] + [('polars', threads) for threads in thread_counts]
+            for engine, threads in runs:
+                result = run_in_subprocess(engine, threads, db_path, source)
+                result.update({'rows': size, 'source': source_name, 'engine': engine,
+                               'threads': threads if engine == 'polars' else 1})
+                results.append(result)
+                print(f"{size:>10,}  {source_name:<8}{engine:<8}{result['threads']:>8}{result['load_seconds']:>9}"
+                      f"{result['aggregate_seconds']:>13}{result['total_seconds']:>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'cpu_count': os.cpu_count(), 'runs': results}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
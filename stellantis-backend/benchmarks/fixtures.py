@@ -0,0 +1,168 @@
+# In benchmarks/fixtures.py
+import os
+import random
+import sqlite3
+from datetime import datetime
+
+from generate_and_load import (
+    ENGINEERS_DATA,
+    CAR_MODELS,
+    URGENCY_LEVELS,
+    generate_history_shard,
+    get_level_from_experience,
+    insert_history,
+    plan_history,
+)
+# Open job cards use the live job-card task times, not the historical generator's
+from core.job_card_creator import TASKS_DATA as CARD_TASKS_DATA, JOB_TO_TASKS_MAPPING as CARD_TASKS_MAPPING
+
+# --- Configuration ---
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The shipped database is only read for its schema, so fixtures always match the live tables.
+SOURCE_DB_PATH = os.path.join(BASE_DIR, 'database', 'workshop.db')
+FIXTURE_TABLES = ('job_card', 'job_history', 'engineer_profiles', 'users')
+INSERT_BATCH_SIZE = 50000
+
+JOB_CARD_COLUMNS = (
+    'Job_Id', 'Job_Name', 'Task_Id', 'Task_Description', 'Status', 'Date_Created', 'Urgency', 'VIN',
+    'Make', 'Model', 'Mileage', 'Estimated_Standard_Time'
+)
+
+
+def engineer_ids(num_engineers):
+    """ENG001..ENGnnn; the first 18 match the engineers the recommender was profiled on."""
+    return [f"ENG{i:03d}" for i in range(1, num_engineers + 1)]
+
+
+def copy_schema(conn, source_db_path=SOURCE_DB_PATH):
+    """Creates the live workshop tables (without data) in `conn`."""
+    source = sqlite3.connect(f"file:{source_db_path}?mode=ro", uri=True)
+    try:
+        placeholders = ",".join("?" for _ in FIXTURE_TABLES)
+        rows = source.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})",
+            FIXTURE_TABLES
+        ).fetchall()
+    finally:
+        source.close()
+
+    missing = set(FIXTURE_TABLES) - {name for name, _ in rows}
+    if missing:
+        raise RuntimeError(f"Source database {source_db_path} is missing tables: {sorted(missing)}")
+    for _, create_sql in rows:
+        conn.execute(create_sql)
+
+
+def _random_vin(rng):
+    alphabet = "ABCDEFGHJKLMNPRSTUVWXYZ0123456789"
+    return "".join(rng.choice(alphabet) for _ in range(17))
+
+
+def generate_engineer_rows(conn, rng, num_engineers):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(engineer_profiles)")]
+    makes = list(CAR_MODELS.keys()) + ['All Makes']
+    rows = []
+    for engineer_id in engineer_ids(num_engineers):
+        known = ENGINEERS_DATA.get(engineer_id)
+        years = rng.randint(1, 40)
+        values = {
+            'Engineer_ID': engineer_id,
+            'Engineer_Name': known['name'] if known else f"Engineer {engineer_id[3:]}",
+            'Availability': 'Yes',
+            'Years_of_Experience': years,
+            'Specialization': rng.choice(makes),
+            'Certifications': 'ASE Certification' if get_level_from_experience(years) != 'Junior' else 'Basic Automotive Certification',
+            'Avg_Job_Completion_Time': round(rng.uniform(40, 90), 2),
+            'Customer_Rating': round(rng.uniform(3.0, 5.0), 2),
+            'Overall_Performance_Score': rng.randint(60, 95),
+        }
+        for column in columns:
+            if column not in values and column.endswith('_Score'):
+                values[column] = round(rng.uniform(55, 95), 2)
+        rows.append(tuple(values.get(column) for column in columns))
+    placeholders = ",".join("?" for _ in columns)
+    quoted = ",".join(f'"{column}"' for column in columns)
+    conn.executemany(f"INSERT INTO engineer_profiles ({quoted}) VALUES ({placeholders})", rows)
+
+
+def generate_history(conn, num_rows, num_engineers, seed):
+    """Fills job_history with num_rows rows from the vectorized generator in generate_and_load."""
+    inserted = 0
+    for shard in plan_history(num_rows=num_rows, seed=seed):
+        inserted += insert_history(conn, generate_history_shard(shard, seed=seed, num_engineers=num_engineers))
+    return inserted
+
+
+def generate_open_job_rows(rng, num_jobs, first_job_number):
+    """Yields Pending job_card tuples (JOB_CARD_COLUMNS order) for num_jobs new jobs."""
+    job_names = [name for name in CARD_TASKS_MAPPING if name != 'Custom Service']
+    makes = list(CAR_MODELS.keys())
+    created = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for offset in range(num_jobs):
+        job_id = f"JOB{first_job_number + offset}"
+        job_name = rng.choice(job_names)
+        make = rng.choice(makes)
+        model = rng.choice(CAR_MODELS[make])
+        vin = _random_vin(rng)
+        urgency = rng.choice(URGENCY_LEVELS)
+        mileage = rng.randint(10000, 200000)
+        for task_id in CARD_TASKS_MAPPING[job_name]:
+            yield (
+                job_id, job_name, task_id, CARD_TASKS_DATA[task_id]['name'], 'Pending', created, urgency,
+                vin, make, model, mileage, CARD_TASKS_DATA[task_id]['time']
+            )
+
+
+def _insert_in_batches(conn, table, columns, rows):
+    placeholders = ",".join("?" for _ in columns)
+    sql = f"INSERT INTO {table} ({','.join(columns)}) VALUES ({placeholders})"
+    batch = []
+    inserted = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            conn.executemany(sql, batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(sql, batch)
+        inserted += len(batch)
+    return inserted
+
+
+def build_workshop_db(db_path, num_engineers=18, num_history_rows=10000, num_open_jobs=0, seed=42, overwrite=True):
+    """
+    Builds a synthetic workshop.db at `db_path` with the live schema.
+    The same arguments (including `seed`) always produce the same data.
+    Returns a summary dict of what was generated.
+    """
+    if os.path.exists(db_path):
+        if not overwrite:
+            raise FileExistsError(db_path)
+        os.remove(db_path)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        copy_schema(conn)
+        generate_engineer_rows(conn, rng, num_engineers)
+        history_rows = generate_history(conn, num_history_rows, num_engineers, seed)
+        last_job_number = conn.execute(
+            "SELECT MAX(CAST(SUBSTR(Job_ID, 4) AS INTEGER)) FROM job_history"
+        ).fetchone()[0] or 1000
+        open_task_rows = _insert_in_batches(
+            conn, 'job_card', JOB_CARD_COLUMNS, generate_open_job_rows(rng, num_open_jobs, last_job_number + 1)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        'db_path': db_path,
+        'seed': seed,
+        'engineers': num_engineers,
+        'history_rows': history_rows,
+        'open_jobs': num_open_jobs,
+        'open_task_rows': open_task_rows,
+    }
@@ -0,0 +1,102 @@
+# In benchmarks/inference_batching.py
+"""
+Throughput and latency of scoring concurrent assignment requests directly versus
+through core.inference_batcher.InferenceBatcher.
+
+Each of N threads plays an advisor: it does `--io-ms` of GIL-releasing work (standing
+in for the assignment's SQLite queries), then scores a batch of candidate rows, and
+repeats. Reported for both the compiled scorer and the sklearn pipeline it was compiled
+from: requests/second overall and the median and p99 latency of the scoring call.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.inference_batching --threads 1 4 16 --window-ms 2
+"""
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.scorer import train_pipeline
+from core import predictive_model
+from core.inference_batcher import InferenceBatcher
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_threads(score, requests, threads, io_seconds):
+    """Runs `threads` advisors over their share of `requests`; returns requests/s and scoring latencies."""
+    latencies = [[] for _ in range(threads)]
+
+    def advisor(index):
+        for features in requests[index::threads]:
+            time.sleep(io_seconds)
+            start = time.perf_counter()
+            score(features)
+            latencies[index].append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=advisor, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    merged = [value for values in latencies for value in values]
+    return {
+        'requests_per_second': round(len(merged) / elapsed),
+        'p50_ms': round(statistics.median(merged) * 1000, 3),
+        'p99_ms': round(_percentile(merged, 0.99) * 1000, 3),
+    }
+
+
+def run(thread_counts, requests_per_thread, candidates, window_ms, io_ms, seed):
+    pipeline, X = train_pipeline()
+    scorers = {'compiled': predictive_model.compile_pipeline(pipeline), 'pipeline': pipeline}
+    rng = np.random.default_rng(seed)
+    results = []
+    for scorer_name, scorer in scorers.items():
+        def direct(features, scorer=scorer):
+            return scorer.predict_proba(features)[:, 1]
+        batcher = InferenceBatcher(f'bench-{scorer_name}', direct, window_ms=window_ms)
+        for threads in thread_counts:
+            requests = [X.iloc[rng.integers(0, len(X), candidates)].reset_index(drop=True)
+                        for _ in range(threads * requests_per_thread)]
+            for mode, score in (('direct', direct), ('batched', batcher.score)):
+                result = run_threads(score, requests, threads, io_ms / 1000.0)
+                result.update({'scorer': scorer_name, 'threads': threads, 'mode': mode})
+                results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark micro-batched scoring under concurrency.")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--requests', type=int, default=200, help="Scoring requests per thread.")
+    parser.add_argument('--candidates', type=int, default=18, help="Candidate rows per request.")
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--io-ms', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON here.")
+    args = parser.parse_args(argv)
+
+    results = run(args.threads, args.requests, args.candidates, args.window_ms, args.io_ms, args.seed)
+    print(f"{'scorer':<10}{'threads':>8}  {'mode':<9}{'req/s':>8}{'p50 ms':>9}{'p99 ms':>9}")
+    for r in results:
+        print(f"{r['scorer']:<10}{r['threads']:>8}  {r['mode']:<9}{r['requests_per_second']:>8}"
+              f"{r['p50_ms']:>9}{r['p99_ms']:>9}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'window_ms': args.window_ms, 'runs': results}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
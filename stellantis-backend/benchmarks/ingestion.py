@@ -0,0 +1,93 @@
+# In benchmarks/ingestion.py
+"""
+Peak memory and throughput of loading the training set: the eager path
+(preprocess_data(fetch_training_data())) against the streaming loader
+(load_training_set()), on the synthetic history fixtures of benchmarks/micro.py.
+
+Each measurement runs in a fresh interpreter, and reports the growth of its peak
+resident set size over the interpreter with everything already imported, so the
+numbers cover the data alone.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.ingestion --sizes 100000 1000000 --chunk-rows 50000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from benchmarks.micro import ensure_fixture
+
+MODES = ('eager', 'streaming')
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KiB on Linux
+
+
+def measure(mode, chunk_rows):
+    """Loads the training set once in this process; returns rows, seconds and peak memory growth."""
+    from core import predictive_model
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if mode == 'eager':
+            X, _, _ = predictive_model.preprocess_data(predictive_model.fetch_training_data())
+        else:
+            X, _, _, _ = predictive_model.load_training_set(chunk_rows)
+    seconds = time.perf_counter() - start
+    return {
+        'mode': mode,
+        'rows': len(X),
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(len(X) / seconds),
+        'peak_mb': round(_peak_rss_mb() - baseline, 1),
+        'features_mb': round(X.memory_usage(deep=True).sum() / 2**20, 1),
+    }
+
+
+def run_in_subprocess(mode, chunk_rows, db_path):
+    env = dict(os.environ, WORKSHOP_DB_PATH=db_path)
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.ingestion', '--child', mode, '--chunk-rows', str(chunk_rows)],
+        capture_output=True, text=True, check=True, env=env)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark eager vs streaming training data ingestion.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--chunk-rows', type=int, default=50000)
+    parser.add_argument('--engineers', type=int, default=18)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON here.")
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.chunk_rows)))
+        return 0
+
+    results = []
+    for size in args.sizes:
+        db_path = ensure_fixture(size, args.seed, args.engineers)
+        for mode in MODES:
+            result = run_in_subprocess(mode, args.chunk_rows, db_path)
+            results.append(result)
+            print(f"{size:>10,} rows  {mode:<10}{result['seconds']:>8}s{result['rows_per_second']:>12,} rows/s"
+                  f"{result['peak_mb']:>10} MB peak{result['features_mb']:>8} MB features")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'chunk_rows': args.chunk_rows, 'runs': results}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# In benchmarks/llm_resilience.py
+"""
+Fake Gemini REST server with injected latency/errors, and scenarios that exercise the
+resilient client around get_matching_services (deadlines, concurrency limit, retries,
+circuit breaker, local fallback).
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.llm_resilience                      # run all scenarios
+    python -m benchmarks.llm_resilience --serve --port 8765 --latency-ms 300
+        # then start the app with GEMINI_API_ENDPOINT=http://127.0.0.1:8765
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# (name, latency_ms, error_rate, calls, concurrency)
+SCENARIOS = [
+    ('healthy', 200, 0.0, 40, 8),
+    ('slow_upstream', 6000, 0.0, 40, 8),
+    ('failing_upstream', 50, 1.0, 40, 8),
+    ('flaky_upstream', 100, 0.3, 40, 8),
+]
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """Answers generateContent requests with the local classifier's answer after a delay."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        with server.lock:
+            server.requests += 1
+        time.sleep(max(0.0, random.gauss(server.latency_ms, server.latency_ms * 0.1)) / 1000.0)
+
+        if not urlsplit(self.path).path.endswith(':generateContent') or random.random() < server.error_rate:
+            self._send(503, {'error': {'code': 503, 'message': 'injected failure', 'status': 'UNAVAILABLE'}})
+            return
+
+        from core.job_card_creator import TASKS_DATA
+        from core.service_classifier import local_provider
+        prompt = body.get('contents', [{}])[0].get('parts', [{}])[0].get('text', '')
+        match = re.search(r'^Job: (\{.*\})$', prompt, re.M)
+        job = json.loads(match.group(1)) if match else {'description': prompt, 'mileage': None}
+        services = local_provider(job.get('description', ''), job.get('mileage'))
+        service_ids = [task_id for task_id, task in TASKS_DATA.items() if task['name'] in services]
+        payload = {
+            'candidates': [{
+                'content': {'parts': [{'text': json.dumps({'service_ids': service_ids})}], 'role': 'model'},
+                'finishReason': 'STOP',
+                'index': 0,
+            }],
+        }
+        self._send(200, payload)
+
+    def _send(self, status, payload):
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(payload).encode())
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up at its deadline; that is the point of the slow scenarios.
+            pass
+
+
+def start_fake_server(latency_ms=200, error_rate=0.0, port=0):
+    """Starts the fake server on a daemon thread. Adjust .latency_ms / .error_rate at runtime."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.latency_ms = latency_ms
+    server.error_rate = error_rate
+    server.requests = 0
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))]
+
+
+def run_scenario(server, name, latency_ms, error_rate, calls, concurrency):
+    from core import gemini_mapping, llm_client
+
+    server.latency_ms = latency_ms
+    server.error_rate = error_rate
+    server.requests = 0
+    gemini_mapping.GEMINI_CLIENT.breaker.reset()
+    fallbacks_before = gemini_mapping.MAPPING_DECISIONS._values.get(('fallback',), 0)
+
+    def one_call(index):
+        # Unique, rule-less descriptions so every call misses the cache and the local fast path.
+        start = time.perf_counter()
+        gemini_mapping.get_matching_services(f"{name} customer complaint number {index}")
+        return (time.perf_counter() - start) * 1000
+
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(one_call, range(calls)))
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+    return {
+        'scenario': name,
+        'latency_ms': latency_ms,
+        'error_rate': error_rate,
+        'calls': calls,
+        'upstream_requests': server.requests,
+        'fallbacks': gemini_mapping.MAPPING_DECISIONS._values.get(('fallback',), 0) - fallbacks_before,
+        'p50_ms': round(statistics.median(latencies), 1),
+        'p95_ms': round(_percentile(latencies, 95), 1),
+        'max_ms': round(max(latencies), 1),
+        'breaker': gemini_mapping.GEMINI_CLIENT.breaker.snapshot()['state'],
+        'breaker_gauge': llm_client._STATE_VALUES[gemini_mapping.GEMINI_CLIENT.breaker.state],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Gemini server and LLM resilience scenarios.")
+    parser.add_argument('--serve', action='store_true', help="Only run the fake server until interrupted.")
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--output', help="Write scenario results as JSON here.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = start_fake_server(args.latency_ms, args.error_rate, args.port)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    if args.serve:
+        print(f"Fake Gemini listening on {endpoint} (latency {args.latency_ms} ms, error rate {args.error_rate})")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            return 0
+
+    # Must be set before core.gemini_mapping is imported.
+    os.environ['GEMINI_API_ENDPOINT'] = endpoint
+    os.environ.setdefault('GEMINI_API_KEY', 'fake-key')
+    os.environ['SERVICE_MAPPING_PROVIDER'] = 'gemini'
+    os.environ.setdefault('SERVICE_MAPPING_CACHE_TTL', '0')
+
+    results = [run_scenario(server, *scenario) for scenario in SCENARIOS]
+
+    print(f"\n{'Scenario':<18}{'upstream':>10}{'fallback':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}  breaker")
+    for r in results:
+        print(f"{r['scenario']:<18}{r['upstream_requests']:>10}{r['fallbacks']:>10}{r['p50_ms']:>10}"
+              f"{r['p95_ms']:>10}{r['max_ms']:>10}  {r['breaker']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+    server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,398 @@
+# In benchmarks/load_test.py
+"""
+In-process load test for app.py with a realistic workshop traffic mix.
+
+Builds a synthetic workshop.db (see benchmarks/fixtures.py), points the backend at it
+through WORKSHOP_DB_PATH and drives the Flask app from concurrent worker threads using
+the test client, so no network or running server is needed. Service advisors create
+jobs and assign them; engineers start and complete tasks; everyone polls dashboards
+and job lists.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.load_test --history-rows 50000 --workers 8 --duration 60 \
+        --output benchmarks/results/load_test.json [--compare previous.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime
+
+# Relative share of each operation in the generated traffic.
+DEFAULT_MIX = {
+    'create_job': 10,
+    'assign_all_tasks': 10,
+    'start_task': 15,
+    'mark_complete': 15,
+    'engineer_dashboard': 20,
+    'engineer_details': 10,
+    'engineers_list': 10,
+    'jobs_list': 10,
+}
+JOB_NAMES = ['Basic Service', 'Intermediate Service', 'Full Service']
+LOCKED_MESSAGE = 'database is locked'
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class LockedErrorDetector(io.TextIOBase):
+    """
+    Stands in for sys.stdout during the run. The routes print and swallow most database
+    errors, so 'database is locked' lines are counted against the endpoint the printing
+    thread is currently calling. Output is discarded unless verbose.
+    """
+
+    def __init__(self, stream, verbose=False):
+        self.stream = stream
+        self.verbose = verbose
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.counts = defaultdict(int)
+
+    def write(self, text):
+        if LOCKED_MESSAGE in text:
+            endpoint = getattr(self.local, 'endpoint', 'unknown')
+            with self.lock:
+                self.counts[endpoint] += 1
+        if self.verbose:
+            self.stream.write(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class WorkshopState:
+    """Work queues shared by the simulated advisors and engineers."""
+
+    def __init__(self, pending_jobs, engineer_ids):
+        self.lock = threading.Lock()
+        self.jobs_to_assign = deque(pending_jobs)
+        self.tasks_to_start = deque()
+        self.tasks_to_complete = deque()
+        self.engineer_ids = engineer_ids
+
+    def pop(self, queue_name):
+        with self.lock:
+            queue = getattr(self, queue_name)
+            return queue.popleft() if queue else None
+
+    def push(self, queue_name, item):
+        with self.lock:
+            getattr(self, queue_name).append(item)
+
+
+class LoadTest:
+    def __init__(self, client_factory, state, mix, detector, seed):
+        self.client_factory = client_factory
+        self.state = state
+        self.operations = list(mix.keys())
+        self.weights = [mix[name] for name in self.operations]
+        self.detector = detector
+        self.seed = seed
+        self.results_lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.locked_responses = defaultdict(int)
+
+    # --- Individual operations; each returns (endpoint_name, response) ---
+
+    def create_job(self, client, rng):
+        response = client.post('/api/v1/create-job', json={
+            'jobName': rng.choice(JOB_NAMES),
+            'vin': ''.join(rng.choice('ABCDEFGHJKLMNPRSTUVWXYZ0123456789') for _ in range(17)),
+            'make': 'Peugeot',
+            'model': '3008',
+            'mileage': rng.randint(10000, 200000),
+            'urgency': rng.choice(['Low', 'Normal', 'High']),
+        })
+        if response.status_code == 201:
+            self.state.push('jobs_to_assign', response.get_json()['job_id'])
+        return 'create_job', response
+
+    def assign_all_tasks(self, client, rng):
+        job_id = self.state.pop('jobs_to_assign')
+        if job_id is None:
+            return self.create_job(client, rng)
+        response = client.post('/api/v1/jobs/assign-all-tasks', json={'job_card_id': job_id})
+        if response.status_code == 200:
+            unassigned = False
+            for assignment in response.get_json().get('assignments', []):
+                if assignment.get('status') == 'Assigned':
+                    self.state.push('tasks_to_start', (job_id, assignment['task_id']))
+                else:
+                    unassigned = True
+            if unassigned:
+                # No engineer was free for some tasks; an advisor will try again later.
+                self.state.push('jobs_to_assign', job_id)
+        return 'assign_all_tasks', response
+
+    def start_task(self, client, rng):
+        task = self.state.pop('tasks_to_start')
+        if task is None:
+            return self.engineer_dashboard(client, rng)
+        response = client.post('/api/v1/jobs/start-task', json={
+            'job_id': task[0],
+            'task_id': task[1],
+            'time_started': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        })
+        if response.status_code == 200:
+            self.state.push('tasks_to_complete', task)
+        return 'start_task', response
+
+    def mark_complete(self, client, rng):
+        task = self.state.pop('tasks_to_complete')
+        if task is None:
+            return self.engineer_dashboard(client, rng)
+        response = client.post('/api/v1/jobs/mark-complete', json={
+            'job_id': task[0],
+            'task_id': task[1],
+            'outcome_score': rng.randint(1, 5),
+        })
+        return 'mark_complete', response
+
+    def engineer_dashboard(self, client, rng):
+        engineer_id = rng.choice(self.state.engineer_ids)
+        return 'engineer_dashboard', client.get(f'/api/v1/engineer-dashboard/{engineer_id}')
+
+    def engineer_details(self, client, rng):
+        engineer_id = rng.choice(self.state.engineer_ids)
+        return 'engineer_details', client.get(f'/api/v1/engineers/{engineer_id}/details')
+
+    def engineers_list(self, client, rng):
+        return 'engineers_list', client.get('/api/v1/engineers')
+
+    def jobs_list(self, client, rng):
+        return 'jobs_list', client.get('/api/v1/jobs')
+
+    # --- Driver ---
+
+    def _record(self, endpoint, status, elapsed, body):
+        with self.results_lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][status] += 1
+            if status >= 500:
+                self.errors[endpoint] += 1
+            if LOCKED_MESSAGE in body:
+                self.locked_responses[endpoint] += 1
+
+    def worker(self, worker_index, deadline, max_requests):
+        rng = random.Random(self.seed * 1000 + worker_index)
+        client = self.client_factory()
+        issued = 0
+        while time.perf_counter() < deadline and (max_requests is None or issued < max_requests):
+            operation = rng.choices(self.operations, weights=self.weights)[0]
+            self.detector.local.endpoint = operation
+            start = time.perf_counter()
+            try:
+                endpoint, response = getattr(self, operation)(client, rng)
+                elapsed = time.perf_counter() - start
+                self._record(endpoint, response.status_code, elapsed, response.get_data(as_text=True))
+            except Exception as e:
+                elapsed = time.perf_counter() - start
+                self._record(operation, 599, elapsed, str(e))
+            issued += 1
+
+    def run(self, workers, duration, max_requests_per_worker):
+        deadline = time.perf_counter() + duration
+        threads = [
+            threading.Thread(target=self.worker, args=(i, deadline, max_requests_per_worker), daemon=True)
+            for i in range(workers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def summarize(self, wall_seconds):
+        endpoints = {}
+        total_requests = 0
+        total_errors = 0
+        total_locked = 0
+        for endpoint in sorted(self.latencies):
+            latencies = sorted(self.latencies[endpoint])
+            count = len(latencies)
+            errors = self.errors[endpoint]
+            locked = self.locked_responses[endpoint] + self.detector.counts.get(endpoint, 0)
+            total_requests += count
+            total_errors += errors
+            total_locked += locked
+            endpoints[endpoint] = {
+                'requests': count,
+                'throughput_rps': round(count / wall_seconds, 3),
+                'errors': errors,
+                'error_rate': round(errors / count, 4) if count else 0.0,
+                'database_locked': locked,
+                'status_codes': {str(code): n for code, n in sorted(self.statuses[endpoint].items())},
+                'latency_ms': {
+                    'mean': round(sum(latencies) / count * 1000, 3),
+                    'p50': round(percentile(latencies, 50) * 1000, 3),
+                    'p90': round(percentile(latencies, 90) * 1000, 3),
+                    'p95': round(percentile(latencies, 95) * 1000, 3),
+                    'p99': round(percentile(latencies, 99) * 1000, 3),
+                    'max': round(latencies[-1] * 1000, 3),
+                },
+            }
+        return {
+            'wall_seconds': round(wall_seconds, 3),
+            'total_requests': total_requests,
+            'throughput_rps': round(total_requests / wall_seconds, 3) if wall_seconds else 0.0,
+            'errors': total_errors,
+            'error_rate': round(total_errors / total_requests, 4) if total_requests else 0.0,
+            'database_locked': total_locked,
+            'endpoints': endpoints,
+        }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare_results(current, baseline_path):
+    """Prints per-endpoint throughput and p95 deltas against a previous results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    print(f"\nComparison against {baseline_path} (revision {baseline.get('revision')}):")
+    print(f"{'Endpoint':<22}{'rps':>10}{'Δrps %':>10}{'p95 ms':>10}{'Δp95 %':>10}")
+    for endpoint, stats in current['summary']['endpoints'].items():
+        before = baseline.get('summary', {}).get('endpoints', {}).get(endpoint)
+        if not before:
+            print(f"{endpoint:<22}{stats['throughput_rps']:>10}{'new':>10}{stats['latency_ms']['p95']:>10}{'new':>10}")
+            continue
+        rps_delta = (stats['throughput_rps'] / before['throughput_rps'] - 1) * 100 if before['throughput_rps'] else 0.0
+        p95_delta = (stats['latency_ms']['p95'] / before['latency_ms']['p95'] - 1) * 100 if before['latency_ms']['p95'] else 0.0
+        print(f"{endpoint:<22}{stats['throughput_rps']:>10}{rps_delta:>10.1f}{stats['latency_ms']['p95']:>10}{p95_delta:>10.1f}")
+
+
+def print_report(summary):
+    print(f"\n{'Endpoint':<22}{'reqs':>8}{'rps':>10}{'err%':>8}{'locked':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    print("-" * 86)
+    for endpoint, stats in summary['endpoints'].items():
+        latency = stats['latency_ms']
+        print(f"{endpoint:<22}{stats['requests']:>8}{stats['throughput_rps']:>10}{stats['error_rate'] * 100:>8.2f}"
+              f"{stats['database_locked']:>8}{latency['p50']:>10}{latency['p95']:>10}{latency['p99']:>10}")
+    print("-" * 86)
+    print(f"Total: {summary['total_requests']} requests in {summary['wall_seconds']} s "
+          f"({summary['throughput_rps']} req/s), error rate {summary['error_rate'] * 100:.2f}%, "
+          f"'database is locked' x{summary['database_locked']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the workshop backend in-process.")
+    parser.add_argument('--db', help="Fixture database path (default: a new temporary file).")
+    parser.add_argument('--reuse-db', action='store_true', help="Use --db as-is instead of rebuilding it.")
+    parser.add_argument('--engineers', type=int, default=18)
+    parser.add_argument('--history-rows', type=int, default=10000)
+    parser.add_argument('--open-jobs', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent simulated users.")
+    parser.add_argument('--duration', type=float, default=30.0, help="Seconds to run.")
+    parser.add_argument('--requests-per-worker', type=int, help="Stop each worker after this many requests.")
+    parser.add_argument('--mix', help="JSON object overriding operation weights, e.g. '{\"jobs_list\": 0}'.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write machine-readable results to this JSON file.")
+    parser.add_argument('--compare', help="Previous results JSON to compare against.")
+    parser.add_argument('--verbose', action='store_true', help="Show the application's own output.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    mix = dict(DEFAULT_MIX)
+    if args.mix:
+        mix.update(json.loads(args.mix))
+    mix = {name: weight for name, weight in mix.items() if weight > 0}
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix='workshop-load-'), 'workshop.db')
+    # Must be set before the backend modules are imported: they read it into module constants.
+    os.environ['WORKSHOP_DB_PATH'] = os.path.abspath(db_path)
+    # Models updated by the app during the run must not replace the deployment's.
+    model_dir = tempfile.mkdtemp(prefix='workshop-load-models-')
+    os.environ['MODEL_REGISTRY_DIR'] = os.path.join(model_dir, 'registry')
+    os.environ['ONLINE_MODEL_PATH'] = os.path.join(model_dir, 'job_success_online.joblib')
+
+    from benchmarks.fixtures import build_workshop_db, engineer_ids
+
+    fixture = {'db_path': db_path, 'reused': True}
+    if not (args.reuse_db and args.db and os.path.exists(db_path)):
+        print(f"Building fixture database at {db_path} ...")
+        fixture = build_workshop_db(
+            db_path, num_engineers=args.engineers, num_history_rows=args.history_rows,
+            num_open_jobs=args.open_jobs, seed=args.seed
+        )
+        print(f"Fixture ready: {fixture}")
+
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    pending_jobs = [row[0] for row in conn.execute(
+        "SELECT DISTINCT Job_Id FROM job_card WHERE Status = 'Pending' ORDER BY Job_Id")]
+    conn.close()
+
+    from app import app
+
+    detector = LockedErrorDetector(sys.stdout, verbose=args.verbose)
+    state = WorkshopState(pending_jobs, engineer_ids(args.engineers))
+    load_test = LoadTest(app.test_client, state, mix, detector, args.seed)
+
+    print(f"Running {args.workers} workers for {args.duration}s with mix {mix} ...")
+    real_stdout = sys.stdout
+    sys.stdout = detector
+    try:
+        wall_seconds = load_test.run(args.workers, args.duration, args.requests_per_worker)
+    finally:
+        sys.stdout = real_stdout
+
+    summary = load_test.summarize(wall_seconds)
+    print_report(summary)
+
+    results = {
+        'tool': 'load_test',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'workers': args.workers,
+            'duration': args.duration,
+            'requests_per_worker': args.requests_per_worker,
+            'engineers': args.engineers,
+            'history_rows': args.history_rows,
+            'open_jobs': args.open_jobs,
+            'seed': args.seed,
+            'mix': mix,
+        },
+        'fixture': fixture,
+        'summary': summary,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        compare_results(results, args.compare)
+    return results
+
+
+if __name__ == '__main__':
+    main()
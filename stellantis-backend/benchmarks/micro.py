@@ -0,0 +1,307 @@
+# In benchmarks/micro.py
+"""
+Micro-benchmarks for the core hot paths at several job_history sizes.
+
+For every size a fixed-seed fixture database is built once (and cached under
+benchmarks/.fixtures/), copied to a scratch file, and each case is timed in a fresh
+subprocess with WORKSHOP_DB_PATH pointing at the copy. Each subprocess also gets an empty
+scratch model registry (MODEL_REGISTRY_DIR), so cases serve the shipped legacy model and
+never publish into models/registry. Latency is the median/p95 of repeated calls after a
+warm-up call; memory is the tracemalloc peak of one extra call.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.micro --sizes 10000 100000 1000000 --output benchmarks/results/micro.json
+    python -m benchmarks.micro --baseline benchmarks/results/baseline.json   # exits 1 on regressions
+    python -m benchmarks.micro --save-baseline benchmarks/results/baseline.json
+or through the `garage-assigner-bench` console script.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_CACHE_DIR = os.path.join(BASE_DIR, 'benchmarks', '.fixtures')
+# Bump when benchmarks/fixtures.py changes the data it generates, so cached fixtures are rebuilt.
+FIXTURE_VERSION = 2
+DEFAULT_SIZES = (10000, 100000, 1000000)
+DEFAULT_SEED = 42
+DEFAULT_ENGINEERS = 18
+# A case regresses when its median is this much slower than the baseline...
+DEFAULT_TOLERANCE = 0.25
+# ...and the absolute slowdown is above this floor (filters timer noise on tiny cases).
+MIN_REGRESSION_MS = 1.0
+
+BENCH_TASK_ID = 'T007'
+BENCH_ENGINEER_ID = 'ENG001'
+
+
+# --- Cases -------------------------------------------------------------------
+# CASES maps name -> (repeats, setup); setup() runs inside the worker process after the
+# backend is imported and returns a zero-argument callable to time.
+
+def _case_recommend():
+    from recommender import recommend_engineers_memory_cf
+    return lambda: recommend_engineers_memory_cf(BENCH_TASK_ID, top_n=5)
+
+
+def _case_single_suitability():
+    from recommender import calculate_single_engineer_suitability_score
+    return lambda: calculate_single_engineer_suitability_score(BENCH_TASK_ID, BENCH_ENGINEER_ID)
+
+
+def _case_task_estimate():
+    from core.dynamic_estimator import get_dynamic_task_estimate
+    return lambda: get_dynamic_task_estimate(BENCH_TASK_ID, BENCH_ENGINEER_ID)
+
+
+def _case_job_estimate():
+    from core.dynamic_estimator import get_dynamic_job_estimate, DB_PATH
+    # Assign the first open job so the estimator has tasks to walk.
+    conn = sqlite3.connect(DB_PATH)
+    job_id = conn.execute("SELECT Job_Id FROM job_card ORDER BY Job_Id LIMIT 1").fetchone()[0]
+    engineers = [row[0] for row in conn.execute("SELECT Engineer_ID FROM engineer_profiles ORDER BY Engineer_ID")]
+    task_ids = [row[0] for row in conn.execute("SELECT Task_Id FROM job_card WHERE Job_Id = ?", (job_id,))]
+    for index, task_id in enumerate(task_ids):
+        conn.execute(
+            "UPDATE job_card SET Status = 'Assigned', Engineer_Id = ? WHERE Job_Id = ? AND Task_Id = ?",
+            (engineers[index % len(engineers)], job_id, task_id)
+        )
+    conn.commit()
+    conn.close()
+    return lambda: get_dynamic_job_estimate(job_id)
+
+
+def _case_create_job():
+    from core.job_card_creator import create_job_from_ui_input
+    return lambda: create_job_from_ui_input(
+        job_name='Full Service', vin='BENCHVIN000000001', make='Peugeot', model='3008',
+        mileage=60000, urgency='Normal'
+    )
+
+
+def _case_service_mapping():
+    # The deterministic local provider stands in for Gemini so the case needs no network.
+    os.environ['SERVICE_MAPPING_PROVIDER'] = 'local'
+    from core.gemini_mapping import get_matching_services
+    descriptions = itertools.cycle([
+        'Full service please', 'brakes squeaking at 85,000 miles', "car won't start in the morning",
+        'warning light on the dash', 'strange noise', 'interim service and check tyres',
+    ])
+    return lambda: get_matching_services(next(descriptions))
+
+
+def _case_analyze_profiles():
+    from core.engineer_analyzer import analyze_and_update_profiles
+    return analyze_and_update_profiles
+
+
+def _case_training_pipeline():
+    from core.predictive_model import run_training_pipeline
+    return run_training_pipeline
+
+
+CASES = {
+    'recommend_engineers_memory_cf': (20, _case_recommend),
+    'calculate_single_engineer_suitability_score': (20, _case_single_suitability),
+    'get_dynamic_task_estimate': (20, _case_task_estimate),
+    'get_dynamic_job_estimate': (5, _case_job_estimate),
+    'create_job_from_ui_input': (10, _case_create_job),
+    'get_matching_services': (60, _case_service_mapping),
+    'analyze_and_update_profiles': (3, _case_analyze_profiles),
+    'run_training_pipeline': (3, _case_training_pipeline),
+}
+
+
+# --- Worker (runs one case in its own process) ----------------------------------
+
+def _silenced(func):
+    """Calls func with stdout discarded; the backend prints a lot on every call."""
+    real_stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        return func()
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+
+
+def run_case(case_name, repeats):
+    _, setup = CASES[case_name]
+    result = {'repeats': repeats}
+    try:
+        func = _silenced(setup)
+        _silenced(func)  # warm-up: imports, caches, first-touch of the database pages
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            _silenced(func)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        tracemalloc.start()
+        _silenced(func)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        timings.sort()
+        result.update({
+            'median_ms': round(statistics.median(timings), 4),
+            'mean_ms': round(statistics.fmean(timings), 4),
+            'min_ms': round(timings[0], 4),
+            'p95_ms': round(timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))], 4),
+            'max_ms': round(timings[-1], 4),
+            'peak_memory_kb': round(peak / 1024, 1),
+        })
+    except Exception as e:
+        # Cases that fail on the current schema are still reported, so their fix shows up as a new number.
+        result['error'] = f"{type(e).__name__}: {' '.join(str(e).split())}"
+    return result
+
+
+# --- Orchestration ---------------------------------------------------------------
+
+def fixture_path(size, seed, engineers):
+    return os.path.join(FIXTURE_CACHE_DIR, f"history_{size}_eng{engineers}_seed{seed}_v{FIXTURE_VERSION}.db")
+
+
+def ensure_fixture(size, seed, engineers):
+    path = fixture_path(size, seed, engineers)
+    if not os.path.exists(path):
+        from benchmarks.fixtures import build_workshop_db
+        print(f"Building {size:,}-row fixture (seed {seed}) at {path} ...")
+        start = time.perf_counter()
+        tmp_path = path + '.tmp'
+        build_workshop_db(tmp_path, num_engineers=engineers, num_history_rows=size, num_open_jobs=20, seed=seed)
+        os.replace(tmp_path, path)
+        print(f"  built in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+def run_case_in_subprocess(case_name, repeats, fixture):
+    """Runs one case on a private copy of the fixture so mutating cases cannot affect others."""
+    scratch_dir = tempfile.mkdtemp(prefix='workshop-bench-')
+    try:
+        db_copy = os.path.join(scratch_dir, 'workshop.db')
+        shutil.copyfile(fixture, db_copy)
+        # Models trained or updated by a case go to the scratch directory, never to the deployment's registry.
+        env = dict(os.environ, WORKSHOP_DB_PATH=db_copy, PYTHONWARNINGS='ignore',
+                   MODEL_REGISTRY_DIR=os.path.join(scratch_dir, 'registry'),
+                   ONLINE_MODEL_PATH=os.path.join(scratch_dir, 'job_success_online.joblib'))
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.micro', '--worker', case_name, '--repeats', str(repeats)],
+            cwd=BASE_DIR, env=env, capture_output=True, text=True
+        )
+        last_line = completed.stdout.strip().splitlines()[-1] if completed.stdout.strip() else ''
+        try:
+            return json.loads(last_line)
+        except json.JSONDecodeError:
+            return {'repeats': repeats, 'error': (completed.stderr.strip().splitlines() or ['worker failed'])[-1]}
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Returns a list of regression descriptions (median slower than baseline beyond tolerance)."""
+    regressions = []
+    for size, cases in results['sizes'].items():
+        baseline_cases = baseline.get('sizes', {}).get(size, {})
+        for case_name, stats in cases.items():
+            before = baseline_cases.get(case_name)
+            if not before or 'median_ms' not in before or 'median_ms' not in stats:
+                continue
+            slowdown = stats['median_ms'] - before['median_ms']
+            if stats['median_ms'] > before['median_ms'] * (1 + tolerance) and slowdown > MIN_REGRESSION_MS:
+                regressions.append(
+                    f"{case_name} @ {int(size):,} rows: {before['median_ms']:.2f} ms -> {stats['median_ms']:.2f} ms "
+                    f"(+{(stats['median_ms'] / before['median_ms'] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(results):
+    for size, cases in results['sizes'].items():
+        print(f"\n=== {int(size):,} history rows ===")
+        print(f"{'Case':<46}{'median ms':>12}{'p95 ms':>12}{'peak KB':>12}")
+        for case_name, stats in cases.items():
+            if 'error' in stats:
+                print(f"{case_name:<46}  ERROR: {stats['error'][-120:]}")
+            else:
+                print(f"{case_name:<46}{stats['median_ms']:>12.3f}{stats['p95_ms']:>12.3f}{stats['peak_memory_kb']:>12.1f}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the backend's core hot paths.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help="job_history row counts.")
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), help="Subset of cases to run.")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--engineers', type=int, default=DEFAULT_ENGINEERS)
+    parser.add_argument('--repeats', type=int, help="Override every case's repeat count.")
+    parser.add_argument('--output', help="Write results JSON here.")
+    parser.add_argument('--baseline', help="Compare against this results JSON and exit 1 on regressions.")
+    parser.add_argument('--save-baseline', help="Also write the results to this path as the new baseline.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative median slowdown before flagging a regression.")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.worker:
+        repeats = args.repeats or CASES[args.worker][0]
+        print(json.dumps(run_case(args.worker, repeats)))
+        return 0
+
+    case_names = args.cases or list(CASES)
+    results = {
+        'tool': 'micro_benchmarks',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'seed': args.seed, 'engineers': args.engineers, 'sizes': args.sizes, 'cases': case_names},
+        'sizes': {},
+    }
+    for size in args.sizes:
+        fixture = ensure_fixture(size, args.seed, args.engineers)
+        size_results = {}
+        for case_name in case_names:
+            repeats = args.repeats or CASES[case_name][0]
+            print(f"Running {case_name} @ {size:,} rows ({repeats} repeats) ...")
+            size_results[case_name] = run_case_in_subprocess(case_name, repeats, fixture)
+        results['sizes'][str(size)] = size_results
+
+    print_table(results)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+        print(f"\nResults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as fh:
+            baseline = json.load(fh)
+        regressions = compare_to_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
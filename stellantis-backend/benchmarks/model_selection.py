@@ -0,0 +1,79 @@
+# In benchmarks/model_selection.py
+"""
+Wall-clock scaling of predictive_model.select_model with the number of worker processes.
+
+Encodes the time-series folds once, then runs the same candidate grid with 1, 2, 4, ...
+workers (up to the core count) and reports seconds, speedup and parallel efficiency,
+plus the selected candidate, which must not depend on the worker count.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.model_selection --trees
+    WORKSHOP_DB_PATH=benchmarks/.fixtures/history_100000_eng18_seed42_v2.db python -m benchmarks.model_selection
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+
+from core import predictive_model
+
+
+def default_worker_counts():
+    cores = os.cpu_count() or 1
+    counts, workers = [], 1
+    while workers < cores:
+        counts.append(workers)
+        workers *= 2
+    return counts + [cores]
+
+
+def run(worker_counts, include_trees, n_splits):
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, preprocessor = predictive_model.preprocess_data(predictive_model.fetch_training_data())
+    folds = predictive_model.encode_folds(X, y, preprocessor, n_splits)
+
+    results = []
+    for workers in worker_counts:
+        with contextlib.redirect_stdout(io.StringIO()):
+            summary = predictive_model.select_model(X, y, preprocessor, workers=workers,
+                                                    include_trees=include_trees, folds=folds)
+        results.append({
+            'workers': workers,
+            'seconds': summary['seconds'],
+            'best': summary['best'],
+        })
+    serial = results[0]['seconds']
+    for r in results:
+        r['speedup'] = round(serial / r['seconds'], 2) if r['seconds'] else None
+        r['efficiency'] = round(r['speedup'] / r['workers'], 2) if r['speedup'] else None
+    return {'rows': len(X), 'folds': len(folds), 'candidates': len(predictive_model.candidate_grid(include_trees)),
+            'cores': os.cpu_count(), 'runs': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parallel model selection.")
+    parser.add_argument('--workers', type=int, nargs='+', default=default_worker_counts())
+    parser.add_argument('--trees', action='store_true', help="Include gradient-boosted trees in the grid.")
+    parser.add_argument('--folds', type=int, default=predictive_model.MODEL_SELECTION_FOLDS)
+    parser.add_argument('--output', help="Write results as JSON here.")
+    args = parser.parse_args(argv)
+
+    report = run(args.workers, args.trees, args.folds)
+    print(f"{report['rows']} rows, {report['folds']} folds, {report['candidates']} candidates, "
+          f"{report['cores']} cores")
+    print(f"{'workers':>8}{'seconds':>10}{'speedup':>10}{'efficiency':>12}  best")
+    for r in report['runs']:
+        best = r['best']
+        print(f"{r['workers']:>8}{r['seconds']:>10}{r['speedup']:>10}{r['efficiency']:>12}  "
+              f"{best['kind']} {best['params']} AUC {best['mean_auc']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# In benchmarks/near_duplicate.py
+"""
+Lookup latency and hit rate of the near-duplicate layer at a given index size.
+
+Indexes N synthetic descriptions, then queries with rephrasings of indexed
+descriptions (reordered words, plurals, punctuation, filler words) and with
+unrelated descriptions, and reports p50/p99 lookup time, hit rate on rephrasings,
+false hits on unrelated queries, and how often a hit returned the right answer.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.near_duplicate --entries 100000 --threshold 0.8
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+
+from core.near_duplicate import NearDuplicateIndex
+
+SYMPTOMS = [
+    "brake", "squeak", "grinding", "noise", "rattle", "vibration", "smoke", "leak", "oil", "coolant",
+    "battery", "start", "light", "warning", "engine", "steering", "pull", "left", "right", "tyre",
+    "puncture", "exhaust", "gearbox", "clutch", "smell", "heater", "wiper", "door", "window", "rough",
+    "idle", "misfire", "fuel", "economy", "overheat", "suspension", "clunk", "bump", "front", "rear",
+    "wheel", "alignment", "service", "annual", "check", "filter", "belt", "timing", "chain", "rust",
+]
+FILLERS = ["please", "customer says", "the car", "when cold", "at speed", "since monday", "urgent"]
+# Descriptions mix common symptom words with a long tail of rarer words (models, places,
+# part numbers...), drawn log-uniformly (frequent words are more common) from this many words.
+TAIL_VOCABULARY_SIZE = 5000
+
+
+def _tail_word(rng):
+    return f"term{int(TAIL_VOCABULARY_SIZE ** rng.random())}"
+
+
+def synthetic_description(rng):
+    words = rng.sample(SYMPTOMS, rng.randint(2, 4)) + [_tail_word(rng) for _ in range(rng.randint(1, 3))]
+    return " ".join(dict.fromkeys(words))
+
+
+def rephrase(rng, description):
+    words = description.split()
+    rng.shuffle(words)
+    words = [w + "s" if rng.random() < 0.3 else w for w in words]
+    text = " ".join(words)
+    if rng.random() < 0.5:
+        text = f"{rng.choice(['The', 'My'])} car: {text}"
+    if rng.random() < 0.5:
+        text += "!!"
+    return text
+
+
+def run(entries, queries, threshold, seed):
+    rng = random.Random(seed)
+    index = NearDuplicateIndex(threshold=threshold, max_entries=entries)
+    indexed = []
+    start = time.perf_counter()
+    for i in range(entries):
+        description = synthetic_description(rng)
+        index.add(description, [f"answer-{i}"])
+        indexed.append((description, f"answer-{i}"))
+    build_seconds = time.perf_counter() - start
+
+    timings = []
+    rephrased_hits = correct = unrelated_hits = 0
+    for q in range(queries):
+        if q % 2 == 0:
+            source, answer = rng.choice(indexed)
+            query = rephrase(rng, source)
+        else:
+            query, answer = f"{rng.choice(FILLERS)} {synthetic_description(rng)}", None
+        t = time.perf_counter()
+        match = index.lookup(query)
+        timings.append((time.perf_counter() - t) * 1e6)
+        if answer is None:
+            unrelated_hits += match is not None
+        elif match is not None:
+            rephrased_hits += 1
+            # Several indexed descriptions can share a word set, so "correct" means same words.
+            correct += match[0] == [answer] or match[1] == 1.0
+
+    timings.sort()
+    half = queries // 2
+    return {
+        'entries': len(index),
+        'threshold': threshold,
+        'build_seconds': round(build_seconds, 2),
+        'lookup_p50_us': round(statistics.median(timings), 1),
+        'lookup_p99_us': round(timings[int(0.99 * (len(timings) - 1))], 1),
+        'rephrased_hit_rate': round(rephrased_hits / half, 4),
+        'hit_precision': round(correct / rephrased_hits, 4) if rephrased_hits else None,
+        'unrelated_false_hit_rate': round(unrelated_hits / (queries - half), 4),
+        'index_stats': index.stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the near-duplicate mapping layer.")
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--threshold', type=float, nargs='+', default=[0.8],
+                        help="Similarity thresholds to compare (LSH recall drops below about 0.7).")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    for threshold in args.threshold:
+        print(json.dumps(run(args.entries, args.queries, threshold, args.seed), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# In benchmarks/profile_update.py
+"""
+Time of writing computed engineer profiles back to engineer_profiles: the former
+row-by-row loop (iterrows plus one UPDATE per engineer) against the set-based
+core.engineer_analyzer.write_profiles (executemany into a temp table, one UPDATE ... FROM).
+
+Each run builds an in-memory database with the live engineer_profiles schema, widened
+with `--extra-columns` task score columns to model a growing task catalogue, and checks
+that both writers leave identical tables.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.profile_update --engineers 1000 5000 20000 --extra-columns 0 100
+"""
+import argparse
+import json
+import random
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import copy_schema, generate_engineer_rows
+from core.engineer_analyzer import write_profiles
+
+
+def update_row_by_row(conn, profiles_df):
+    """The analyzer's previous update loop, kept as the baseline."""
+    cursor = conn.cursor()
+    for _, row in profiles_df.iterrows():
+        set_clause = ", ".join([f'"{col}" = ?' for col in profiles_df.columns if col != 'Engineer_ID'])
+        values = [row[col] for col in profiles_df.columns if col != 'Engineer_ID']
+        values.append(row['Engineer_ID'])
+        cursor.execute(f"UPDATE engineer_profiles SET {set_clause} WHERE Engineer_ID = ?", values)
+
+
+def build_database(engineers, extra_columns, seed):
+    conn = sqlite3.connect(':memory:')
+    copy_schema(conn)
+    for index in range(extra_columns):
+        conn.execute(f'ALTER TABLE engineer_profiles ADD COLUMN "Extra_Task_{index}_Score" REAL')
+    generate_engineer_rows(conn, random.Random(seed), engineers)
+    conn.commit()
+    return conn
+
+
+def computed_profiles(conn, seed):
+    """A frame shaped like the analyzer's output: every profile column except the static ones, new values."""
+    profiles = pd.read_sql_query("SELECT * FROM engineer_profiles", conn)
+    profiles = profiles.drop(columns=['Availability', 'Years_of_Experience', 'Specialization', 'Certifications'])
+    rng = np.random.default_rng(seed)
+    for column in profiles.columns:
+        if column.endswith('_Score') and column != 'Overall_Performance_Score':
+            profiles[column] = rng.uniform(0, 100, len(profiles))
+    profiles['Avg_Job_Completion_Time'] = rng.uniform(30, 120, len(profiles))
+    profiles['Customer_Rating'] = rng.uniform(1, 5, len(profiles))
+    profiles['Overall_Performance_Score'] = rng.integers(0, 101, len(profiles))
+    return profiles
+
+
+def run(engineers, extra_columns, seed):
+    results, tables = {}, {}
+    for mode, writer in (('row_by_row', update_row_by_row), ('set_based', write_profiles)):
+        conn = build_database(engineers, extra_columns, seed)
+        profiles = computed_profiles(conn, seed)
+        start = time.perf_counter()
+        writer(conn, profiles)
+        conn.commit()
+        results[mode] = round((time.perf_counter() - start) * 1000, 2)
+        tables[mode] = pd.read_sql_query("SELECT * FROM engineer_profiles ORDER BY Engineer_ID", conn)
+        conn.close()
+    pd.testing.assert_frame_equal(tables['row_by_row'], tables['set_based'])
+    return {
+        'engineers': engineers,
+        'columns': profiles.shape[1],
+        'row_by_row_ms': results['row_by_row'],
+        'set_based_ms': results['set_based'],
+        'speedup': round(results['row_by_row'] / results['set_based'], 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark writing engineer profiles row by row vs set-based.")
+    parser.add_argument('--engineers', type=int, nargs='+', default=[1000, 5000, 20000])
+    parser.add_argument('--extra-columns', type=int, nargs='+', default=[0, 100])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON here.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'engineers':>10}{'columns':>9}{'row by row ms':>15}{'set-based ms':>14}{'speedup':>9}")
+    for extra_columns in args.extra_columns:
+        for engineers in args.engineers:
+            result = run(engineers, extra_columns, args.seed)
+            results.append(result)
+            print(f"{result['engineers']:>10,}{result['columns']:>9}{result['row_by_row_ms']:>15}"
+                  f"{result['set_based_ms']:>14}{result['speedup']:>8}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'runs': results}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
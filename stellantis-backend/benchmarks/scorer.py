@@ -0,0 +1,104 @@
+# In benchmarks/scorer.py
+"""
+Per-call latency of the compiled NumPy scorer against the sklearn pipeline it was
+compiled from, at several batch sizes, and the largest difference between their
+predict_proba outputs.
+
+Trains on the configured database (WORKSHOP_DB_PATH) without publishing a version.
+Also reports, in a fresh interpreter, the import time of the serving path
+(core.job_assigner) and whether it pulled in scikit-learn.
+
+Usage (from stellantis-backend/):
+    python -m benchmarks.scorer --batch-sizes 1 18 1000 100000
+"""
+import argparse
+import contextlib
+import io
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from core import predictive_model
+
+IMPORT_CHECK = (
+    "import sys, time; t = time.perf_counter(); import core.job_assigner; "
+    "print(round((time.perf_counter() - t) * 1000, 1), 'sklearn' in sys.modules)"
+)
+
+
+def _median_us(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def train_pipeline():
+    with contextlib.redirect_stdout(io.StringIO()):
+        X, y, preprocessor = predictive_model.preprocess_data(predictive_model.fetch_training_data())
+    pipeline = Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')),
+    ]).fit(X, y)
+    return pipeline, X
+
+
+def run(batch_sizes, repeats, seed):
+    pipeline, X = train_pipeline()
+    scorer = predictive_model.compile_pipeline(pipeline)
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in batch_sizes:
+        batch = X.iloc[rng.integers(0, len(X), size)].reset_index(drop=True)
+        reps = max(5, repeats // max(1, size // 100))
+        pipeline_us = _median_us(lambda: pipeline.predict_proba(batch), reps)
+        scorer_us = _median_us(lambda: scorer.predict_proba(batch), reps)
+        difference = np.max(np.abs(pipeline.predict_proba(batch) - scorer.predict_proba(batch)))
+        results.append({
+            'batch_size': size,
+            'pipeline_us': round(pipeline_us, 1),
+            'compiled_us': round(scorer_us, 1),
+            'speedup': round(pipeline_us / scorer_us, 1),
+            'max_abs_diff': float(difference),
+        })
+    return results
+
+
+def serving_import():
+    output = subprocess.run([sys.executable, '-c', IMPORT_CHECK], capture_output=True, text=True, check=True)
+    import_ms, sklearn_loaded = output.stdout.split()[-2:]
+    return {'import_ms': float(import_ms), 'sklearn_loaded': sklearn_loaded == 'True'}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the compiled scorer against the sklearn pipeline.")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 18, 1000, 100000])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write results as JSON here.")
+    args = parser.parse_args(argv)
+
+    results = run(args.batch_sizes, args.repeats, args.seed)
+    print(f"{'batch':>8}{'pipeline us':>14}{'compiled us':>14}{'speedup':>10}{'max diff':>12}")
+    for r in results:
+        print(f"{r['batch_size']:>8}{r['pipeline_us']:>14}{r['compiled_us']:>14}{r['speedup']:>9}x"
+              f"{r['max_abs_diff']:>12.1e}")
+    serving = serving_import()
+    print(f"Serving path import: {serving['import_ms']} ms, scikit-learn loaded: {serving['sklearn_loaded']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump({'batches': results, 'serving_import': serving}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
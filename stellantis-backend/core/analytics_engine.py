@@ -0,0 +1,214 @@
+# In core/analytics_engine.py
+"""
+The job_history aggregations behind the engineer profiles, on a pluggable compute engine.
+
+profile_metrics() turns completed history rows into one row per engineer with
+Avg_Job_Completion_Time, Customer_Rating, one Overall_<Job_Name>_Score per job type and
+one <Task_Description>_Score per task (outcome means rescaled to 0-100). It is used by
+core.engineer_analyzer and generate_and_load.py.
+
+Engines (ANALYTICS_ENGINE, default 'pandas'):
+    pandas  the original groupby/unstack passes, single-threaded.
+    polars  the same aggregations as one lazy query plan, run on Polars' thread pool
+            (size it with POLARS_MAX_THREADS). Needs `pip install polars`.
+
+History is read from the database, or from a Parquet snapshot of the completed rows
+(ANALYTICS_HISTORY_PARQUET, written with --snapshot) so large analyses do not hold a
+read on the live database.
+
+Usage (from stellantis-backend/):
+    python -m core.analytics_engine --check                    # pandas vs polars parity
+    python -m core.analytics_engine --snapshot data/history.parquet
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
+ENGINE = os.getenv('ANALYTICS_ENGINE', 'pandas')
+HISTORY_PARQUET = os.getenv('ANALYTICS_HISTORY_PARQUET')
+ENGINES = ('pandas', 'polars')
+
+ENGINEER_COLUMN = 'Engineer_Id'
+HISTORY_COLUMNS = ('Engineer_Id', 'Job_Name', 'Task_Description', 'Time_Taken_minutes', 'Outcome_Score')
+HISTORY_QUERY = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM job_history WHERE Status = 'Completed'"
+
+
+def job_score_column(job_name):
+    return f"Overall_{job_name.replace(' ', '_')}_Score"
+
+
+def task_score_column(task_description):
+    return f"{task_description.replace(' ', '_').replace('(', '').replace(')', '').replace(',', '')}_Score"
+
+
+def _outcome_to_score(mean_outcome):
+    """Maps a mean Outcome_Score on the 1-5 scale to 0-100."""
+    return ((mean_outcome - 1) / 4) * 100
+
+
+def _import_polars():
+    try:
+        import polars as pl
+    except ImportError as e:
+        raise RuntimeError("The polars analytics engine needs the polars package: pip install polars") from e
+    return pl
+
+
+def _check_engine(engine):
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown analytics engine '{engine}'; expected one of {', '.join(ENGINES)}.")
+
+
+# --- Reading history ----------------------------------------------------------------
+
+def load_history(engine=None, source=None, conn=None):
+    """
+    The completed history rows (HISTORY_COLUMNS) as a frame of the given engine: a pandas
+    DataFrame, or a polars LazyFrame so the read is planned together with the aggregations.
+    `source` is a Parquet snapshot path; without one the rows are read from `conn`
+    (or a new connection to DB_PATH).
+    """
+    engine = engine or ENGINE
+    _check_engine(engine)
+    source = source or HISTORY_PARQUET
+    if source:
+        if engine == 'polars':
+            return _import_polars().scan_parquet(source).select(HISTORY_COLUMNS)
+        return pd.read_parquet(source, columns=list(HISTORY_COLUMNS))
+
+    own_conn = conn is None
+    conn = conn or sqlite3.connect(DB_PATH)
+    try:
+        if engine == 'polars':
+            return _import_polars().read_database(HISTORY_QUERY, connection=conn).lazy()
+        return pd.read_sql_query(HISTORY_QUERY, conn)
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def write_snapshot(path, conn=None):
+    """Writes the completed history rows to a Parquet file; returns the row count."""
+    own_conn = conn is None
+    conn = conn or sqlite3.connect(DB_PATH)
+    try:
+        history = pd.read_sql_query(HISTORY_QUERY, conn)
+    finally:
+        if own_conn:
+            conn.close()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    history.to_parquet(path, index=False)
+    return len(history)
+
+
+# --- Aggregations ---------------------------------------------------------------------
+
+def _pandas_metrics(history):
+    engineer_stats = history.groupby(ENGINEER_COLUMN).agg(
+        Avg_Job_Completion_Time=('Time_Taken_minutes', 'mean'),
+        Customer_Rating=('Outcome_Score', 'mean')
+    )
+
+    job_scores = _outcome_to_score(history.groupby([ENGINEER_COLUMN, 'Job_Name'])['Outcome_Score'].mean().unstack())
+    job_scores.columns = [job_score_column(col) for col in job_scores.columns]
+
+    task_scores = _outcome_to_score(
+        history.groupby([ENGINEER_COLUMN, 'Task_Description'])['Outcome_Score'].mean().unstack())
+    task_scores.columns = [task_score_column(col) for col in task_scores.columns]
+
+    return engineer_stats.join(job_scores).join(task_scores)
+
+
+def _polars_metrics(history):
+    pl = _import_polars()
+    if isinstance(history, pd.DataFrame):
+        # NaN becomes null, which polars' aggregations skip as pandas skips NaN.
+        history = pl.DataFrame({column: history[column].to_numpy() for column in HISTORY_COLUMNS},
+                               nan_to_null=True).lazy()
+    engineer_stats = history.group_by(ENGINEER_COLUMN).agg(
+        pl.col('Time_Taken_minutes').mean().alias('Avg_Job_Completion_Time'),
+        pl.col('Outcome_Score').mean().alias('Customer_Rating'),
+    )
+    job_means = history.group_by(ENGINEER_COLUMN, 'Job_Name').agg(pl.col('Outcome_Score').mean())
+    task_means = history.group_by(ENGINEER_COLUMN, 'Task_Description').agg(pl.col('Outcome_Score').mean())
+    # One plan for all three: the scan is shared and the group-bys run in parallel.
+    engineer_stats, job_means, task_means = pl.collect_all([engineer_stats, job_means, task_means])
+
+    def to_pandas(frame):
+        # The results have one row per engineer, so plain dicts avoid a pyarrow dependency.
+        return pd.DataFrame(frame.to_dict(as_series=False)).set_index(ENGINEER_COLUMN)
+
+    def wide_scores(means, column, rename):
+        wide = to_pandas(means.pivot(on=column, index=ENGINEER_COLUMN, values='Outcome_Score'))
+        wide = _outcome_to_score(wide[sorted(wide.columns)])
+        wide.columns = [rename(col) for col in wide.columns]
+        return wide
+
+    metrics = to_pandas(engineer_stats)
+    metrics = metrics.join(wide_scores(job_means, 'Job_Name', job_score_column))
+    metrics = metrics.join(wide_scores(task_means, 'Task_Description', task_score_column))
+    return metrics.sort_index()
+
+
+def profile_metrics(history=None, engine=None):
+    """
+    Per-engineer metrics from the completed history: a pandas DataFrame indexed by
+    Engineer_Id with Avg_Job_Completion_Time, Customer_Rating and the job and task
+    score columns (NaN where an engineer has no history for that job or task).
+    `history` is what load_history() returns for the same engine (a pandas DataFrame is
+    accepted by both), or None to load it.
+    """
+    engine = engine or ENGINE
+    _check_engine(engine)
+    if history is None:
+        history = load_history(engine)
+    metrics = _polars_metrics(history) if engine == 'polars' else _pandas_metrics(history)
+    metrics.index.name = ENGINEER_COLUMN
+    return metrics
+
+
+def check_parity(source=None, tolerance=1e-9):
+    """Runs both engines on the same history; returns the largest absolute difference (None if the columns differ)."""
+    results = {}
+    for engine in ENGINES:
+        start = time.perf_counter()
+        results[engine] = profile_metrics(load_history(engine, source), engine)
+        print(f"{engine:<8}{len(results[engine]):>6} engineers {results[engine].shape[1]:>4} columns "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    expected, actual = results['pandas'], results['polars'].reindex(results['pandas'].index)
+    if list(expected.columns) != list(actual.columns):
+        print(f"Column mismatch: {sorted(set(expected.columns) ^ set(actual.columns))}")
+        return None
+    both_missing = expected.isna().to_numpy() & actual.isna().to_numpy()
+    diff = np.where(both_missing, 0.0, np.abs(expected.to_numpy(dtype=float) - actual.to_numpy(dtype=float)))
+    max_diff = float(np.nan_to_num(diff, nan=np.inf).max()) if diff.size else 0.0
+    print(f"Largest difference: {max_diff:.3g} ({'OK' if max_diff <= tolerance else 'MISMATCH'})")
+    return max_diff
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Engineer profile aggregations on pandas or polars.")
+    parser.add_argument('--check', action='store_true', help="Compare the pandas and polars results.")
+    parser.add_argument('--snapshot', metavar='PATH', help="Write the completed history to a Parquet file.")
+    parser.add_argument('--source', metavar='PATH', help="Read history from this Parquet snapshot instead of the database.")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        start = time.perf_counter()
+        rows = write_snapshot(args.snapshot)
+        print(f"Wrote {rows} history rows to {args.snapshot} in {time.perf_counter() - start:.2f}s")
+    if args.check:
+        max_diff = check_parity(args.source)
+        return 0 if max_diff is not None and max_diff <= 1e-9 else 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
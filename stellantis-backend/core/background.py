@@ -0,0 +1,36 @@
+# In core/background.py
+"""
+Coalescing background workers: request handlers ask for a piece of work to be done soon
+without waiting for it, and requests made while it is running are folded into one more run.
+"""
+import threading
+
+
+def coalescing_worker(name, work):
+    """
+    Returns request(), which has a daemon thread (started on the first call) run work()
+    once more. Errors are printed and the thread keeps serving requests.
+    """
+    requested = threading.Event()
+    start_lock = threading.Lock()
+    threads = []
+
+    def run():
+        while True:
+            requested.wait()
+            requested.clear()
+            try:
+                work()
+            except Exception as e:
+                print(f"Background work '{name}' failed: {e}")
+
+    def request():
+        if not threads:
+            with start_lock:
+                if not threads:
+                    thread = threading.Thread(target=run, daemon=True, name=name)
+                    thread.start()
+                    threads.append(thread)
+        requested.set()
+
+    return request
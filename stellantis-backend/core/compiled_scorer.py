@@ -0,0 +1,77 @@
+# In core/compiled_scorer.py
+"""
+NumPy-only scorer for the job success model.
+
+predictive_model.compile_pipeline() exports a fitted pipeline (one-hot encoder +
+standard scaler + logistic regression) as a weight per known category, a weight per
+numerical feature (with the scaler folded in) and an intercept. Scoring a batch is a
+dictionary lookup per categorical value, one matrix-vector product and a sigmoid, and
+matches the pipeline's predict_proba to within 1e-9 without importing scikit-learn.
+
+The export is stored as JSON (SCORER_FILE) next to each registered model version.
+"""
+import json
+import os
+
+import numpy as np
+
+SCORER_FILE = "scorer.json"
+
+
+class CompiledScorer:
+    """Logistic regression over one-hot categorical and standardized numerical features."""
+
+    def __init__(self, categorical_weights, numerical_features, numerical_weights, intercept):
+        # {feature: {category: weight}}; unknown categories contribute 0, like handle_unknown='ignore'.
+        self.categorical_weights = categorical_weights
+        self.numerical_features = list(numerical_features)
+        self.numerical_weights = np.asarray(numerical_weights, dtype=float)
+        self.intercept = float(intercept)
+
+    @classmethod
+    def from_parts(cls, categorical_weights, numerical_features, mean, scale, coef, intercept):
+        """Folds the scaler into the weights: ((x - mean) / scale) @ coef == x @ w + b."""
+        weights = np.asarray(coef, dtype=float) / np.asarray(scale, dtype=float)
+        return cls(categorical_weights, numerical_features, weights,
+                   float(intercept) - float(np.dot(np.asarray(mean, dtype=float), weights)))
+
+    def decision_function(self, X):
+        """Log-odds of high success for each row of X (a DataFrame or a dict of columns)."""
+        # Column by column: selecting a sub-frame costs more than scoring a small batch.
+        numeric = np.column_stack([np.asarray(X[f], dtype=float) for f in self.numerical_features])
+        scores = numeric @ self.numerical_weights + self.intercept
+        for feature, weights in self.categorical_weights.items():
+            values = np.asarray(X[feature], dtype=object)
+            scores += np.fromiter(map(weights.get, values, [0.0] * len(values)), dtype=float, count=len(values))
+        return scores
+
+    def predict_proba(self, X):
+        """[P(not high success), P(high success)] per row, the same shape as the pipeline's."""
+        positive = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - positive, positive])
+
+    def to_json(self):
+        return json.dumps({
+            # Pairs rather than objects, so non-string categories keep their type.
+            'categorical_weights': {feature: [[category, weight] for category, weight in weights.items()]
+                                    for feature, weights in self.categorical_weights.items()},
+            'numerical_features': self.numerical_features,
+            'numerical_weights': self.numerical_weights.tolist(),
+            'intercept': self.intercept,
+        })
+
+    @classmethod
+    def from_json(cls, text):
+        data = json.loads(text)
+        return cls({feature: {category: weight for category, weight in pairs}
+                    for feature, pairs in data['categorical_weights'].items()},
+                   data['numerical_features'], data['numerical_weights'], data['intercept'])
+
+
+def load_from_dir(version_dir):
+    """Model-registry loader: the version's compiled scorer, or None if it was not exported."""
+    path = os.path.join(version_dir, SCORER_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as fh:
+        return CompiledScorer.from_json(fh.read())
@@ -5,7 +5,7 @@ import os
 
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
 # This is the Excel file you want to load
 HISTORY_EXCEL_PATH = os.path.join(BASE_DIR, 'data/generated_flat_job_history.xlsx') 
 ENGINEER_PROFILES_EXCEL_PATH = os.path.join(BASE_DIR, 'data/engineer_profiles.xlsx') 
@@ -3,7 +3,7 @@ import sqlite3
 import os
 
 DATABASE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database')
-DATABASE_NAME = os.path.join(DATABASE_DIR, 'workshop.db')
+DATABASE_NAME = os.getenv('WORKSHOP_DB_PATH', os.path.join(DATABASE_DIR, 'workshop.db'))
 
 def create_connection(db_file):
     os.makedirs(os.path.dirname(db_file), exist_ok=True)
@@ -131,6 +131,15 @@ def setup_database():
         Cabin_Filter_Replacement_Score REAL
     );
     """
+    # Persistent tier of the service-mapping cache (see core/mapping_cache.py)
+    sql_create_service_mapping_cache_table = """
+    CREATE TABLE IF NOT EXISTS service_mapping_cache (
+        Description_Key TEXT PRIMARY KEY,
+        Services TEXT NOT NULL,
+        Created_At REAL NOT NULL,
+        Expires_At REAL NOT NULL
+    );
+    """
 
     conn = create_connection(DATABASE_NAME)
 
@@ -142,6 +151,7 @@ def setup_database():
         create_table(conn, sql_create_job_task_mapping_table)
         create_table(conn, sql_create_engineer_profiles_table)
         create_table(conn, sql_create_job_card_table)
+        create_table(conn, sql_create_service_mapping_cache_table)
         conn.close()
         print("Database setup complete.")
     else:
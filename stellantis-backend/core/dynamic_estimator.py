@@ -2,31 +2,42 @@ import sqlite3
 import os
 from datetime import datetime
 
+import pandas as pd
+
+from core import feature_store, instrumentation
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
 
+@instrumentation.timed("get_dynamic_task_estimate")
 def get_dynamic_task_estimate(task_id, engineer_id, conn=None):
     created_connection = False
     if conn is None:
-        conn = sqlite3.connect(DB_PATH)
+        conn = instrumentation.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         created_connection = True
 
     try:
         cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT AVG(Time_Taken_minutes) 
-            FROM job_history 
-            WHERE Engineer_Id = ? AND Task_ID = ?
-        """, (engineer_id, task_id))
-        result = cursor.fetchone()
-        engineer_avg_time = result[0] if result and result[0] is not None else None
-
-        cursor.execute("SELECT Estimated_Standard_Time FROM job_card WHERE Task_Id = ?", (task_id,))
+
+        cursor.execute("SELECT Estimated_Standard_Time, Task_Description FROM job_card WHERE Task_Id = ?", (task_id,))
         task_def_result = cursor.fetchone()
         standard_estimate = task_def_result[0] if task_def_result else 60
 
+        # The engineer's average time on this task type, from the feature store (or from the
+        # history itself until the store has been built)
+        engineer_avg_time = None
+        if task_def_result and feature_store.is_built(conn):
+            features = feature_store.read_features([(engineer_id, task_def_result[1])],
+                                                   features=['eng_task_avg_time_taken'], conn=conn)
+            engineer_avg_time = features['eng_task_avg_time_taken'].iloc[0]
+            engineer_avg_time = None if pd.isna(engineer_avg_time) else float(engineer_avg_time)
+        elif task_def_result:
+            cursor.execute(
+                "SELECT AVG(Time_Taken_minutes) FROM job_history WHERE Engineer_Id = ? AND Task_Description = ?",
+                (engineer_id, task_def_result[1]))
+            engineer_avg_time = cursor.fetchone()[0]
+
         cursor.execute("SELECT Years_of_Experience FROM engineer_profiles WHERE engineer_id = ?", (engineer_id,))
         eng_profile_result = cursor.fetchone()
         experience_level = eng_profile_result[0] if eng_profile_result else 'Junior'
@@ -48,10 +59,11 @@ def get_dynamic_task_estimate(task_id, engineer_id, conn=None):
         if created_connection:
             conn.close()
 
+@instrumentation.timed("get_dynamic_job_estimate")
 def get_dynamic_job_estimate(job_id):
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = instrumentation.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -4,78 +4,90 @@ import sqlite3
 import os
 import numpy as np
 
+from core import analytics_engine
+
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
+
+PERFORMANCE_WEIGHTS = {'quality': 0.75, 'customer': 0.05, 'timeliness': 0.20}
+
+def performance_score_columns(columns):
+    """The job and task score columns averaged into the quality part of the overall score."""
+    return [col for col in columns if col.endswith('_Score') and 'Overall_Performance_Score' not in col]
+
+def weighted_performance(quality_score, customer_rating, avg_completion_time, global_avg_time):
+    """The unrounded Overall_Performance_Score for scalars or arrays of engineers."""
+    normalized_customer_rating = ((customer_rating - 1) / 4) * 100
+    speed_factor = global_avg_time / avg_completion_time
+    timeliness_score = np.clip(speed_factor * 75, 0, 100)
+    weights = PERFORMANCE_WEIGHTS
+    return (quality_score * weights['quality'] + normalized_customer_rating * weights['customer'] + timeliness_score * weights['timeliness'])
 
 def calculate_overall_performance(engineer_df):
     """Calculates a credible Overall_Performance_Score using a weighted average."""
     print("Calculating credible Overall_Performance_Score...")
-    score_columns = [col for col in engineer_df.columns if col.endswith('_Score') and 'Overall_Performance_Score' not in col]
-    
-    engineer_df['Quality_Score'] = engineer_df[score_columns].mean(axis=1)
-    engineer_df['Normalized_Customer_Rating'] = ((engineer_df['Customer_Rating'] - 1) / 4) * 100
+    score_columns = performance_score_columns(engineer_df.columns)
     
+    quality_score = engineer_df[score_columns].mean(axis=1)
     global_avg_time = engineer_df['Avg_Job_Completion_Time'].mean()
-    speed_factor = global_avg_time / engineer_df['Avg_Job_Completion_Time']
-    
-    engineer_df['Timeliness_Score'] = np.clip(speed_factor * 75, 0, 100)
-    
-    weights = {'quality': 0.75, 'customer': 0.05, 'timeliness': 0.20}
-    final_score = (engineer_df['Quality_Score'] * weights['quality'] + engineer_df['Normalized_Customer_Rating'] * weights['customer'] + engineer_df['Timeliness_Score'] * weights['timeliness'])
+    final_score = weighted_performance(quality_score, engineer_df['Customer_Rating'], engineer_df['Avg_Job_Completion_Time'], global_avg_time)
     
     engineer_df['Overall_Performance_Score'] = np.clip(final_score.round().astype(int), 0, 100)
-    
-    columns_to_drop = ['Quality_Score', 'Normalized_Customer_Rating', 'Timeliness_Score']
-    
-    engineer_df.drop(columns=columns_to_drop, inplace=True, errors='ignore')
     return engineer_df
 
-def analyze_and_update_profiles():
+def write_profiles(conn, profiles_df):
+    """
+    Writes every column of profiles_df onto the engineer_profiles rows with the same
+    Engineer_ID, as one set-based UPDATE: the frame is bulk-loaded into a temp table with
+    executemany (column arrays, no per-row boxing) and joined with UPDATE ... FROM.
+    The caller commits.
+    """
+    columns = [col for col in profiles_df.columns if col != 'Engineer_ID']
+    quoted = [f'"{col}"' for col in columns]
+    conn.execute("DROP TABLE IF EXISTS temp.profile_updates")
+    conn.execute(f"CREATE TEMP TABLE profile_updates (Engineer_ID TEXT PRIMARY KEY, {', '.join(quoted)})")
+    # tolist() turns each NumPy column into plain Python values that sqlite3 can bind.
+    column_values = [profiles_df[col].to_numpy().tolist() for col in ['Engineer_ID'] + columns]
+    placeholders = ", ".join("?" for _ in column_values)
+    conn.executemany(f"INSERT INTO profile_updates VALUES ({placeholders})", zip(*column_values))
+    set_clause = ", ".join(f"{col} = u.{col}" for col in quoted)
+    conn.execute(f"""
+        UPDATE engineer_profiles SET {set_clause}
+        FROM profile_updates AS u
+        WHERE engineer_profiles.Engineer_ID = u.Engineer_ID
+    """)
+    conn.execute("DROP TABLE temp.profile_updates")
+
+def analyze_and_update_profiles(engine=None, source=None):
     """
     Reads from the job_history table, calculates performance metrics,
     and updates the engineer_profiles table in the database.
+    `engine` and `source` select the analytics engine and an optional Parquet
+    history snapshot (see core.analytics_engine); both default to the environment.
+    Returns True on success (including when there is no history), False on failure.
     """
     print("--- Starting Engineer Performance Analysis ---")
     conn = sqlite3.connect(DB_PATH)
     
     try:
-        # 1. Read all necessary data from the database
+        # 1. Read all necessary data from the database (or the history snapshot)
         print("Reading data from database...")
-        df_history = pd.read_sql_query("SELECT * FROM job_history WHERE Status = 'Completed'", conn)
+        df_history = analytics_engine.load_history(engine, source, conn)
         df_profiles = pd.read_sql_query("SELECT * FROM engineer_profiles", conn)
 
-        if df_history.empty:
-            print("Job history is empty. No new data to analyze.")
-            return
-
         # 2. Calculate REAL metrics from the job history data
-        print("Calculating performance metrics from history...")
-        # General stats
-        engineer_stats = df_history.groupby('Assigned_Engineer_Id').agg(
-            Avg_Job_Completion_Time=('Time_Taken_minutes', 'mean'),
-            Customer_Rating=('Outcome_Score', 'mean')
-        ).reset_index()
-
-        # Job-level scores
-        job_scores = df_history.groupby(['Assigned_Engineer_Id', 'Job_Name'])['Outcome_Score'].mean().unstack()
-        job_scores = ((job_scores - 1) / 4) * 100
-        job_scores.columns = [f"Overall_{col.replace(' ', '_')}_Score" for col in job_scores.columns]
-        
-        # Task-level scores
-        task_scores = df_history.groupby(['Assigned_Engineer_Id', 'Task_to_be_done'])['Outcome_Score'].mean().unstack()
-        task_scores = ((task_scores - 1) / 4) * 100
-        task_scores.columns = [f"{col.replace(' ', '_').replace('(', '').replace(')', '').replace(',', '')}_Score" for col in task_scores.columns]
+        print(f"Calculating performance metrics from history ({engine or analytics_engine.ENGINE} engine)...")
+        metrics = analytics_engine.profile_metrics(df_history, engine)
+        if metrics.empty:
+            print("Job history is empty. No new data to analyze.")
+            return True
 
         # 3. Merge calculated scores into the base profiles
         print("Merging calculated scores...")
-        # Start with the original profiles
-        updated_df = pd.merge(df_profiles[['Engineer_ID', 'Engineer_Name']], engineer_stats, left_on='Engineer_ID', right_on='Assigned_Engineer_Id', how='left')
-        updated_df = pd.merge(updated_df, job_scores, left_on='Engineer_ID', right_on='Assigned_Engineer_Id', how='left')
-        updated_df = pd.merge(updated_df, task_scores, left_on='Engineer_ID', right_on='Assigned_Engineer_Id', how='left')
+        updated_df = pd.merge(df_profiles[['Engineer_ID', 'Engineer_Name']], metrics, left_on='Engineer_ID', right_index=True, how='left')
         
-        # Clean up and fill missing values
-        updated_df.drop(columns=[col for col in updated_df.columns if 'Assigned_Engineer_Id' in str(col)], inplace=True)
+        # Fill missing values
         score_cols_to_fill = [col for col in updated_df.columns if '_Score' in col]
         updated_df[score_cols_to_fill] = updated_df[score_cols_to_fill].fillna(75.0)
         updated_df['Avg_Job_Completion_Time'].fillna(updated_df['Avg_Job_Completion_Time'].mean(), inplace=True)
@@ -86,21 +98,17 @@ def analyze_and_update_profiles():
         
         # 5. Update the database table
         print("Updating engineer_profiles table in the database...")
-        cursor = conn.cursor()
-        for _, row in final_profiles_df.iterrows():
-            # Prepare the SET part of the SQL query dynamically
-            set_clause = ", ".join([f'"{col}" = ?' for col in final_profiles_df.columns if col != 'Engineer_ID'])
-            values = [row[col] for col in final_profiles_df.columns if col != 'Engineer_ID']
-            values.append(row['Engineer_ID']) # for the WHERE clause
-            
-            sql_update = f"UPDATE engineer_profiles SET {set_clause} WHERE Engineer_ID = ?"
-            cursor.execute(sql_update, values)
-
+        write_profiles(conn, final_profiles_df)
+        # The incremental scorer's running global average must follow the rewritten profiles
+        from core import engineer_scoring
+        engineer_scoring.reseed_global_average(conn)
         conn.commit()
         print(f"Successfully updated {len(final_profiles_df)} records in the engineer_profiles table.")
+        return True
 
     except Exception as e:
         print(f"An error occurred during analysis: {e}")
+        return False
     finally:
         if conn:
             conn.close()
@@ -0,0 +1,234 @@
+# In core/engineer_scoring.py
+"""
+Incremental engineer performance scoring, kept current on every task completion.
+
+For each engineer and profile column it derives from history (Avg_Job_Completion_Time,
+Customer_Rating, Overall_<Job_Name>_Score and <Task_Description>_Score) the running
+total and count are kept in engineer_score_totals. update_from_history() folds in the
+job_history rows added since the last update and rewrites only the touched engineers'
+columns, then recomputes their Overall_Performance_Score with the analyzer's formula
+(core.engineer_analyzer.weighted_performance). The global average completion time the
+formula needs is kept as a running sum and count of the profiles' averages, so each
+completion costs O(1) in the size of the history and of the workforce.
+
+Other engineers' overall scores move slightly with the global average; they follow on
+their next completion, or on the next full run of core.engineer_analyzer, which also
+re-seeds the running global average. Run `python -m core.engineer_scoring --rebuild`
+to recompute the totals from the whole history.
+"""
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import analytics_engine, instrumentation
+from core.engineer_analyzer import performance_score_columns, weighted_performance
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
+
+TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS engineer_score_totals (
+        Engineer_Id TEXT NOT NULL,
+        Profile_Column TEXT NOT NULL,
+        Total REAL NOT NULL,
+        Count INTEGER NOT NULL,
+        PRIMARY KEY (Engineer_Id, Profile_Column)
+    )
+    """,
+    # last_history_rowid, and avg_time_sum / avg_time_count for the global average completion time
+    """
+    CREATE TABLE IF NOT EXISTS engineer_scoring_state (
+        Name TEXT PRIMARY KEY,
+        Value REAL NOT NULL
+    )
+    """,
+]
+
+_tables_ready = set()
+
+
+def connect():
+    conn = instrumentation.connect(DB_PATH, timeout=10)
+    ensure_tables(conn)
+    return conn
+
+
+def _create_tables(conn):
+    for statement in TABLES_SQL:
+        conn.execute(statement)
+
+
+def ensure_tables(conn):
+    """Creates the scoring tables on a connection to DB_PATH (once per process) and commits."""
+    if DB_PATH in _tables_ready:
+        return
+    _create_tables(conn)
+    conn.commit()
+    _tables_ready.add(DB_PATH)
+
+
+def _read_state(conn):
+    return dict(conn.execute("SELECT Name, Value FROM engineer_scoring_state").fetchall())
+
+
+def _write_state(conn, values):
+    conn.executemany("""
+        INSERT INTO engineer_scoring_state (Name, Value) VALUES (?, ?)
+        ON CONFLICT (Name) DO UPDATE SET Value = excluded.Value
+    """, values.items())
+
+
+def reseed_global_average(conn):
+    """
+    Resets the running global average completion time from engineer_profiles on the
+    caller's connection, inside its transaction: the caller commits.
+    """
+    # Not ensure_tables(): a borrowed connection must not be committed halfway, and it may
+    # not be to DB_PATH. CREATE TABLE IF NOT EXISTS joins the caller's transaction instead.
+    _create_tables(conn)
+    total, count = conn.execute(
+        "SELECT COALESCE(SUM(Avg_Job_Completion_Time), 0), COUNT(Avg_Job_Completion_Time) FROM engineer_profiles"
+    ).fetchone()
+    _write_state(conn, {'avg_time_sum': total, 'avg_time_count': count})
+
+
+def _history_deltas(rows):
+    """Per (engineer, profile column): the sum and count of the new values it averages."""
+    outcome = pd.to_numeric(rows['Outcome_Score'], errors='coerce')
+    parts = [
+        pd.DataFrame({'Engineer_Id': rows['Engineer_Id'], 'Profile_Column': 'Avg_Job_Completion_Time',
+                      'Value': pd.to_numeric(rows['Time_Taken_minutes'], errors='coerce')}),
+        pd.DataFrame({'Engineer_Id': rows['Engineer_Id'], 'Profile_Column': 'Customer_Rating', 'Value': outcome}),
+        pd.DataFrame({'Engineer_Id': rows['Engineer_Id'],
+                      'Profile_Column': rows['Job_Name'].map(analytics_engine.job_score_column, na_action='ignore'),
+                      'Value': outcome}),
+        pd.DataFrame({'Engineer_Id': rows['Engineer_Id'],
+                      'Profile_Column': rows['Task_Description'].map(analytics_engine.task_score_column, na_action='ignore'),
+                      'Value': outcome}),
+    ]
+    # A row without a job name or task description still counts towards its other columns.
+    long = pd.concat(parts, ignore_index=True).dropna()
+    return long.groupby(['Engineer_Id', 'Profile_Column'], sort=False)['Value'].agg(['sum', 'count']).reset_index()
+
+
+def _profile_value(column, mean):
+    """A profile column's value from the mean of its history values (outcomes are rescaled to 0-100)."""
+    if column in ('Avg_Job_Completion_Time', 'Customer_Rating'):
+        return mean
+    return ((mean - 1) / 4) * 100
+
+
+def update_from_history():
+    """
+    Applies job_history rows added since the last update to the running totals and
+    rewrites the affected engineers' profile columns and Overall_Performance_Score.
+    Runs under a write lock, so concurrent callers never apply a row twice. Returns a
+    summary dict.
+    """
+    start = time.perf_counter()
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        state = _read_state(conn)
+        last_rowid = int(state.get('last_history_rowid', 0))
+        newest_rowid = conn.execute("SELECT MAX(rowid) FROM job_history").fetchone()[0] or 0
+        if newest_rowid <= last_rowid:
+            conn.rollback()
+            return {'rows': 0, 'engineers': 0, 'last_history_rowid': last_rowid,
+                    'milliseconds': round((time.perf_counter() - start) * 1000, 2)}
+
+        rows = pd.read_sql_query("""
+            SELECT Engineer_Id, Job_Name, Task_Description, Time_Taken_minutes, Outcome_Score
+            FROM job_history
+            WHERE rowid > ? AND rowid <= ? AND Status = 'Completed' AND Engineer_Id IS NOT NULL
+        """, conn, params=(last_rowid, newest_rowid))
+        deltas = _history_deltas(rows)
+        conn.executemany("""
+            INSERT INTO engineer_score_totals (Engineer_Id, Profile_Column, Total, Count) VALUES (?, ?, ?, ?)
+            ON CONFLICT (Engineer_Id, Profile_Column) DO UPDATE SET
+                Total = Total + excluded.Total, Count = Count + excluded.Count
+        """, zip(deltas['Engineer_Id'], deltas['Profile_Column'], deltas['sum'].tolist(), deltas['count'].tolist()))
+
+        if 'avg_time_sum' not in state:
+            reseed_global_average(conn)
+            state = _read_state(conn)
+        avg_time_sum, avg_time_count = state['avg_time_sum'], state['avg_time_count']
+
+        profile_columns = {row[1] for row in conn.execute("PRAGMA table_info(engineer_profiles)")}
+        score_columns = performance_score_columns(profile_columns)
+        conn.row_factory = sqlite3.Row
+        updated = []
+        for engineer_id, columns in deltas.groupby('Engineer_Id', sort=False)['Profile_Column']:
+            profile = conn.execute("SELECT * FROM engineer_profiles WHERE Engineer_ID = ?", (engineer_id,)).fetchone()
+            if profile is None:
+                continue # History for an engineer without a profile only feeds the totals
+            columns = [column for column in columns if column in profile_columns]
+            if not columns:
+                continue
+            placeholders = ", ".join("?" for _ in columns)
+            new_values = {
+                column: _profile_value(column, total / count)
+                for column, total, count in conn.execute(f"""
+                    SELECT Profile_Column, Total, Count FROM engineer_score_totals
+                    WHERE Engineer_Id = ? AND Profile_Column IN ({placeholders}) AND Count > 0
+                """, (engineer_id, *columns))
+            }
+            values = {column: profile[column] for column in profile_columns}
+            values.update(new_values)
+
+            old_avg_time, new_avg_time = profile['Avg_Job_Completion_Time'], values['Avg_Job_Completion_Time']
+            if new_avg_time is not None:
+                if old_avg_time is None:
+                    avg_time_sum, avg_time_count = avg_time_sum + new_avg_time, avg_time_count + 1
+                else:
+                    avg_time_sum += new_avg_time - old_avg_time
+            if new_avg_time and values['Customer_Rating'] is not None and avg_time_count:
+                quality = np.nanmean(np.array([values[column] for column in score_columns], dtype=float))
+                overall = weighted_performance(quality, values['Customer_Rating'], new_avg_time,
+                                               avg_time_sum / avg_time_count)
+                new_values['Overall_Performance_Score'] = int(np.clip(np.round(overall), 0, 100))
+
+            set_clause = ", ".join(f'"{column}" = ?' for column in new_values)
+            conn.execute(f"UPDATE engineer_profiles SET {set_clause} WHERE Engineer_ID = ?",
+                         (*new_values.values(), engineer_id))
+            updated.append(engineer_id)
+
+        _write_state(conn, {'last_history_rowid': newest_rowid, 'avg_time_sum': avg_time_sum,
+                            'avg_time_count': avg_time_count})
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return {
+        'rows': len(rows),
+        'engineers': len(updated),
+        'last_history_rowid': newest_rowid,
+        'milliseconds': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def rebuild():
+    """Clears the running totals and re-applies the whole history."""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM engineer_score_totals")
+        conn.execute("DELETE FROM engineer_scoring_state")
+        conn.commit()
+    finally:
+        conn.close()
+    return update_from_history()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Keep engineer performance scores current from job_history.")
+    parser.add_argument('--rebuild', action='store_true', help="Clear the running totals and re-apply the whole history.")
+    args = parser.parse_args()
+
+    print(rebuild() if args.rebuild else update_from_history())
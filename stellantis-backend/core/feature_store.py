@@ -0,0 +1,423 @@
+# In core/feature_store.py
+"""
+Persistent engineer/task feature store, maintained incrementally from job_history.
+
+Per (engineer, task type) it keeps running outcome and time-taken totals in two tables:
+engineer_task_stats holds the current totals, and engineer_task_stats_log holds the
+totals after every completed task, so values can be read as of any point in time.
+Features are defined once, as SQL expressions over those totals (FEATURE_DEFINITIONS,
+mirrored into the feature_definitions table), and read for many (engineer, task)
+pairs or engineers in one query.
+
+update_from_history() folds in job_history rows added since the last update, in
+completion order, and runs in the background after each task completion (core/history_sync.py).
+A row written after rows of its engineer and task type that completed later (a late
+completion) makes those rows' logged totals stale, so they are dropped and re-applied
+after it, keeping point-in-time reads in Completed_At order. Run
+`python -m core.feature_store` to backfill or rebuild, and `--check` to compare the
+stored point-in-time values with core.model_features.
+"""
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
+UPDATE_CHUNK_ROWS = 50000
+
+STATS_COLUMNS = ['Outcome_Sum', 'Outcome_Count', 'Time_Taken_Sum', 'Time_Taken_Count']
+
+# (name, entity, SQL expression over the totals of alias s, description). Engineer features
+# aggregate over all of an engineer's task types.
+FEATURE_DEFINITIONS = [
+    ('eng_job_specific_avg_score', 'engineer_task', 's.Outcome_Sum * 1.0 / NULLIF(s.Outcome_Count, 0)',
+     "Mean Outcome_Score of the engineer's completed tasks of this type."),
+    ('eng_job_specific_exp_count', 'engineer_task', 'COALESCE(s.Outcome_Count, 0)',
+     "Number of the engineer's scored tasks of this type."),
+    ('eng_task_avg_time_taken', 'engineer_task', 's.Time_Taken_Sum * 1.0 / NULLIF(s.Time_Taken_Count, 0)',
+     "Mean Time_Taken_minutes of the engineer's tasks of this type."),
+    ('engineer_avg_outcome_score', 'engineer', 'SUM(s.Outcome_Sum) * 1.0 / NULLIF(SUM(s.Outcome_Count), 0)',
+     "Mean Outcome_Score over all of the engineer's scored tasks."),
+    ('engineer_avg_time_taken', 'engineer', 'SUM(s.Time_Taken_Sum) * 1.0 / NULLIF(SUM(s.Time_Taken_Count), 0)',
+     "Mean Time_Taken_minutes over all of the engineer's tasks."),
+    ('engineer_scored_tasks', 'engineer', 'COALESCE(SUM(s.Outcome_Count), 0)',
+     "Number of the engineer's scored tasks."),
+]
+ENGINEER_TASK_FEATURES = [name for name, entity, _, _ in FEATURE_DEFINITIONS if entity == 'engineer_task']
+ENGINEER_FEATURES = [name for name, entity, _, _ in FEATURE_DEFINITIONS if entity == 'engineer']
+
+TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS feature_definitions (
+        Feature_Name TEXT PRIMARY KEY,
+        Entity TEXT NOT NULL,
+        Expression TEXT NOT NULL,
+        Description TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS engineer_task_stats (
+        Engineer_Id TEXT NOT NULL,
+        Task_Description TEXT NOT NULL,
+        Outcome_Sum REAL NOT NULL,
+        Outcome_Count INTEGER NOT NULL,
+        Time_Taken_Sum REAL NOT NULL,
+        Time_Taken_Count INTEGER NOT NULL,
+        Last_Completed_At TEXT,
+        PRIMARY KEY (Engineer_Id, Task_Description)
+    )
+    """,
+    # Totals after each job_history row, in the order rows were applied (Seq).
+    """
+    CREATE TABLE IF NOT EXISTS engineer_task_stats_log (
+        Seq INTEGER PRIMARY KEY,
+        History_Rowid INTEGER NOT NULL UNIQUE,
+        Engineer_Id TEXT NOT NULL,
+        Task_Description TEXT NOT NULL,
+        Completed_At TEXT,
+        Outcome_Sum REAL NOT NULL,
+        Outcome_Count INTEGER NOT NULL,
+        Time_Taken_Sum REAL NOT NULL,
+        Time_Taken_Count INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_engineer_task_stats_log_time ON engineer_task_stats_log (Completed_At)",
+    """
+    CREATE INDEX IF NOT EXISTS idx_engineer_task_stats_log_key
+    ON engineer_task_stats_log (Engineer_Id, Task_Description, Completed_At)
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS feature_store_state (
+        Name TEXT PRIMARY KEY,
+        Value INTEGER NOT NULL
+    )
+    """,
+]
+
+_tables_ready = set()
+
+
+def connect():
+    conn = instrumentation.connect(DB_PATH, timeout=10)
+    ensure_tables(conn)
+    return conn
+
+
+def ensure_tables(conn):
+    """Creates the feature store tables and syncs feature_definitions (once per database per process)."""
+    if DB_PATH in _tables_ready:
+        return
+    for statement in TABLES_SQL:
+        conn.execute(statement)
+    conn.execute("DELETE FROM feature_definitions")
+    conn.executemany(
+        "INSERT INTO feature_definitions (Feature_Name, Entity, Expression, Description) VALUES (?, ?, ?, ?)",
+        FEATURE_DEFINITIONS)
+    conn.commit()
+    _tables_ready.add(DB_PATH)
+
+
+def _load_current(conn):
+    return pd.read_sql_query(
+        f"SELECT Engineer_Id, Task_Description, {', '.join(STATS_COLUMNS)} FROM engineer_task_stats", conn
+    ).set_index(['Engineer_Id', 'Task_Description'])
+
+
+def _apply_chunk(chunk, current):
+    """
+    Running totals after each row of chunk, continuing from current (indexed by key).
+    Returns (log rows, current updated with the chunk's last totals per key, and the last
+    completion time per key in the chunk).
+    """
+    keys = [chunk['Engineer_Id'], chunk['Task_Description']]
+    outcome = pd.to_numeric(chunk['Outcome_Score'], errors='coerce')
+    time_taken = pd.to_numeric(chunk['Time_Taken_minutes'], errors='coerce')
+    steps = pd.DataFrame({
+        'Outcome_Sum': outcome.fillna(0.0), 'Outcome_Count': outcome.notna().astype('int64'),
+        'Time_Taken_Sum': time_taken.fillna(0.0), 'Time_Taken_Count': time_taken.notna().astype('int64'),
+    })
+    totals = steps.groupby(keys, sort=False).cumsum()
+    # astype(float): an empty store loads as object columns, and fillna() would downcast them
+    totals += current.reindex(pd.MultiIndex.from_arrays(keys)).astype(float).fillna(0).to_numpy()
+
+    log = pd.concat([chunk[['history_rowid', 'Engineer_Id', 'Task_Description', 'Time_Ended']], totals], axis=1)
+    latest = log.groupby(['Engineer_Id', 'Task_Description'], sort=False)[STATS_COLUMNS].last()
+    current = latest.combine_first(current)
+    return log, current, log.groupby(['Engineer_Id', 'Task_Description'], sort=False)['Time_Ended'].last()
+
+
+def _rewind_late_keys(conn, last_rowid, newest_rowid):
+    """
+    Finds the applied rows that completed after a new row of the same engineer and task
+    type, drops their logged totals and resets those keys' current totals to just before
+    them. Their rowids are left in the temp table replay_rowids. Returns their number.
+    """
+    conn.execute("DROP TABLE IF EXISTS temp.replay_rowids")
+    conn.execute("""
+        CREATE TEMP TABLE replay_rowids AS
+        SELECT l.History_Rowid, l.Engineer_Id, l.Task_Description FROM engineer_task_stats_log l
+        JOIN (
+            SELECT Engineer_Id, Task_Description, MIN(Time_Ended) AS Since FROM job_history
+            WHERE rowid > ? AND rowid <= ? AND Engineer_Id IS NOT NULL AND Task_Description IS NOT NULL
+            GROUP BY Engineer_Id, Task_Description
+        ) late ON late.Engineer_Id = l.Engineer_Id AND late.Task_Description = l.Task_Description
+        WHERE l.Completed_At > late.Since
+    """, (last_rowid, newest_rowid))
+    replayed = conn.execute("SELECT COUNT(*) FROM replay_rowids").fetchone()[0]
+    if not replayed:
+        return 0
+    conn.execute("DELETE FROM engineer_task_stats_log WHERE History_Rowid IN (SELECT History_Rowid FROM replay_rowids)")
+    keys = "SELECT DISTINCT Engineer_Id, Task_Description FROM replay_rowids"
+    conn.execute(f"DELETE FROM engineer_task_stats WHERE (Engineer_Id, Task_Description) IN ({keys})")
+    conn.execute(f"""
+        INSERT INTO engineer_task_stats (
+            Engineer_Id, Task_Description, {', '.join(STATS_COLUMNS)}, Last_Completed_At
+        )
+        SELECT l.Engineer_Id, l.Task_Description, {', '.join(f'l.{column}' for column in STATS_COLUMNS)}, l.Completed_At
+        FROM engineer_task_stats_log l
+        JOIN (
+            SELECT MAX(Seq) AS Seq FROM engineer_task_stats_log
+            WHERE (Engineer_Id, Task_Description) IN ({keys}) GROUP BY Engineer_Id, Task_Description
+        ) latest ON latest.Seq = l.Seq
+    """)
+    return replayed
+
+
+def update_from_history(chunksize=UPDATE_CHUNK_ROWS):
+    """
+    Applies job_history rows added since the last update, oldest completion first, and
+    advances the watermark. Applied rows that completed after a new row of their key are
+    re-applied with the new rows. Runs under a write lock, so concurrent callers never
+    apply a row twice. Returns a summary dict.
+    """
+    start = time.perf_counter()
+    conn = connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT Value FROM feature_store_state WHERE Name = 'last_history_rowid'").fetchone()
+        last_rowid = row[0] if row else 0
+        newest_rowid = conn.execute("SELECT MAX(rowid) FROM job_history").fetchone()[0] or 0
+        if newest_rowid <= last_rowid:
+            conn.rollback()
+            return {'rows': 0, 'replayed': 0, 'keys': 0, 'last_history_rowid': last_rowid,
+                    'milliseconds': round((time.perf_counter() - start) * 1000, 2)}
+
+        replayed = _rewind_late_keys(conn, last_rowid, newest_rowid)
+        current = _load_current(conn)
+        touched = {}
+        rows = 0
+        query = """
+            SELECT rowid AS history_rowid, Engineer_Id, Task_Description, Outcome_Score, Time_Taken_minutes, Time_Ended
+            FROM job_history
+            WHERE ((rowid > ? AND rowid <= ?) OR rowid IN (SELECT History_Rowid FROM replay_rowids))
+              AND Engineer_Id IS NOT NULL AND Task_Description IS NOT NULL
+            ORDER BY Time_Ended, rowid
+        """
+        for chunk in pd.read_sql_query(query, conn, params=(last_rowid, newest_rowid), chunksize=chunksize):
+            log, current, last_completed = _apply_chunk(chunk, current)
+            conn.executemany(f"""
+                INSERT INTO engineer_task_stats_log (
+                    History_Rowid, Engineer_Id, Task_Description, Completed_At, {', '.join(STATS_COLUMNS)}
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, log.itertuples(index=False, name=None))
+            touched.update(last_completed.to_dict())
+            rows += len(chunk)
+
+        conn.executemany(f"""
+            INSERT INTO engineer_task_stats (
+                Engineer_Id, Task_Description, {', '.join(STATS_COLUMNS)}, Last_Completed_At
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (Engineer_Id, Task_Description) DO UPDATE SET
+                Outcome_Sum = excluded.Outcome_Sum, Outcome_Count = excluded.Outcome_Count,
+                Time_Taken_Sum = excluded.Time_Taken_Sum, Time_Taken_Count = excluded.Time_Taken_Count,
+                Last_Completed_At = excluded.Last_Completed_At
+        """, [(*key, *current.loc[key].tolist(), completed_at) for key, completed_at in touched.items()])
+        conn.execute("""
+            INSERT INTO feature_store_state (Name, Value) VALUES ('last_history_rowid', ?)
+            ON CONFLICT (Name) DO UPDATE SET Value = excluded.Value
+        """, (newest_rowid,))
+        conn.execute("DROP TABLE temp.replay_rowids")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return {
+        'rows': rows - replayed,
+        'replayed': replayed,
+        'keys': len(touched),
+        'last_history_rowid': newest_rowid,
+        'milliseconds': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def rebuild():
+    """Clears the stored totals and re-applies the whole history."""
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM engineer_task_stats")
+        conn.execute("DELETE FROM engineer_task_stats_log")
+        conn.execute("DELETE FROM feature_store_state")
+        conn.commit()
+    finally:
+        conn.close()
+    return update_from_history()
+
+
+def is_built(conn=None):
+    """True once update_from_history() has run on this database (it may still be behind)."""
+    own_connection = conn is None
+    conn = conn or connect()
+    try:
+        ensure_tables(conn)
+        return conn.execute(
+            "SELECT 1 FROM feature_store_state WHERE Name = 'last_history_rowid'").fetchone() is not None
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def _stats_source(as_of):
+    """The totals relation (alias s): current totals, or the latest logged totals before as_of."""
+    if as_of is None:
+        return "engineer_task_stats", ()
+    return """(
+        SELECT l.* FROM engineer_task_stats_log l
+        JOIN (
+            SELECT MAX(Seq) AS Seq FROM engineer_task_stats_log
+            WHERE Completed_At < ? GROUP BY Engineer_Id, Task_Description
+        ) latest ON latest.Seq = l.Seq
+    )""", (as_of,)
+
+
+def _expressions(entity, features):
+    definitions = {name: expression for name, kind, expression, _ in FEATURE_DEFINITIONS if kind == entity}
+    return ", ".join(f"{definitions[name]} AS {name}" for name in features)
+
+
+def read_features(pairs, as_of=None, features=None, conn=None):
+    """
+    Engineer/task features for many (engineer_id, task_description) pairs in one query,
+    from the current totals or as of a 'YYYY-MM-DD HH:MM:SS' timestamp (strictly before it).
+    Returns a DataFrame with engineer_id, job_description_text, the requested features
+    (default: all engineer/task features) and the raw outcome totals score_sum and count,
+    in the order of pairs. Unknown pairs get NaN averages and zero counts.
+    """
+    features = features or ENGINEER_TASK_FEATURES
+    own_connection = conn is None
+    conn = conn or connect()
+    try:
+        ensure_tables(conn)
+        # Writing the temp table opens a transaction; end it unless the caller already had one,
+        # or its read lock would keep this connection from writing later without waiting.
+        own_transaction = not conn.in_transaction
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS feature_store_pairs (Pos INTEGER PRIMARY KEY, Engineer_Id, Task_Description)")
+        conn.execute("DELETE FROM feature_store_pairs")
+        conn.executemany("INSERT INTO feature_store_pairs (Pos, Engineer_Id, Task_Description) VALUES (?, ?, ?)",
+                         [(i, engineer_id, task) for i, (engineer_id, task) in enumerate(pairs)])
+        source, params = _stats_source(as_of)
+        result = pd.read_sql_query(f"""
+            SELECT p.Engineer_Id AS engineer_id, p.Task_Description AS job_description_text,
+                   {_expressions('engineer_task', features)},
+                   COALESCE(s.Outcome_Sum, 0) AS score_sum, COALESCE(s.Outcome_Count, 0) AS count
+            FROM feature_store_pairs p
+            LEFT JOIN {source} s ON s.Engineer_Id = p.Engineer_Id AND s.Task_Description = p.Task_Description
+            ORDER BY p.Pos
+        """, conn, params=params)
+        conn.execute("DELETE FROM feature_store_pairs")
+        if own_transaction:
+            conn.commit()
+        return result
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def read_engineer_features(engineer_ids, as_of=None, features=None, conn=None):
+    """Engineer-level features (default: all), indexed by engineer_id; engineers without history are omitted."""
+    features = features or ENGINEER_FEATURES
+    engineer_ids = list(engineer_ids)
+    own_connection = conn is None
+    conn = conn or connect()
+    try:
+        ensure_tables(conn)
+        source, params = _stats_source(as_of)
+        placeholders = ",".join("?" for _ in engineer_ids)
+        return pd.read_sql_query(f"""
+            SELECT s.Engineer_Id AS engineer_id, {_expressions('engineer', features)}
+            FROM {source} s
+            WHERE s.Engineer_Id IN ({placeholders})
+            GROUP BY s.Engineer_Id
+        """, conn, params=(*params, *engineer_ids)).set_index('engineer_id')
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def overall_outcome_totals(as_of=None, conn=None):
+    """(score_sum, count) over all engineers and task types, current or as of a timestamp."""
+    own_connection = conn is None
+    conn = conn or connect()
+    try:
+        ensure_tables(conn)
+        source, params = _stats_source(as_of)
+        row = conn.execute(
+            f"SELECT COALESCE(SUM(s.Outcome_Sum), 0), COALESCE(SUM(s.Outcome_Count), 0) FROM {source} s", params
+        ).fetchone()
+        return tuple(row)
+    finally:
+        if own_connection:
+            conn.close()
+
+
+def check_against_model_features():
+    """
+    Compares the logged point-in-time totals with core.model_features on the same history:
+    each row's job-specific average and count from the store (its logged totals minus the
+    row itself) against engineer_job_specific_metrics(). Returns the largest differences.
+    """
+    from core.model_features import engineer_job_specific_metrics
+
+    conn = connect()
+    try:
+        df = pd.read_sql_query("""
+            SELECT jh.Engineer_Id AS engineer_id, jh.Task_Description AS job_description_text,
+                   jh.Outcome_Score AS outcome_score, jh.Time_Ended AS completed_at,
+                   l.Outcome_Sum, l.Outcome_Count
+            FROM job_history jh
+            JOIN engineer_task_stats_log l ON l.History_Rowid = jh.rowid
+            WHERE jh.Outcome_Score IS NOT NULL
+            ORDER BY l.Seq
+        """, conn)
+    finally:
+        conn.close()
+    counts = df['Outcome_Count'] - 1
+    store_avg = ((df['Outcome_Sum'] - df['outcome_score']) / counts.where(counts > 0)).to_numpy()
+    expected = engineer_job_specific_metrics(df.drop(columns=['completed_at']).copy())
+    known = counts.to_numpy() > 0 # Rows with no earlier job of their type are filled by the model, not the store
+    return {
+        'rows': len(df),
+        'max_count_diff': float(np.max(np.abs(counts.to_numpy() - expected['eng_job_specific_exp_count'].to_numpy()),
+                                       initial=0)),
+        'max_avg_diff': float(np.max(np.abs(store_avg[known] - expected['eng_job_specific_avg_score'].to_numpy()[known]),
+                                     initial=0)),
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Maintain the engineer/task feature store.")
+    parser.add_argument('--rebuild', action='store_true', help="Clear the store and re-apply the whole history.")
+    parser.add_argument('--check', action='store_true',
+                        help="Compare stored point-in-time values with core.model_features.")
+    args = parser.parse_args()
+
+    print(rebuild() if args.rebuild else update_from_history())
+    if args.check:
+        print(check_against_model_features())
@@ -1,8 +1,10 @@
 import os
+import json
 import google.generativeai as genai
 from dotenv import load_dotenv
-import re
-import ast
+
+from core import instrumentation, llm_client, mapping_cache, near_duplicate, service_classifier
+from core.job_card_creator import TASKS_DATA, BASIC_SERVICE_TASKS, INTERMEDIATE_SERVICE_TASKS
 
 load_dotenv()
 api_key = os.getenv("GEMINI_API_KEY")
@@ -11,92 +13,170 @@ api_key = os.getenv("GEMINI_API_KEY")
     #raise ValueError("API key not found.")
 
 
-genai.configure(api_key=api_key)
-
-
-SERVICES = [
-    "Air Filter Check",
-    "Battery Check",
-    "Brake Inspection",
-    "Cabin Filter Replacement",
-    "Comprehensive Diagnostic Check",
-    "Exhaust System Inspection",
-    "Fluid Levels Check",
-    "Fuel System Inspection",
-    "Lights and Wipers Check",
-    "Oil Change",
-    "Oil Filter Replacement",
-    "Spark Plugs Replacement",
-    "Steering and Suspension Check",
-    "Timing Belt Inspection",
-    "Transmission Check",
-    "Tyre Condition and Alignment Check",
-    "Tyre Pressure Check",
-    "Underbody Inspection",
-    "Visual Inspection",
-    "Wheel Alignment and Balancing"
-]
-
-
-def get_matching_services(user_input):
-    prompt = f"""
-You're a helpful assistant. A supervisor has written: "{user_input}".
-Which of these services are most relevant?
-Look out for keywords and phrases for these three categories:
-1. Basic Service
-2. Intermediate Service
-3. Full Service
-Look out for their synonyms and related terms.
-
-based on the keywords the following services must be added into the list:
-1. Basic Service:
-  "Oil Change"
-  "Oil Filter Replacement"
-  "Air Filter Check"
-  "Fluid Levels Check"
-  "Tyre Pressure Check"
-  "Visual Inspection"
-2. Intermediate Service:
-  "Oil Change"
-  "Oil Filter Replacement"
-  "Air Filter Check"
-  "Fluid Levels Check"
-  "Tyre Pressure Check"
-  "Visual Inspection"
-  "Brake Inspection"
-  "Tyre Condition and Alignment Check"
-  "Battery Check"
-  "Exhaust System Inspection"
-  "Steering and Suspension Check"
-  "Lights and Wipers Check"
-3. Full Service:
-{', '.join(SERVICES)}
-
-ALSO take into account of the mileage of the vehicle to choose the services.
-
-Available services:
-{', '.join(SERVICES)}
-
-Respond with a plain Python list of the most relevant service names.
-Only include services from the list. Do NOT use code blocks.
-"""
+# GEMINI_API_ENDPOINT points the client at another host (e.g. the fake server in benchmarks/llm_resilience.py)
+api_endpoint = os.getenv("GEMINI_API_ENDPOINT")
+if api_endpoint:
+    genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": api_endpoint})
+else:
+    genai.configure(api_key=api_key)
+
+# "gemini" (default) or "local" for the deterministic offline stand-in
+SERVICE_MAPPING_PROVIDER = os.getenv("SERVICE_MAPPING_PROVIDER", "gemini").lower()
+
+MAPPING_DECISIONS = instrumentation.REGISTRY.counter(
+    'service_mapping_decisions_total',
+    'How service mappings were answered: the mapping cache, local rules, local model, the upstream '
+    'provider, or the local fallback when the upstream was unavailable.', ('path',))
+
+
+# The reply is constrained to {"service_ids": [...]} with IDs from TASKS_DATA.
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "service_ids": {
+            "type": "array",
+            "items": {"type": "string", "format": "enum", "enum": list(TASKS_DATA)},
+        },
+    },
+    "required": ["service_ids"],
+}
+GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": RESPONSE_SCHEMA,
+    "temperature": 0,
+}
+
+
+def _generate_content(prompt, timeout):
+    model = genai.GenerativeModel('gemini-2.0-flash', generation_config=GENERATION_CONFIG)
+    # Retries are handled by the resilient client, not by the Google client library.
+    response = model.generate_content(prompt, request_options={"timeout": timeout, "retry": None})
+    return response.text
+
+
+GEMINI_CLIENT = llm_client.ResilientClient(
+    "gemini",
+    _generate_content,
+    deadline=float(os.getenv("GEMINI_DEADLINE_SECONDS", "8")),
+    attempt_timeout=float(os.getenv("GEMINI_ATTEMPT_TIMEOUT_SECONDS", "5")),
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+    max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "2")),
+    failure_threshold=int(os.getenv("GEMINI_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("GEMINI_BREAKER_RESET_SECONDS", "30")),
+)
+
+
+@instrumentation.timed("get_matching_services")
+def get_matching_services(user_input, mileage=None):
+    """
+    Maps a free-text description (and optional vehicle mileage) to service names. A cached
+    answer is returned first; on a miss the local classifier answers when it is confident,
+    otherwise the upstream provider is asked. Upstream answers are cached per normalized
+    description and mileage band (see core/mapping_cache.py) and concurrent identical
+    requests share one call.
+    """
+    cache_description = _cache_description(user_input, mileage)
+    # A hit costs microseconds from memory, so the classifier only runs on a miss.
+    cached = mapping_cache.lookup(cache_description)
+    if cached is not None:
+        MAPPING_DECISIONS.inc('cached')
+        return cached
+
+    local = service_classifier.classify(user_input, mileage)
+    if local.services and local.confidence >= service_classifier.MIN_CONFIDENCE:
+        MAPPING_DECISIONS.inc(f"local_{local.source}")
+        return local.services
+
+    provider = _upstream_provider()
+    partition = _mileage_band(mileage)
+
+    def compute(_):
+        # A previously answered, near-identical description is reused before asking upstream.
+        match = near_duplicate.lookup(user_input, partition)
+        if match is not None:
+            return match[0]
+        answer = provider(user_input, mileage)
+        near_duplicate.add(user_input, answer, partition)
+        return answer
 
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash') 
-        response = model.generate_content(prompt)
-        text_response = response.text.strip()
-
-    
-        cleaned_text = re.sub(r"```(?:python)?\n([\s\S]+?)```", r"\1", text_response)
+        services = mapping_cache.get_or_compute(cache_description, compute)
+    except llm_client.LLMUnavailable as e:
+        # Degraded upstream: answer locally (uncached) instead of blocking or returning nothing.
+        print(f"Service mapping upstream unavailable, using local fallback: {e}")
+        MAPPING_DECISIONS.inc('fallback')
+        return local.services or service_classifier.local_provider(user_input, mileage)
+    MAPPING_DECISIONS.inc('upstream')
+    return services
+
+
+def _mileage_band(mileage):
+    return None if mileage is None else int(mileage) // near_duplicate.MILEAGE_CACHE_BAND
+
+
+def _cache_description(user_input, mileage):
+    # near_duplicate.split_cache_description() parses this suffix back out.
+    if mileage is None:
+        return user_input
+    return f"{user_input} mileage band {_mileage_band(mileage)}"
+
+
+def _upstream_provider():
+    if SERVICE_MAPPING_PROVIDER == "local":
+        return service_classifier.local_provider
+    return _request_gemini_mapping
+
+
+def _id_range(task_ids):
+    """'T001-T006' for a contiguous run of IDs, otherwise a comma-separated list."""
+    numbers = [int(task_id[1:]) for task_id in task_ids]
+    if numbers == list(range(numbers[0], numbers[0] + len(numbers))):
+        return f"{task_ids[0]}-{task_ids[-1]}"
+    return ",".join(task_ids)
+
+
+def build_prompt(user_input, mileage=None):
+    """Compact prompt: services by ID, the bundle rules, and the request as a JSON object."""
+    catalogue = "; ".join(f"{task_id} {task['name']}" for task_id, task in TASKS_DATA.items())
+    request_fields = json.dumps({"description": user_input, "mileage": mileage})
+    return (
+        "Pick the workshop services needed for this vehicle job.\n"
+        f"Services: {catalogue}.\n"
+        f"Basic Service = {_id_range(BASIC_SERVICE_TASKS)}. "
+        f"Intermediate Service = {_id_range(INTERMEDIATE_SERVICE_TASKS)}. Full Service = all.\n"
+        "Expand service bundles (and their synonyms) to their IDs; use mileage, when given, "
+        "to add wear-related checks.\n"
+        f"Job: {request_fields}"
+    )
+
+
+def parse_service_ids(text):
+    """
+    Validates a {"service_ids": [...]} reply and maps the IDs to service names in TASKS_DATA order.
+    Raises ValueError if the reply is not valid JSON of that shape.
+    """
+    payload = json.loads(text)
+    if not isinstance(payload, dict) or not isinstance(payload.get("service_ids"), list):
+        raise ValueError("expected an object with a service_ids list")
+    requested = {str(task_id).strip().upper() for task_id in payload["service_ids"]}
+    unknown = requested - TASKS_DATA.keys()
+    if unknown:
+        print(f"Ignoring unknown service IDs from Gemini: {sorted(unknown)}")
+    return [task["name"] for task_id, task in TASKS_DATA.items() if task_id in requested]
+
+
+def _request_gemini_mapping(user_input, mileage=None):
+    # Raises llm_client.LLMUnavailable on timeouts, upstream errors or an open breaker.
+    with instrumentation.track_duration("gemini_generate_content"):
+        text_response = GEMINI_CLIENT.call(build_prompt(user_input, mileage))
 
-        
-        matches = ast.literal_eval(cleaned_text)
-        return matches
-
-    except Exception as e:
+    try:
+        return parse_service_ids(text_response)
+    except ValueError as e:
         print("Error parsing Gemini response:", e)
-        print("Raw response:", response.text if 'response' in locals() else "No response.")
-        return []
+        print("Raw response:", text_response)
+        # Treated like an upstream failure so the caller answers locally and nothing is cached.
+        raise llm_client.LLMUnavailable(f"malformed response: {e}") from e
 
 
 if __name__ == "__main__":
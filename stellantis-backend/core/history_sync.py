@@ -0,0 +1,52 @@
+# In core/history_sync.py
+"""
+Keeps the stores derived from job_history current: the feature store
+(core/feature_store.py) and the incremental engineer scores (core/engineer_scoring.py).
+
+Request handlers call request_update() after tasks complete. A background thread applies
+the new rows, and calls made while an update is running are coalesced into the next one,
+so a completion never waits on the stores. Nothing runs at import. At start-up the app
+calls catch_up_if_unbuilt(), which builds a never-built feature store in the background
+(until then core.dynamic_estimator reads job_history directly). Other history written
+while no app was running is applied by the next update, by the sync_history scheduler
+job, or by hand with `python -m core.history_sync`.
+"""
+from core import engineer_scoring, feature_store
+from core.background import coalescing_worker
+
+
+def catch_up():
+    """Applies every job_history row not yet in the stores. Returns the two update summaries."""
+    return {
+        'feature_store': feature_store.update_from_history(),
+        'engineer_scoring': engineer_scoring.update_from_history(),
+    }
+
+
+def _apply_new_history():
+    try:
+        feature_store.update_from_history()
+    except Exception as e:
+        print(f"Could not update the feature store: {e}")
+    try:
+        engineer_scoring.update_from_history()
+    except Exception as e:
+        print(f"Could not update engineer scores: {e}")
+
+
+# Asks the background thread to apply newly completed tasks; returns immediately.
+request_update = coalescing_worker('history-sync', _apply_new_history)
+
+
+def catch_up_if_unbuilt():
+    """At start-up: builds the feature store (and engineer score totals) in the background if it never was."""
+    try:
+        if not feature_store.is_built():
+            print("Feature store not built yet: catching up with the job history in the background.")
+            request_update()
+    except Exception as e:
+        print(f"Could not check the feature store: {e}")
+
+
+if __name__ == '__main__':
+    print(catch_up())
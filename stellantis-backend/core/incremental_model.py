@@ -0,0 +1,113 @@
+# In core/incremental_model.py
+"""
+The incremental (online) job success model, trained by core.predictive_model as tasks
+complete (update_incremental_model). It lives in its own module so the saved model always
+unpickles as core.incremental_model.IncrementalSuccessModel, however training was started.
+
+The model is training-only for now: assignments are scored by the registry's active
+model, and the incremental model is evaluated against a full refit by
+`python -m core.predictive_model --drift-check`.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+from core.model_features import (
+    CATEGORICAL_FEATURES, NUMERICAL_FEATURES, engineer_job_specific_metrics, summarize_job_history,
+)
+
+# One-hot slots reserved per categorical feature, so new categories do not change the
+# model's input width; values beyond the reserve share the last (unknown) slot.
+CATEGORY_SLOTS = 64
+
+
+class IncrementalSuccessModel:
+    """
+    Logistic regression trained with SGD partial_fit, together with everything needed to
+    encode new rows the same way: category vocabularies, running scaler statistics and
+    per (engineer, task) outcome history. Features are point-in-time: a row only sees the
+    history of rows processed before it.
+    """
+
+    def __init__(self):
+        self.vocabularies = {feature: {} for feature in CATEGORICAL_FEATURES}
+        self.scaler = StandardScaler()
+        # A small constant step keeps single-pass updates stable and probabilities calibrated.
+        self.classifier = SGDClassifier(loss='log_loss', alpha=1e-3, learning_rate='constant',
+                                        eta0=0.01, random_state=42)
+        self.specific_history = None  # summarize_job_history() of every row learned so far
+        self.class_counts = np.zeros(2)
+        self.last_rowid = 0
+        self.rows_seen = 0
+        self.updated_at = None
+
+    def _category_slots(self, feature, values, learn):
+        vocabulary = self.vocabularies[feature]
+        slots = {}
+        for value in pd.unique(values):
+            slot = vocabulary.get(value)
+            if slot is None:
+                if learn and len(vocabulary) < CATEGORY_SLOTS - 1:
+                    slot = vocabulary[value] = len(vocabulary)
+                else:
+                    slot = CATEGORY_SLOTS - 1
+            slots[value] = slot
+        return values.map(slots).to_numpy()
+
+    def build_features(self, df, learn):
+        """
+        Returns (one_hot, raw_numeric) arrays for df. With learn=True the vocabularies and outcome history also take in df's rows; with
+        learn=False the rows are treated as unscored candidates.
+        """
+        if not learn:
+            df = df.drop(columns=['outcome_score'], errors='ignore')
+        df = engineer_job_specific_metrics(df.copy(), self.specific_history)
+
+        one_hot = np.zeros((len(df), CATEGORY_SLOTS * len(CATEGORICAL_FEATURES)))
+        for j, feature in enumerate(CATEGORICAL_FEATURES):
+            one_hot[np.arange(len(df)), j * CATEGORY_SLOTS + self._category_slots(feature, df[feature], learn)] = 1.0
+        numeric = df[NUMERICAL_FEATURES].to_numpy(dtype=float)
+
+        if learn:
+            batch = summarize_job_history(df)
+            self.specific_history = batch if self.specific_history is None else \
+                self.specific_history.add(batch, fill_value=0)
+        return one_hot, numeric
+
+    def _fill_missing(self, numeric):
+        """Missing numeric values take the running mean (0 after scaling)."""
+        numeric = numeric.astype(float)
+        if hasattr(self.scaler, 'mean_'):
+            fill = self.scaler.mean_
+        else:
+            with np.errstate(all='ignore'):
+                fill = np.nan_to_num(np.nanmean(numeric, axis=0))
+        missing = np.isnan(numeric)
+        numeric[missing] = np.take(fill, np.nonzero(missing)[1])
+        return numeric
+
+    def _matrix(self, one_hot, numeric):
+        return np.hstack([one_hot, self.scaler.transform(numeric)])
+
+    def update(self, df):
+        """Trains on a batch of completed tasks (oldest first)."""
+        one_hot, numeric = self.build_features(df, learn=True)
+        numeric = self._fill_missing(numeric)
+        self.scaler.partial_fit(numeric)
+
+        y = (df['outcome_score'].to_numpy() >= 4).astype(int)
+        self.class_counts += np.bincount(y, minlength=2)
+        # Running equivalent of class_weight='balanced', which partial_fit does not support.
+        class_weights = self.class_counts.sum() / (2.0 * np.maximum(self.class_counts, 1))
+        self.classifier.partial_fit(self._matrix(one_hot, numeric), y, classes=[0, 1],
+                                    sample_weight=class_weights[y])
+        self.rows_seen += len(df)
+        self.updated_at = datetime.now().isoformat(timespec='seconds')
+
+    def predict_proba(self, df):
+        """Probability of high success (outcome >= 4) for candidate rows, without learning from them."""
+        one_hot, numeric = self.build_features(df, learn=False)
+        return self.classifier.predict_proba(self._matrix(one_hot, self._fill_missing(numeric)))[:, 1]
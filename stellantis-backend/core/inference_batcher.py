@@ -0,0 +1,136 @@
+# In core/inference_batcher.py
+"""
+Micro-batching for model scoring under concurrent requests.
+
+InferenceBatcher.score() queues a caller's feature rows and blocks until they are
+scored. Requests queued within `window_ms` of each other (up to `max_batch_rows`
+rows) are scored with one call of the score function, and each caller gets its
+slice of the result. The window is only waited out under concurrent traffic, and
+never for longer than the previous scoring call took, so a lone caller scores on
+its own thread without delay and a cheap scorer is not held back by a long window.
+With window_ms=0 batching is off and every request is scored directly.
+
+Requests per batch are exported on /metrics as inference_batch_requests.
+"""
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from core import instrumentation
+
+BATCH_WINDOW_MS = float(os.getenv('INFERENCE_BATCH_WINDOW_MS', '2'))
+BATCH_MAX_ROWS = int(os.getenv('INFERENCE_BATCH_MAX_ROWS', '2048'))
+
+BATCH_REQUESTS = instrumentation.REGISTRY.histogram(
+    'inference_batch_requests', 'Scoring requests combined into one model call, by batcher.', ('batcher',),
+    instrumentation.COUNT_BUCKETS)
+
+
+class _Request:
+    __slots__ = ('features', 'done', 'lead', 'result', 'error')
+
+    def __init__(self, features):
+        self.features = features
+        self.done = threading.Event()
+        self.lead = False
+        self.result = None
+        self.error = None
+
+
+def combine_frames(frames):
+    """Stacks same-column DataFrames; column-wise concatenation is cheaper than pd.concat for small frames."""
+    if len(frames) == 1:
+        return frames[0]
+    return pd.DataFrame({column: np.concatenate([frame[column].to_numpy() for frame in frames])
+                         for column in frames[0].columns})
+
+
+class InferenceBatcher:
+    """
+    Scores feature DataFrames in shared batches. `score` maps a DataFrame to one score
+    per row (e.g. lambda X: model.predict_proba(X)[:, 1]) and is called for one batch at a
+    time, so each batch is scored by a single model version.
+
+    There is no worker thread: the first caller to arrive leads the batch (collects it and
+    scores it on its own thread), later callers wait for their slice, and when a batch is
+    done the oldest waiting caller is promoted to lead the next one.
+    """
+
+    def __init__(self, name, score, window_ms=BATCH_WINDOW_MS, max_batch_rows=BATCH_MAX_ROWS):
+        self.name = name
+        self._score = score
+        self.window = window_ms / 1000.0
+        self.max_batch_rows = max_batch_rows
+        self._lock = threading.Lock()
+        self._pending = []
+        self._leading = False
+        self._last_batch_size = 1
+        self._last_score_seconds = 0.0
+
+    def score(self, features):
+        """Scores for each row of features, in order. Raises whatever the score function raised."""
+        if self.window <= 0:
+            BATCH_REQUESTS.observe(1, self.name)
+            return np.asarray(self._score(features))
+        request = _Request(features)
+        with self._lock:
+            self._pending.append(request)
+            if not self._leading:
+                self._leading = request.lead = True
+        if not request.lead:
+            request.done.wait()
+        if request.lead:
+            self._lead()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _take_batch(self):
+        """The oldest pending requests, up to max_batch_rows rows (always at least one request)."""
+        with self._lock:
+            size, rows = 0, 0
+            for request in self._pending:
+                if size and rows + len(request.features) > self.max_batch_rows:
+                    break
+                rows += len(request.features)
+                size += 1
+            batch, self._pending = self._pending[:size], self._pending[size:]
+        return batch
+
+    def _lead(self):
+        """
+        Collects and scores one batch, then hands the lead to the oldest caller still waiting.
+        Under concurrent traffic (the previous batch held more than one request) the leader
+        first waits for the window, capped at the duration of the previous scoring call;
+        otherwise it scores at once, so a lone caller is not delayed.
+        """
+        if self._last_batch_size > 1:
+            # Waiting longer than one scoring call costs more than the call it would save.
+            time.sleep(min(self.window, self._last_score_seconds))
+        batch = self._take_batch()
+        try:
+            start = time.perf_counter()
+            scores = np.asarray(self._score(combine_frames([request.features for request in batch])))
+            self._last_score_seconds = time.perf_counter() - start
+            offset = 0
+            for request in batch:
+                request.result = scores[offset:offset + len(request.features)]
+                offset += len(request.features)
+        except Exception as e:
+            for request in batch:
+                request.error = e
+        finally:
+            self._last_batch_size = len(batch)
+            BATCH_REQUESTS.observe(len(batch), self.name)
+            for request in batch:
+                request.lead = False
+                request.done.set()
+            with self._lock:
+                if self._pending:
+                    self._pending[0].lead = True
+                    self._pending[0].done.set()
+                else:
+                    self._leading = False
@@ -2,11 +2,13 @@ import sqlite3
 import os
 from datetime import datetime
 
+from core import instrumentation
+
 # --- Configuration & Data Dictionaries ---
 # In a real application, this data might be loaded from a central config file or database
 # For the POC, we define it here so this script can run independently for testing.
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
 
 TASKS_DATA = {
     'T001': {'name': 'Oil Change', 'time': 35},
@@ -47,7 +49,7 @@ def get_next_job_id_from_db():
     """
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = instrumentation.connect(DB_PATH)
         cursor = conn.cursor()
         
         # Combine Job_Ids from both tables, extract numeric part, and find the max
@@ -72,6 +74,7 @@ def get_next_job_id_from_db():
         if conn:
             conn.close()
 
+@instrumentation.timed("create_job_from_ui_input")
 def create_job_from_ui_input(job_name, vin, make, model, mileage, urgency, selected_tasks=None):
     """
     Accepts data from a UI/frontend and creates job card records in the database.
@@ -102,7 +105,7 @@ def create_job_from_ui_input(job_name, vin, make, model, mileage, urgency, selec
         
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = instrumentation.connect(DB_PATH)
         cursor = conn.cursor()
         # --- Your SQL remains the same, assuming Job_Id is TEXT ---
         sql = """
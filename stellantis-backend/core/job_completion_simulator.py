@@ -4,7 +4,7 @@ from datetime import datetime
 import pandas as pd
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
 
 def complete_and_archive_task(job_card_id, outcome_score):
     print(f"\n--- Completing and Archiving Task for Job Card ID: {job_card_id} ---")
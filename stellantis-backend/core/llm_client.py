@@ -0,0 +1,194 @@
+# In core/llm_client.py
+"""
+Resilience wrapper for blocking LLM calls.
+
+ResilientClient.call() enforces an overall deadline, bounds the number of upstream
+calls in flight, retries transient failures (timeouts, connection errors, HTTP 408,
+429 and 5xx; see is_transient_error) with exponential backoff and jitter, and trips a
+circuit breaker after repeated transient failures so callers fail fast (and can use
+their local/cached path) while the upstream is degraded. Other errors (a bad request,
+key or permission) fail the same way every time, so they are raised at once and do
+not count against the breaker.
+
+Breaker state and call outcomes are exported on /metrics as llm_circuit_state and
+llm_calls_total.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from core import instrumentation
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = instrumentation.REGISTRY.gauge(
+    'llm_circuit_state', 'Circuit breaker state per LLM client (0=closed, 1=half-open, 2=open).', ('client',))
+LLM_CALLS = instrumentation.REGISTRY.counter(
+    'llm_calls_total',
+    'LLM call attempts by outcome (ok, error, timeout, failed_request, rejected_open, rejected_busy).',
+    ('client', 'outcome'))
+
+
+class LLMUnavailable(Exception):
+    """Raised when the upstream could not produce an answer in time (or the breaker is open)."""
+
+
+def is_transient_error(error):
+    """True for errors a retry may cure: timeouts, connection errors and HTTP 408, 429 or 5xx."""
+    if isinstance(error, (TimeoutError, FutureTimeoutError, ConnectionError)):
+        return True
+    # HTTP status: `code` on google.api_core exceptions, `status_code` on most HTTP clients.
+    status = getattr(error, 'code', None)
+    if not isinstance(status, int):
+        status = getattr(error, 'status_code', None)
+    return isinstance(status, int) and (status in (408, 429) or 500 <= status < 600)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.reset()
+
+    def _set_state(self, state):
+        self.state = state
+        CIRCUIT_STATE.set(self.name, value=_STATE_VALUES[state])
+
+    def reset(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+            self._set_state(CLOSED)
+
+    def allow(self):
+        """Returns True if a call may proceed now."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self):
+        """Gives back a half-open trial that ended without a verdict on the upstream."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def snapshot(self):
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self._failures}
+
+
+class ResilientClient:
+    """Runs `func(*args, timeout=seconds)` under a deadline, concurrency limit, retries and a breaker."""
+
+    def __init__(self, name, func, deadline=10.0, attempt_timeout=None, max_concurrency=4, max_retries=2,
+                 backoff_base=0.25, backoff_max=2.0, failure_threshold=5, reset_timeout=30.0,
+                 is_transient=is_transient_error):
+        self.name = name
+        self.func = func
+        self.is_transient = is_transient
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout or deadline
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        # One slot per upstream call in flight; a slot is freed only when the call really ends,
+        # so calls abandoned at the deadline still count against the limit.
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"{name}-llm")
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _attempt(self, args, give_up_at):
+        if not self._slots.acquire(timeout=max(0.0, give_up_at - time.monotonic())):
+            LLM_CALLS.inc(self.name, 'rejected_busy')
+            raise LLMUnavailable(f"{self.name}: concurrency limit reached")
+        timeout = max(0.0, min(self.attempt_timeout, give_up_at - time.monotonic()))
+        try:
+            future = self._executor.submit(self.func, *args, timeout=timeout)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=timeout)
+
+    def call(self, *args):
+        """Returns func's result, or raises LLMUnavailable once the deadline or retries are exhausted."""
+        give_up_at = time.monotonic() + self.deadline
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            # The deadline is checked first: once allow() hands out the half-open trial, it must be settled.
+            if give_up_at - time.monotonic() <= 0:
+                break
+            if not self.breaker.allow():
+                LLM_CALLS.inc(self.name, 'rejected_open')
+                raise LLMUnavailable(f"{self.name}: circuit open") from last_error
+
+            settled = False
+            try:
+                result = self._attempt(args, give_up_at)
+                LLM_CALLS.inc(self.name, 'ok')
+                self.breaker.record_success()
+                settled = True
+                return result
+            except LLMUnavailable:
+                raise
+            except FutureTimeoutError as e:
+                LLM_CALLS.inc(self.name, 'timeout')
+                self.breaker.record_failure()
+                settled = True
+                last_error = e
+            except Exception as e:
+                if not self.is_transient(e):
+                    # The upstream answered with an error that a retry would repeat. It is not
+                    # counted as a failure, and a half-open trial is given back below.
+                    LLM_CALLS.inc(self.name, 'failed_request')
+                    raise LLMUnavailable(f"{self.name}: request failed ({e!r})") from e
+                LLM_CALLS.inc(self.name, 'error')
+                self.breaker.record_failure()
+                settled = True
+                last_error = e
+            finally:
+                if not settled:
+                    # Rejected locally (no free slot), a failed request or interrupted: no verdict on the
+                    # upstream's health, so the trial is given back
+                    self.breaker.release()
+
+            if attempt < self.max_retries:
+                pause = min(self._backoff(attempt), give_up_at - time.monotonic())
+                if pause <= 0:
+                    break
+                time.sleep(pause)
+
+        raise LLMUnavailable(f"{self.name}: no answer within {self.deadline}s ({last_error!r})") from last_error
@@ -0,0 +1,204 @@
+# In core/mapping_cache.py
+"""
+Two-tier cache for service-mapping results, keyed on the normalized description.
+
+Tier 1 is an in-process LRU (microsecond hits); tier 2 is the service_mapping_cache
+table in the workshop database, so answers survive restarts and are shared between
+worker processes. Entries expire after SERVICE_MAPPING_CACHE_TTL seconds.
+Concurrent misses for the same key are coalesced: one caller computes, the rest wait
+for its result (single-flight).
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from core import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv("WORKSHOP_DB_PATH", os.path.join(BASE_DIR, "database/workshop.db"))
+TTL_SECONDS = float(os.getenv("SERVICE_MAPPING_CACHE_TTL", str(7 * 24 * 3600)))
+MEMORY_CACHE_SIZE = 512
+# How long a coalesced caller waits for the in-flight computation before computing itself.
+SINGLE_FLIGHT_WAIT_SECONDS = 60
+
+CACHE_LOOKUPS = instrumentation.REGISTRY.counter(
+    'service_mapping_cache_lookups_total',
+    'Service-mapping cache lookups, by result (memory, sqlite, coalesced, miss).', ('result',))
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_inflight = {}
+_inflight_lock = threading.Lock()
+_table_ready = set()
+
+
+def normalize_description(description):
+    """Lower-cases, drops punctuation and collapses whitespace: 'Full  Service!' -> 'full service'."""
+    text = re.sub(r"[^a-z0-9]+", " ", str(description).lower())
+    return " ".join(text.split())
+
+
+@contextmanager
+def _connect():
+    """Yields a connection with the cache table in place; commits and closes on exit."""
+    conn = instrumentation.connect(DB_PATH, timeout=10)
+    try:
+        if DB_PATH not in _table_ready:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS service_mapping_cache (
+                    Description_Key TEXT PRIMARY KEY,
+                    Services TEXT NOT NULL,
+                    Created_At REAL NOT NULL,
+                    Expires_At REAL NOT NULL
+                )
+            """)
+            _table_ready.add(DB_PATH)
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _memory_get(key, now):
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        services, expires_at = entry
+        if expires_at <= now:
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return list(services)
+
+
+def _memory_put(key, services, expires_at):
+    with _memory_lock:
+        _memory[key] = (tuple(services), expires_at)
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _sqlite_get(key, now):
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT Services, Expires_At FROM service_mapping_cache WHERE Description_Key = ?", (key,)
+            ).fetchone()
+    except sqlite3.Error as e:
+        print(f"Service-mapping cache read failed: {e}")
+        return None
+    if row is None or row[1] <= now:
+        return None
+    return json.loads(row[0]), row[1]
+
+
+def _sqlite_put(key, services, now, expires_at):
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO service_mapping_cache (Description_Key, Services, Created_At, Expires_At) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(services), now, expires_at)
+            )
+    except sqlite3.Error as e:
+        print(f"Service-mapping cache write failed: {e}")
+
+
+def lookup(description):
+    """Returns the cached services for a description, or None. Checks memory, then SQLite."""
+    key = normalize_description(description)
+    now = time.time()
+    services = _memory_get(key, now)
+    if services is not None:
+        CACHE_LOOKUPS.inc('memory')
+        return services
+    stored = _sqlite_get(key, now)
+    if stored is not None:
+        services, expires_at = stored
+        _memory_put(key, services, expires_at)
+        CACHE_LOOKUPS.inc('sqlite')
+        return list(services)
+    return None
+
+
+def store(description, services):
+    """Caches a non-empty result in both tiers."""
+    if not services:
+        return
+    key = normalize_description(description)
+    now = time.time()
+    expires_at = now + TTL_SECONDS
+    _memory_put(key, services, expires_at)
+    _sqlite_put(key, list(services), now, expires_at)
+
+
+def get_or_compute(description, compute):
+    """
+    Returns cached services for `description`, or calls compute(description) once for all
+    concurrent callers with the same normalized key. Empty results (errors) are not cached.
+    """
+    cached = lookup(description)
+    if cached is not None:
+        return cached
+
+    key = normalize_description(description)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = {'event': threading.Event(), 'result': None}
+
+    if not leader:
+        if flight['event'].wait(SINGLE_FLIGHT_WAIT_SECONDS) and flight['result'] is not None:
+            CACHE_LOOKUPS.inc('coalesced')
+            return list(flight['result'])
+        # The leader failed or timed out; fall through and try ourselves.
+        return compute(description)
+
+    CACHE_LOOKUPS.inc('miss')
+    try:
+        services = compute(description)
+        flight['result'] = services
+        store(description, services)
+        return services
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight['event'].set()
+
+
+def clear():
+    """Empties both tiers. Returns the number of persistent rows removed."""
+    with _memory_lock:
+        _memory.clear()
+    try:
+        with _connect() as conn:
+            return conn.execute("DELETE FROM service_mapping_cache").rowcount
+    except sqlite3.Error as e:
+        print(f"Service-mapping cache clear failed: {e}")
+        return 0
+
+
+def stats():
+    with _memory_lock:
+        memory_entries = len(_memory)
+    try:
+        with _connect() as conn:
+            persistent_entries = conn.execute(
+                "SELECT COUNT(*) FROM service_mapping_cache WHERE Expires_At > ?", (time.time(),)
+            ).fetchone()[0]
+    except sqlite3.Error:
+        persistent_entries = None
+    return {
+        'memory_entries': memory_entries,
+        'memory_capacity': MEMORY_CACHE_SIZE,
+        'persistent_entries': persistent_entries,
+        'ttl_seconds': TTL_SECONDS,
+    }
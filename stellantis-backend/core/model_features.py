@@ -0,0 +1,93 @@
+# In core/model_features.py
+"""
+Model input features for the job success model, shared by training (core/predictive_model.py)
+and serving (core/job_assigner.py). Depends only on pandas and NumPy, so serving code can
+build features without importing scikit-learn.
+"""
+import numpy as np
+import pandas as pd
+
+from core.model_registry import feature_schema_hash
+
+MODEL_NAME = 'job_success' # Name of the model in the model registry (core/model_registry.py)
+CATEGORICAL_FEATURES = ['job_description_text', 'vehicle_make']
+NUMERICAL_FEATURES = ['engineer_general_score', 'job_estimated_time',
+                      'eng_job_specific_avg_score', 'eng_job_specific_exp_count']
+FEATURE_SCHEMA_HASH = feature_schema_hash(CATEGORICAL_FEATURES, NUMERICAL_FEATURES)
+
+SPECIFIC_KEYS = ['engineer_id', 'job_description_text']
+# Average used before any outcome has been recorded (midpoint of the 1-5 scale).
+NEUTRAL_OUTCOME_SCORE = 3.0
+
+
+def summarize_job_history(df):
+    """
+    Outcome totals per (engineer, job type) over the scored rows of df: a frame indexed by
+    SPECIFIC_KEYS with score_sum and count columns. This is the state
+    engineer_job_specific_metrics() continues from when rows are processed in pieces.
+    """
+    scores = pd.to_numeric(df['outcome_score'], errors='coerce')
+    summary = (pd.DataFrame({'score_sum': scores, 'count': scores.notna().astype('int64')})
+               .groupby([df[key] for key in SPECIFIC_KEYS], sort=False, dropna=False, observed=True).sum())
+    return summary[summary['count'] > 0]
+
+
+def engineer_job_specific_metrics(df, prior=None, prior_overall=None):
+    """
+    Adds each row's eng_job_specific_avg_score and eng_job_specific_exp_count: the engineer's
+    mean outcome and number of scored jobs of that type strictly before the row. Rows are taken
+    in completion order (sorted by completed_at if present). prior is a summary of the history
+    preceding df (see summarize_job_history); for inference candidates without an outcome_score,
+    the features come from prior alone. Rows with no earlier job of their type get the mean of
+    all earlier outcomes (NEUTRAL_OUTCOME_SCORE if there are none); pass prior_overall as
+    (score_sum, count) when prior only covers part of the history.
+
+    One grouped cumulative sum over two compact columns, so time and memory grow linearly with
+    the rows. Returns df with the columns added, in its original row order.
+    """
+    ordered = df
+    if 'completed_at' in df.columns and not df['completed_at'].is_monotonic_increasing:
+        ordered = df.sort_values('completed_at', kind='stable')
+
+    if 'outcome_score' in ordered.columns:
+        scores = pd.to_numeric(ordered['outcome_score'], errors='coerce')
+    else:
+        scores = pd.Series(np.nan, index=ordered.index)
+    steps = pd.DataFrame({'score_sum': scores.fillna(0.0), 'count': scores.notna().astype('int64')})
+    # Inclusive running totals per (engineer, job type), minus the row itself.
+    before = (steps.groupby([ordered[key] for key in SPECIFIC_KEYS], sort=False, dropna=False, observed=True)
+              .cumsum() - steps)
+    overall = steps.cumsum() - steps
+
+    if prior is not None and not prior.empty:
+        offsets = prior.reindex(pd.MultiIndex.from_arrays([ordered[key] for key in SPECIFIC_KEYS]))
+        before += offsets.fillna(0).to_numpy()
+        if prior_overall is None:
+            prior_overall = prior[['score_sum', 'count']].sum().to_numpy()
+    if prior_overall is not None:
+        overall += np.asarray(prior_overall, dtype=float)
+
+    counts = before['count']
+    overall_mean = (overall['score_sum'] / overall['count'].where(overall['count'] > 0)).fillna(NEUTRAL_OUTCOME_SCORE)
+    # Assignment aligns on the index, restoring df's row order.
+    df['eng_job_specific_avg_score'] = (before['score_sum'] / counts.where(counts > 0)).fillna(overall_mean)
+    df['eng_job_specific_exp_count'] = counts
+    return df
+
+
+def build_model_features(df, prior=None, prior_overall=None, fill_values=None):
+    """
+    The model's input columns for df, with point-in-time job-specific metrics. Used for both
+    training rows and inference candidates. Missing scores and estimates are filled from df
+    itself unless fill_values ({column: value}) gives them, e.g. when df is one chunk of a
+    larger history.
+    """
+    fill_values = fill_values or {}
+    df = engineer_job_specific_metrics(df, prior, prior_overall)
+    # engineer_general_score should ideally not be NaN if engineer_analyzer.py ran.
+    df['engineer_general_score'] = df['engineer_general_score'].fillna(
+        fill_values.get('engineer_general_score', df['engineer_general_score'].mean()))
+    # job_estimated_time might be NaN if the task has no estimate.
+    df['job_estimated_time'] = df['job_estimated_time'].fillna(
+        fill_values.get('job_estimated_time', df['job_estimated_time'].median())) # Use median for time
+    return df[CATEGORICAL_FEATURES + NUMERICAL_FEATURES]
@@ -0,0 +1,219 @@
+# In core/model_registry.py
+"""
+Versioned registry for trained models.
+
+Every published model gets its own directory, models/registry/<name>/v0001, v0002, ...,
+holding the artifact and a metadata.json (training rows, metrics, feature schema hash).
+A version is written under a temporary name and renamed into place, and the ACTIVE file
+naming the served version is replaced atomically, so a retrain never exposes a
+half-written model. Rolling back is pointing ACTIVE at an older version.
+
+Serving code reads models through ActiveModel: a background thread polls ACTIVE and
+swaps in a newly activated version only once it is fully loaded, so get() never waits
+on deserialization. The served version is exported on /metrics as model_active_version.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+
+import joblib
+
+from core import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(BASE_DIR, "models", "registry"))
+POLL_SECONDS = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "5"))
+
+ARTIFACT_FILE = "model.joblib"
+METADATA_FILE = "metadata.json"
+ACTIVE_FILE = "ACTIVE"
+_VERSION_DIR = re.compile(r"^v(\d+)$")
+
+ACTIVE_VERSION = instrumentation.REGISTRY.gauge(
+    'model_active_version', 'Model version loaded for serving in this process, per model.', ('model',))
+
+
+def feature_schema_hash(categorical_features, numerical_features):
+    """Short hash of a model's input columns, to catch artifacts trained on a different feature set."""
+    schema = json.dumps({'categorical': list(categorical_features), 'numerical': list(numerical_features)})
+    return hashlib.sha256(schema.encode()).hexdigest()[:16]
+
+
+def _model_dir(name):
+    return os.path.join(REGISTRY_DIR, name)
+
+
+def _version_dir(name, version):
+    return os.path.join(_model_dir(name), f"v{version:04d}")
+
+
+def _versions(name):
+    try:
+        entries = os.listdir(_model_dir(name))
+    except FileNotFoundError:
+        return []
+    return sorted(int(m.group(1)) for m in map(_VERSION_DIR.match, entries) if m)
+
+
+def _write_atomic(path, text):
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(text)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_metadata(name, version):
+    with open(os.path.join(_version_dir(name, version), METADATA_FILE), encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def list_versions(name):
+    """Metadata of every published version, oldest first."""
+    return [read_metadata(name, version) for version in _versions(name)]
+
+
+def active_version(name):
+    """The version ACTIVE points at, or None if nothing has been activated."""
+    try:
+        with open(os.path.join(_model_dir(name), ACTIVE_FILE), encoding="utf-8") as fh:
+            return int(fh.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def publish(name, artifact, metadata=None, activate=True, attachments=None):
+    """
+    Stores artifact as the next version of `name` (activating it unless activate=False).
+    attachments maps extra file names to text stored alongside it (e.g. an export of the
+    model in another format). Returns the new version number.
+    """
+    os.makedirs(_model_dir(name), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".tmp-", dir=_model_dir(name))
+    try:
+        joblib.dump(artifact, os.path.join(staging, ARTIFACT_FILE))
+        for filename, text in (attachments or {}).items():
+            with open(os.path.join(staging, filename), "w", encoding="utf-8") as fh:
+                fh.write(text)
+        while True:
+            version = max(_versions(name), default=0) + 1
+            record = {**(metadata or {}), 'name': name, 'version': version,
+                      'created_at': datetime.now().isoformat(timespec='seconds')}
+            with open(os.path.join(staging, METADATA_FILE), "w", encoding="utf-8") as fh:
+                json.dump(record, fh, indent=2, default=str)
+            try:
+                # rename() fails if another publisher claimed this version first; take the next one.
+                os.rename(staging, _version_dir(name, version))
+                break
+            except OSError:
+                if not os.path.isdir(_version_dir(name, version)):
+                    raise
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    print(f"Published {name} model version {version}.")
+    if activate:
+        set_active(name, version)
+    return version
+
+
+def set_active(name, version):
+    """Points ACTIVE at an existing version (also used to roll back). Returns (success, message)."""
+    if not os.path.exists(os.path.join(_version_dir(name, version), ARTIFACT_FILE)):
+        return False, f"{name} model version {version} does not exist."
+    _write_atomic(os.path.join(_model_dir(name), ACTIVE_FILE), f"{version}\n")
+    return True, f"{name} model version {version} is now active."
+
+
+def load_artifact(version_dir):
+    return joblib.load(os.path.join(version_dir, ARTIFACT_FILE))
+
+
+def load(name, version=None, loader=load_artifact):
+    """
+    Returns (artifact, metadata) for a version (default: the active one), or (None, None).
+    loader(version_dir) reads the artifact; the default unpickles model.joblib.
+    """
+    version = active_version(name) if version is None else version
+    if version is None:
+        return None, None
+    return loader(_version_dir(name, version)), read_metadata(name, version)
+
+
+class ActiveModel:
+    """
+    The active version of a registered model, kept loaded in this process. start() loads
+    it once and then a daemon thread polls ACTIVE every poll_seconds; a changed pointer is
+    loaded in the background and swapped in. Versions whose feature_schema_hash differs
+    from expected_schema_hash are refused and the current model stays in service. loader
+    is passed to load() to serve an alternative form of the artifact.
+    """
+
+    def __init__(self, name, expected_schema_hash=None, poll_seconds=POLL_SECONDS, loader=load_artifact):
+        self.name = name
+        self.expected_schema_hash = expected_schema_hash
+        self.loader = loader
+        self.poll_seconds = poll_seconds
+        self._current = (None, None)  # (artifact, metadata), swapped as one reference
+        self._refused_version = None
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            # The watcher runs whatever the first load does, so a bad ACTIVE is retried until it loads.
+            threading.Thread(target=self._watch, daemon=True, name=f"{self.name}-model-watcher").start()
+            self._started = True
+        self.refresh()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error reloading {self.name} model: {e}")
+
+    def refresh(self):
+        """Loads and swaps in the active version if it changed. Returns the served version."""
+        with self._refresh_lock:
+            version = active_version(self.name)
+            if version is None or version in (self.version, self._refused_version):
+                return self.version
+            artifact, metadata = load(self.name, version, self.loader)
+            if self.expected_schema_hash and metadata.get('feature_schema_hash') != self.expected_schema_hash:
+                print(f"Not serving {self.name} model version {version}: its feature schema does not match.")
+                self._refused_version = version
+                return self.version
+            self._current = (artifact, metadata)
+            ACTIVE_VERSION.set(self.name, value=version)
+            print(f"Serving {self.name} model version {version}.")
+            return version
+
+    @property
+    def version(self):
+        metadata = self._current[1]
+        return metadata['version'] if metadata else None
+
+    @property
+    def metadata(self):
+        return self._current[1]
+
+    def get(self):
+        """The loaded artifact (None if no version is active). Starts the watcher on first use."""
+        if not self._started:
+            self.start()
+        return self._current[0]
@@ -0,0 +1,35 @@
+# In core/model_serving.py
+"""
+Serving-side handles on the job success model, importable without scikit-learn:
+ACTIVE_MODEL (the registry's active pipeline, kept loaded in this process) and
+request_incremental_update(), which hands newly completed tasks to the online model.
+
+Training lives in core/predictive_model.py. The update worker imports it only once the
+online model has been bootstrapped (`python -m core.predictive_model --incremental`), so a
+server that does not use online learning never loads scikit-learn for it.
+"""
+import os
+
+from core import model_registry
+from core.background import coalescing_worker
+from core.model_features import FEATURE_SCHEMA_HASH, MODEL_NAME
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # garage_ai_assigner directory
+ONLINE_MODEL_FILE_PATH = os.getenv('ONLINE_MODEL_PATH', os.path.join(BASE_DIR, 'models', 'job_success_online.joblib'))
+
+ACTIVE_MODEL = model_registry.ActiveModel(MODEL_NAME, expected_schema_hash=FEATURE_SCHEMA_HASH)
+
+
+def _update_incremental_model():
+    if not os.path.exists(ONLINE_MODEL_FILE_PATH):
+        return # Not bootstrapped: nothing to update
+    try:
+        from core.predictive_model import update_incremental_model
+        update_incremental_model()
+    except Exception as e:
+        print(f"Incremental model update failed: {e}")
+
+
+# Asks a background thread to train on newly completed tasks. Calls made while an update
+# is running are coalesced into the next one, so request handlers never wait on training.
+request_incremental_update = coalescing_worker('incremental-model-update', _update_incremental_model)
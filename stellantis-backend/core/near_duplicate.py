@@ -0,0 +1,240 @@
+# In core/near_duplicate.py
+"""
+Near-duplicate matching for service-mapping descriptions.
+
+Descriptions are reduced to a set of normalized token shingles (lower-cased, stop
+words dropped, light suffix stemming, so "squeaky brakes!!" and "brakes squeak" share
+{brake, squeak}). Each set gets a MinHash signature, and an LSH index (BANDS x ROWS)
+finds candidates; a candidate whose exact Jaccard similarity reaches the threshold
+reuses its service list. Entries are partitioned (e.g. by mileage band) so only
+comparable requests match.
+
+The index is warmed from service_mapping_cache on first use and grows as upstream
+answers arrive. Each entry keeps its cache row's Expires_At (new answers get the mapping
+cache TTL), and expired entries are never matched: lookups evict the ones they meet and
+adds drop the oldest once they expire. stats() reports the hit rate for tuning
+NEAR_DUPLICATE_THRESHOLD.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from core import instrumentation, mapping_cache
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv("WORKSHOP_DB_PATH", os.path.join(BASE_DIR, "database/workshop.db"))
+SIMILARITY_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "200000"))
+# BANDS x ROWS = NUM_PERM. A pair with Jaccard similarity s becomes a candidate with
+# probability 1 - (1 - s**ROWS)**BANDS: about 95% at 0.8 and under 2% at 0.4.
+NUM_PERM = 128
+BANDS, ROWS = 16, 8
+_PRIME = (1 << 31) - 1
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by car customer for from has have i in is it its my of on or please
+says so the there this to vehicle was when with
+""".split())
+
+NEAR_DUPLICATE_LOOKUPS = instrumentation.REGISTRY.counter(
+    'service_mapping_near_duplicate_total', 'Near-duplicate description lookups, by result (hit, miss).',
+    ('result',))
+
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM, dtype=np.int64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM, dtype=np.int64)
+# Cache-key suffix written by gemini_mapping._cache_description(): the mileage rounded down
+# to MILEAGE_CACHE_BAND miles, so nearby readings share an answer.
+MILEAGE_CACHE_BAND = 10000
+_PARTITION_SUFFIX = re.compile(r" mileage band (\d+)$")
+
+
+def _stem(token):
+    """Light suffix stripping: brakes/brake, squeaky/squeaking/squeak, warnings/warning."""
+    if token.endswith("ies") and len(token) > 4:
+        token = token[:-3] + "y"
+    # Two passes so stacked suffixes ("warnings") reduce like the single ones ("warning").
+    for _ in range(2):
+        for suffix in ("ing", "ed", "y", "s"):
+            if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+                token = token[:-len(suffix)]
+                break
+        else:
+            break
+    return token
+
+
+def shingles(description):
+    """Normalized token shingles of a description."""
+    tokens = re.findall(r"[a-z0-9]+", str(description).lower())
+    return frozenset(_stem(token) for token in tokens if token not in STOP_WORDS)
+
+
+def signature(shingle_set):
+    """MinHash signature (NUM_PERM uint32 values) of a shingle set."""
+    if not shingle_set:
+        return None
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingle_set), dtype=np.int64, count=len(shingle_set))
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1).astype(np.uint32)
+
+
+def _band_keys(partition, sig):
+    raw = sig.tobytes()
+    width = ROWS * 4
+    return [(partition, band, raw[band * width:(band + 1) * width]) for band in range(BANDS)]
+
+
+class NearDuplicateIndex:
+    """MinHash/LSH index from descriptions to service lists."""
+
+    def __init__(self, threshold=SIMILARITY_THRESHOLD, max_entries=MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (shingles, band keys, services, expires at), oldest first
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, description, services, partition=None, expires_at=None):
+        """Indexes an answer until expires_at (default: the mapping cache TTL from now)."""
+        shingle_set = shingles(description)
+        sig = signature(shingle_set)
+        if sig is None or not services:
+            return
+        now = time.time()
+        if expires_at is None:
+            expires_at = now + mapping_cache.TTL_SECONDS
+        key = (partition, shingle_set)
+        band_keys = _band_keys(partition, sig)
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (shingle_set, band_keys, list(services), expires_at)
+                self._entries.move_to_end(key)
+                return
+            self._entries[key] = (shingle_set, band_keys, list(services), expires_at)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, []).append(key)
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or next(iter(self._entries.values()))[3] <= now):
+                self._evict(next(iter(self._entries)))
+
+    def _evict(self, key):
+        _, band_keys, _, _ = self._entries.pop(key)
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def lookup(self, description, partition=None):
+        """Returns (services, similarity) of the most similar indexed description, or None."""
+        shingle_set = shingles(description)
+        sig = signature(shingle_set)
+        best = None
+        if sig is not None:
+            now = time.time()
+            with self._lock:
+                candidates = set()
+                for band_key in _band_keys(partition, sig):
+                    candidates.update(self._buckets.get(band_key, ()))
+                for key in candidates:
+                    other, _, services, expires_at = self._entries[key]
+                    if expires_at <= now:
+                        self._evict(key)
+                        continue
+                    similarity = len(shingle_set & other) / len(shingle_set | other)
+                    if similarity >= self.threshold and (best is None or similarity > best[1]):
+                        best = (list(services), similarity)
+        with self._lock:
+            self.lookups += 1
+            if best is not None:
+                self.hits += 1
+        NEAR_DUPLICATE_LOOKUPS.inc('hit' if best else 'miss')
+        return best
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self.lookups = 0
+            self.hits = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'threshold': self.threshold,
+                'lookups': self.lookups,
+                'hits': self.hits,
+                'hit_rate': round(self.hits / self.lookups, 4) if self.lookups else None,
+            }
+
+
+INDEX = NearDuplicateIndex()
+_warmed = False
+_warm_retry_at = 0.0
+_warm_lock = threading.Lock()
+# After a failed warm-up (e.g. a locked database) the next lookup retries once this much later.
+WARM_RETRY_SECONDS = 30
+
+
+def split_cache_description(cache_description):
+    """Splits a mapping-cache key into (description, partition)."""
+    match = _PARTITION_SUFFIX.search(cache_description)
+    if not match:
+        return cache_description, None
+    return cache_description[:match.start()], int(match.group(1))
+
+
+def _warm():
+    """Indexes the unexpired answers already stored in service_mapping_cache (once per process)."""
+    global _warmed, _warm_retry_at
+    with _warm_lock:
+        if _warmed or time.time() < _warm_retry_at:
+            return
+        try:
+            conn = sqlite3.connect(DB_PATH)
+            try:
+                rows = conn.execute(
+                    "SELECT Description_Key, Services, Expires_At FROM service_mapping_cache WHERE Expires_At > ? "
+                    "ORDER BY Created_At", (time.time(),)
+                ).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"Near-duplicate index not warmed, retrying in {WARM_RETRY_SECONDS}s: {e}")
+            _warm_retry_at = time.time() + WARM_RETRY_SECONDS
+            return
+        for cache_description, services, expires_at in rows:
+            description, partition = split_cache_description(cache_description)
+            INDEX.add(description, json.loads(services), partition, expires_at)
+        _warmed = True
+
+
+def lookup(description, partition=None):
+    _warm()
+    return INDEX.lookup(description, partition)
+
+
+def add(description, services, partition=None):
+    INDEX.add(description, services, partition)
+
+
+def clear():
+    INDEX.clear()
+
+
+def stats():
+    return INDEX.stats()
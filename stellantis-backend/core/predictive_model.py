@@ -1,7 +1,14 @@
 import sqlite3
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.base import clone
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.model_selection import TimeSeriesSplit, train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
@@ -9,13 +16,29 @@ from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 import joblib # For saving and loading the model
 
+from core import model_registry
+from core.compiled_scorer import SCORER_FILE, CompiledScorer
+from core.incremental_model import IncrementalSuccessModel
+from core.model_serving import ACTIVE_MODEL, ONLINE_MODEL_FILE_PATH
+from core.model_features import (
+    CATEGORICAL_FEATURES, FEATURE_SCHEMA_HASH, MODEL_NAME, NUMERICAL_FEATURES, build_model_features,
+    summarize_job_history,
+)
+
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # garage_ai_assigner directory
-DATABASE_NAME = os.path.join(BASE_DIR, 'database', 'workshop.db')
+DATABASE_NAME = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database', 'workshop.db'))
 MODEL_DIR = os.path.join(BASE_DIR, 'models') # Directory to save trained models
 os.makedirs(MODEL_DIR, exist_ok=True) # Ensure model directory exists
-MODEL_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_model.joblib')
+MODEL_FILE_PATH = os.path.join(MODEL_DIR, 'job_success_model.joblib') # Pre-registry artifact, imported as version 1
 PREPROCESSOR_FILE_PATH = os.path.join(MODEL_DIR, 'preprocessor.joblib')
+# Model selection: time-ordered cross-validation folds and the number of worker processes
+MODEL_SELECTION_FOLDS = int(os.getenv('MODEL_SELECTION_FOLDS', '5'))
+MODEL_SELECTION_WORKERS = int(os.getenv('MODEL_SELECTION_WORKERS', str(os.cpu_count() or 1)))
+# Rows read per chunk by the streaming training data loader (load_training_set)
+TRAINING_CHUNK_ROWS = int(os.getenv('TRAINING_CHUNK_ROWS', '50000'))
+# Largest allowed difference between the compiled scorer and the pipeline's predict_proba.
+COMPILED_SCORER_TOLERANCE = 1e-9
 
 
 def get_db_connection():
@@ -24,31 +47,33 @@ def get_db_connection():
     conn.row_factory = sqlite3.Row # Allows accessing columns by name
     return conn
 
+# Training rows come from completed tasks in job_history; the aliases keep the feature
+# names the model was designed with.
+TRAINING_COLUMNS_SQL = """
+        jh.Engineer_Id AS engineer_id,
+        jh.Task_Description AS job_description_text, -- The task is our job type identifier
+        jh.Make AS vehicle_make,
+        jh.Model AS vehicle_model,
+        jh.Outcome_Score AS outcome_score,           -- This will be used to create the target variable
+        ep.Overall_Performance_Score AS engineer_general_score,
+        jh.Estimated_Standard_Time AS job_estimated_time,
+        jh.Time_Ended AS completed_at
+"""
+TRAINING_FROM_SQL = """
+    FROM job_history jh
+    LEFT JOIN engineer_profiles ep ON ep.Engineer_ID = jh.Engineer_Id
+    WHERE jh.Outcome_Score IS NOT NULL
+"""
+
+
 def fetch_training_data():
     """
     Fetches data from the database to build a dataset for model training.
-    Each row will represent a completed job from engineer_past_performance.
+    Each row represents a completed task from job_history, oldest first.
     """
     print("Fetching training data from database...")
     conn = get_db_connection()
-    query = """
-    SELECT
-        ep.engineer_id,
-        ep.job_description_text, -- This will be our primary job type identifier
-        ep.vehicle_make,
-        ep.vehicle_model,
-        ep.outcome_score,         -- This will be used to create the target variable
-        e.overall_past_job_score AS engineer_general_score, -- From engineers table
-        jd.standard_estimated_time_minutes AS job_estimated_time -- From job_definitions
-    FROM
-        engineer_past_performance ep
-    JOIN
-        engineers e ON ep.engineer_id = e.engineer_id
-    LEFT JOIN 
-        job_definitions jd ON ep.job_description_text = jd.job_name; 
-        -- We use job_description_text from past_performance as the job identifier
-        -- It's assumed this text matches a job_name in job_definitions for estimate
-    """
+    query = f"SELECT {TRAINING_COLUMNS_SQL} {TRAINING_FROM_SQL} ORDER BY jh.Time_Ended, jh.rowid"
     df = pd.read_sql_query(query, conn)
     conn.close()
     
@@ -59,35 +84,6 @@ def fetch_training_data():
     print(f"Fetched {len(df)} records for training data construction.")
     return df
 
-def engineer_job_specific_metrics(df_all_past_jobs):
-    """
-    Calculates engineer's average score and experience count for each specific job type
-    based on their entire history present in df_all_past_jobs.
-    """
-    # Engineer's average score for a specific job type
-    # Ensure outcome_score is numeric for calculations
-    df_all_past_jobs['outcome_score_numeric'] = pd.to_numeric(df_all_past_jobs['outcome_score'], errors='coerce')
-
-    # Calculate avg score for each engineer on each job_description_text
-    specific_avg_scores = df_all_past_jobs.groupby(['engineer_id', 'job_description_text'])['outcome_score_numeric'].mean().reset_index()
-    specific_avg_scores.rename(columns={'outcome_score_numeric': 'eng_job_specific_avg_score'}, inplace=True)
-
-    # Engineer's experience count for a specific job type
-    specific_exp_counts = df_all_past_jobs.groupby(['engineer_id', 'job_description_text']).size().reset_index(name='eng_job_specific_exp_count')
-    
-    # Merge these features back into the main DataFrame
-    df_merged = pd.merge(df_all_past_jobs, specific_avg_scores, on=['engineer_id', 'job_description_text'], how='left')
-    df_merged = pd.merge(df_merged, specific_exp_counts, on=['engineer_id', 'job_description_text'], how='left')
-    
-    # For a given row (a specific job instance), the specific experience count should ideally be
-    # the count *before* this job. For simplicity in this POC, we're using the total count.
-    # A more advanced approach would involve time-series based feature engineering.
-    # If an engineer is doing a job type for the first time in the dataset, this specific avg_score might be NaN.
-    # And experience count would be 1. We'll fill NaNs later.
-    
-    df_merged.drop(columns=['outcome_score_numeric'], inplace=True, errors='ignore')
-    return df_merged
-
 def preprocess_data(df):
     """
     Preprocesses the raw data: feature engineering, target creation, and cleaning.
@@ -97,76 +93,154 @@ def preprocess_data(df):
 
     print("Preprocessing data...")
 
-    # 1. Engineer job-specific metrics (calculated based on the whole dataset)
-    df = engineer_job_specific_metrics(df.copy()) # Use .copy() to avoid SettingWithCopyWarning
+    # 1. Features, with engineer job-specific metrics taken strictly before each job
+    # Note: 'engineer_id' is not used as a direct feature as its effect should be captured
+    # by the engineered features like 'engineer_general_score', 'eng_job_specific_avg_score', etc.
+    # 'vehicle_model' is also dropped for this initial model.
+    X = build_model_features(df.copy()) # Use .copy() to avoid SettingWithCopyWarning
 
     # 2. Create Target Variable: 'high_success' (binary)
     # outcome_score is 1-5. Let's say 4, 5 are high success (1), else 0.
-    df['high_success'] = df['outcome_score'].apply(lambda x: 1 if x >= 4 else 0)
+    y = (df['outcome_score'] >= 4).astype(int).rename('high_success')
 
-    # 3. Feature Selection & Handling Missing Values
-    # Initial features:
-    # Categorical: job_description_text, vehicle_make (can add vehicle_model later if desired)
-    # Numerical: engineer_general_score, job_estimated_time, eng_job_specific_avg_score, eng_job_specific_exp_count
-    
-    # Fill NaNs for numerical features (e.g., with mean or a specific value like 0)
-    # engineer_general_score should ideally not be NaN if engineer_analyzer.py ran.
-    df['engineer_general_score'].fillna(df['engineer_general_score'].mean(), inplace=True)
-    # job_estimated_time might be NaN if job_description_text from past_performance isn't in job_definitions, or has no estimate.
-    df['job_estimated_time'].fillna(df['job_estimated_time'].median(), inplace=True) # Use median for time
-    # For eng_job_specific_avg_score, NaN means no prior specific jobs or first time. Could fill with overall avg score or 0.
-    df['eng_job_specific_avg_score'].fillna(df['engineer_general_score'], inplace=True) # Fill with general score
-    # For eng_job_specific_exp_count, NaN (unlikely after groupby.size) can be 0. It will be 1 if it's their first time.
-    df['eng_job_specific_exp_count'].fillna(0, inplace=True)
-
-
-    # Define features (X) and target (y)
-    # Note: 'engineer_id' is not used as a direct feature as its effect should be captured
-    # by the engineered features like 'engineer_general_score', 'eng_job_specific_avg_score', etc.
-    # 'outcome_score' and 'vehicle_model' are also dropped for this initial model.
-    X = df.drop(columns=['engineer_id', 'outcome_score', 'high_success', 'vehicle_model'])
-    y = df['high_success']
-    
     print(f"Data shape before defining preprocessor: X - {X.shape}, y - {y.shape}")
     if X.empty:
         print("No data available after preprocessing steps.")
         return pd.DataFrame(), None, None
 
-    # Identify categorical and numerical features for the preprocessor
-    categorical_features = ['job_description_text', 'vehicle_make']
-    # Ensure all categorical features are actually in X's columns
-    categorical_features = [col for col in categorical_features if col in X.columns]
+    print(f"Identified Categorical Features: {CATEGORICAL_FEATURES}")
+    print(f"Identified Numerical Features: {NUMERICAL_FEATURES}")
+
+    # It's good practice to fit the preprocessor on training data only
+    # and then transform both training and test data.
+    # For now, we define it. It will be part of a pipeline.
 
-    numerical_features = ['engineer_general_score', 'job_estimated_time', 
-                          'eng_job_specific_avg_score', 'eng_job_specific_exp_count']
-    # Ensure all numerical features are actually in X's columns
-    numerical_features = [col for col in numerical_features if col in X.columns]
+    return X, y, build_preprocessor()
 
-    print(f"Identified Categorical Features: {categorical_features}")
-    print(f"Identified Numerical Features: {numerical_features}")
 
-    # Create a preprocessor object using ColumnTransformer
+def build_preprocessor():
+    """The (unfitted) ColumnTransformer for the model's input columns."""
     # OneHotEncoder for categorical features: handle_unknown='ignore' will prevent errors if new categories appear in prediction
     # StandardScaler for numerical features: scales data to have mean 0 and variance 1
-    preprocessor = ColumnTransformer(
+    return ColumnTransformer(
         transformers=[
-            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), categorical_features),
-            ('num', StandardScaler(), numerical_features)
-        ], 
+            ('cat', OneHotEncoder(handle_unknown='ignore', sparse_output=False), CATEGORICAL_FEATURES),
+            ('num', StandardScaler(), NUMERICAL_FEATURES)
+        ],
         remainder='passthrough' # In case some columns are not specified, pass them through
     )
-    
-    # It's good practice to fit the preprocessor on training data only
-    # and then transform both training and test data.
-    # For now, we define it. It will be part of a pipeline.
 
-    return X, y, preprocessor
 
+# Compact dtypes for the streaming loader. Text columns become categoricals whose categories
+# are read up front, so every chunk shares them and the codes can be stored directly.
+TRAINING_CATEGORY_SOURCES = {
+    'engineer_id': 'jh.Engineer_Id',
+    'job_description_text': 'jh.Task_Description',
+    'vehicle_make': 'jh.Make',
+}
+TRAINING_COMPACT_DTYPES = {
+    'outcome_score': 'int8',
+    'engineer_general_score': 'float32',
+    'job_estimated_time': 'float32',
+}
+
+
+def training_dtypes(conn):
+    """Column dtypes for load_training_set(): categoricals with the full category set, small numerics."""
+    dtypes = dict(TRAINING_COMPACT_DTYPES)
+    for column, source in TRAINING_CATEGORY_SOURCES.items():
+        rows = conn.execute(f"SELECT DISTINCT {source} {TRAINING_FROM_SQL} AND {source} IS NOT NULL").fetchall()
+        dtypes[column] = pd.CategoricalDtype(sorted(row[0] for row in rows))
+    return dtypes
 
-def train_and_evaluate_model(X, y, preprocessor):
+
+def training_fill_values(conn):
+    """
+    The values preprocess_data() fills missing numerics with, computed over the whole
+    history in SQL: mean engineer score and median estimated time.
+    """
+    mean_score = conn.execute(f"SELECT AVG(ep.Overall_Performance_Score) {TRAINING_FROM_SQL}").fetchone()[0]
+    count = conn.execute(
+        f"SELECT COUNT(jh.Estimated_Standard_Time) {TRAINING_FROM_SQL}").fetchone()[0]
+    median_time = None
+    if count:
+        # Average of the two middle values for an even count, like pandas' median.
+        middle = conn.execute(
+            f"SELECT AVG(t) FROM (SELECT jh.Estimated_Standard_Time AS t {TRAINING_FROM_SQL} "
+            "AND jh.Estimated_Standard_Time IS NOT NULL ORDER BY t LIMIT ? OFFSET ?)",
+            (2 - count % 2, (count - 1) // 2)).fetchone()[0]
+        median_time = float(middle)
+    return {'engineer_general_score': mean_score, 'job_estimated_time': median_time}
+
+
+def iter_training_chunks(conn, dtypes, chunksize=TRAINING_CHUNK_ROWS):
+    """The training rows in completion order, chunksize rows at a time, cast to dtypes."""
+    query = f"SELECT {TRAINING_COLUMNS_SQL} {TRAINING_FROM_SQL} ORDER BY jh.Time_Ended, jh.rowid"
+    for chunk in pd.read_sql_query(query, conn, chunksize=chunksize):
+        # Chunks arrive in completion order, which is all completed_at is needed for.
+        yield chunk.drop(columns=['completed_at', 'vehicle_model']).astype(dtypes)
+
+
+def load_training_set(chunksize=TRAINING_CHUNK_ROWS):
+    """
+    Streaming equivalent of preprocess_data(fetch_training_data()), for histories too large to
+    hold as one raw DataFrame. Reads the join chunksize rows at a time, computes each chunk's
+    point-in-time features from the outcome totals of the chunks before it, and writes them
+    into preallocated arrays (category codes, float64 features, an int8 target). Peak memory
+    is the final feature matrix plus one chunk. Returns (X, y, preprocessor, stats).
+    """
+    print(f"Streaming training data from database in chunks of {chunksize} rows...")
+    start = time.perf_counter()
+    conn = sqlite3.connect(DATABASE_NAME)
+    try:
+        # One read transaction, so rows completed while streaming cannot change the count.
+        conn.execute("BEGIN")
+        total = conn.execute(f"SELECT COUNT(*) {TRAINING_FROM_SQL}").fetchone()[0]
+        if not total:
+            print("No training data fetched. Check database and table contents.")
+            return pd.DataFrame(), None, None, None
+        dtypes = training_dtypes(conn)
+        fill_values = training_fill_values(conn)
+
+        codes = {feature: np.empty(total, dtype=np.int32) for feature in CATEGORICAL_FEATURES}
+        # Numerical features stay float64, the precision the pipeline and serving compute in.
+        numeric = np.empty((total, len(NUMERICAL_FEATURES)))
+        target = np.empty(total, dtype=np.int8)
+        prior, prior_overall = None, np.zeros(2)
+        rows, chunks = 0, 0
+        for chunk in iter_training_chunks(conn, dtypes, chunksize):
+            features = build_model_features(chunk, prior, prior_overall, fill_values)
+            end = rows + len(chunk)
+            for feature in CATEGORICAL_FEATURES:
+                codes[feature][rows:end] = features[feature].cat.codes
+            numeric[rows:end] = features[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+            target[rows:end] = chunk['outcome_score'].to_numpy() >= 4
+
+            summary = summarize_job_history(chunk)
+            prior = summary if prior is None else prior.add(summary, fill_value=0)
+            prior_overall += summary[['score_sum', 'count']].sum().to_numpy()
+            rows, chunks = end, chunks + 1
+    finally:
+        conn.close()
+
+    X = pd.DataFrame({feature: pd.Categorical.from_codes(codes[feature], dtype=dtypes[feature])
+                      for feature in CATEGORICAL_FEATURES})
+    for i, feature in enumerate(NUMERICAL_FEATURES):
+        X[feature] = numeric[:, i]
+    y = pd.Series(target, name='high_success')
+
+    seconds = time.perf_counter() - start
+    stats = {'rows': rows, 'chunks': chunks, 'seconds': round(seconds, 3),
+             'rows_per_second': round(rows / seconds) if seconds else None}
+    print(f"Loaded {rows} records in {chunks} chunk(s), {stats['seconds']}s "
+          f"({stats['rows_per_second']} rows/s). Data shape: X - {X.shape}, y - {y.shape}")
+    return X, y, build_preprocessor(), stats
+
+
+def train_and_evaluate_model(X, y, preprocessor, classifier=None, selection=None):
     """
-    Trains a Logistic Regression model and evaluates it.
-    Saves the trained model and preprocessor.
+    Trains a Logistic Regression model (or the given classifier, e.g. the one picked by
+    select_model) and evaluates it. Saves the trained model and preprocessor.
     """
     if X.empty or y.empty:
         print("Cannot train model: No data available.")
@@ -178,10 +252,12 @@ def train_and_evaluate_model(X, y, preprocessor):
 
     # Create a pipeline that includes preprocessing and the model
     # Pipeline helps manage steps: transform data then fit model
+    if classifier is None:
+        # class_weight='balanced' can help if one class is much more frequent
+        classifier = LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')
     model_pipeline = Pipeline(steps=[
         ('preprocessor', preprocessor),
-        ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced')) 
-        # class_weight='balanced' can help if one class is much more frequent
+        ('classifier', classifier)
     ])
 
     print("Training the model...")
@@ -192,8 +268,10 @@ def train_and_evaluate_model(X, y, preprocessor):
     y_pred_test = model_pipeline.predict(X_test)
     y_pred_proba_test = model_pipeline.predict_proba(X_test)[:, 1] # Probability of class 1 (high_success)
 
-    print("Test Set Accuracy:", accuracy_score(y_test, y_pred_test))
+    accuracy = accuracy_score(y_test, y_pred_test)
+    print("Test Set Accuracy:", accuracy)
     print("\nTest Set Classification Report:\n", classification_report(y_test, y_pred_test))
+    roc_auc = None
     try:
         roc_auc = roc_auc_score(y_test, y_pred_proba_test)
         print("Test Set ROC AUC Score:", roc_auc)
@@ -201,49 +279,368 @@ def train_and_evaluate_model(X, y, preprocessor):
         print(f"Could not calculate ROC AUC Score: {e}. This might happen if only one class is present in y_true.")
 
 
-    # Save the trained model pipeline (which includes the preprocessor)
+    # Publish the trained model pipeline (which includes the preprocessor) as a new active version,
+    # with its compiled NumPy scorer for serving
     try:
-        joblib.dump(model_pipeline, MODEL_FILE_PATH)
-        print(f"\nTrained model pipeline saved to: {MODEL_FILE_PATH}")
+        attachments, compiled_diff = export_compiled_scorer(model_pipeline, X_test)
+        version = model_registry.publish(MODEL_NAME, model_pipeline, {
+            'training_rows': int(X_train.shape[0]),
+            'test_rows': int(X_test.shape[0]),
+            'metrics': {'accuracy': float(accuracy), 'roc_auc': None if roc_auc is None else float(roc_auc)},
+            'feature_schema_hash': FEATURE_SCHEMA_HASH,
+            'features': {'categorical': CATEGORICAL_FEATURES, 'numerical': NUMERICAL_FEATURES},
+            'compiled_scorer_max_abs_diff': compiled_diff,
+            'classifier': repr(classifier),
+            'model_selection': selection,
+        }, attachments=attachments)
+        print(f"\nTrained model pipeline published as {MODEL_NAME} version {version}")
     except Exception as e:
         print(f"Error saving model: {e}")
         
     return model_pipeline
 
 
+# --- Model selection ---
+
+def candidate_grid(include_trees=False):
+    """(kind, params) candidates compared by select_model."""
+    grid = [('logistic_regression', {'C': C, 'class_weight': class_weight})
+            for C in (0.01, 0.1, 1.0, 10.0) for class_weight in (None, 'balanced')]
+    if include_trees:
+        grid += [('hist_gradient_boosting', {'max_depth': max_depth, 'learning_rate': learning_rate,
+                                             'class_weight': 'balanced'})
+                 for max_depth in (3, 6) for learning_rate in (0.05, 0.1)]
+    return grid
+
+
+def make_classifier(kind, params):
+    if kind == 'logistic_regression':
+        return LogisticRegression(solver='liblinear', random_state=42, **params)
+    if kind == 'hist_gradient_boosting':
+        return HistGradientBoostingClassifier(random_state=42, **params)
+    raise ValueError(f"Unknown classifier kind: {kind}")
+
+
+def encode_folds(X, y, preprocessor, n_splits=MODEL_SELECTION_FOLDS):
+    """
+    Time-ordered folds (each validates on rows after its training rows) as encoded arrays:
+    [(X_train, y_train, X_val, y_val)]. The preprocessor is fitted on each fold's training
+    rows once, and every candidate then reuses the same matrices.
+    """
+    folds = []
+    for train_idx, val_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        fold_preprocessor = clone(preprocessor)
+        folds.append((
+            np.ascontiguousarray(fold_preprocessor.fit_transform(X.iloc[train_idx]), dtype=float),
+            y.iloc[train_idx].to_numpy(),
+            np.ascontiguousarray(fold_preprocessor.transform(X.iloc[val_idx]), dtype=float),
+            y.iloc[val_idx].to_numpy(),
+        ))
+    return folds
+
+
+_selection_folds = None
+
+
+def _init_selection_worker(folds_path):
+    """Maps the encoded folds into the worker read-only; nothing is copied per task."""
+    global _selection_folds
+    _selection_folds = joblib.load(folds_path, mmap_mode='r')
+
+
+def _score_candidate_on_fold(task):
+    kind, params, fold = task
+    X_train, y_train, X_val, y_val = _selection_folds[fold]
+    if len(np.unique(y_val)) < 2:
+        return np.nan
+    model = make_classifier(kind, params).fit(X_train, y_train)
+    return roc_auc_score(y_val, model.predict_proba(X_val)[:, 1])
+
+
+def select_model(X, y, preprocessor, workers=MODEL_SELECTION_WORKERS, include_trees=False,
+                 n_splits=MODEL_SELECTION_FOLDS, folds=None):
+    """
+    Time-series cross-validation of every candidate, with (candidate, fold) fits spread over
+    a pool of `workers` processes (workers=1 runs in this process). X must be in completion
+    order. Returns a summary with the candidates ranked by mean validation ROC AUC; the
+    first is the best.
+    """
+    global _selection_folds
+    start = time.perf_counter()
+    folds = folds if folds is not None else encode_folds(X, y, preprocessor, n_splits)
+    grid = candidate_grid(include_trees)
+    tasks = [(kind, params, fold) for kind, params in grid for fold in range(len(folds))]
+
+    if workers <= 1:
+        _selection_folds = folds
+        try:
+            scores = [_score_candidate_on_fold(task) for task in tasks]
+        finally:
+            _selection_folds = None
+    else:
+        with tempfile.TemporaryDirectory(prefix='model-selection-') as tmp_dir:
+            folds_path = os.path.join(tmp_dir, 'folds.joblib')
+            joblib.dump(folds, folds_path)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_selection_worker,
+                                     initargs=(folds_path,)) as pool:
+                scores = list(pool.map(_score_candidate_on_fold, tasks,
+                                       chunksize=max(1, len(tasks) // (workers * 4))))
+
+    fold_scores = np.array(scores, dtype=float).reshape(len(grid), len(folds))
+    ranked = sorted(
+        ({'kind': kind, 'params': params,
+          'mean_auc': round(float(np.nanmean(row)), 4), 'std_auc': round(float(np.nanstd(row)), 4)}
+         for (kind, params), row in zip(grid, fold_scores)),
+        key=lambda candidate: candidate['mean_auc'], reverse=True)
+    summary = {
+        'folds': len(folds),
+        'workers': workers,
+        'seconds': round(time.perf_counter() - start, 2),
+        'best': ranked[0],
+        'candidates': ranked,
+    }
+    print(f"Model selection: best {ranked[0]['kind']} {ranked[0]['params']} "
+          f"(mean AUC {ranked[0]['mean_auc']}) from {len(grid)} candidates in {summary['seconds']}s")
+    return summary
+
+
+def compile_pipeline(model_pipeline):
+    """
+    Compiles a fitted pipeline (OneHotEncoder + StandardScaler + LogisticRegression) into a
+    CompiledScorer: a weight per known category, the scaler statistics and the coefficients.
+    """
+    preprocessor = model_pipeline.named_steps['preprocessor']
+    classifier = model_pipeline.named_steps['classifier']
+    if list(classifier.classes_) != [0, 1]:
+        raise ValueError(f"Expected a binary classifier over [0, 1], got classes {classifier.classes_}")
+    coef = classifier.coef_[0]
+
+    categorical_weights, numerical = {}, None
+    offset = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or len(columns) == 0:
+            continue
+        if isinstance(transformer, OneHotEncoder):
+            if getattr(transformer, 'drop_idx_', None) is not None:
+                raise ValueError("One-hot encoders with drop= are not supported")
+            for feature, categories in zip(columns, transformer.categories_):
+                categorical_weights[feature] = {
+                    (category.item() if hasattr(category, 'item') else category): float(coef[offset + i])
+                    for i, category in enumerate(categories)
+                }
+                offset += len(categories)
+        elif isinstance(transformer, StandardScaler) and numerical is None:
+            width = len(columns)
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(width)
+            scale = transformer.scale_ if transformer.with_std else np.ones(width)
+            numerical = (list(columns), mean, scale, coef[offset:offset + width])
+            offset += width
+        else:
+            raise ValueError(f"Cannot compile transformer {name!r} ({transformer!r})")
+    if offset != len(coef):
+        raise ValueError(f"Transformers produce {offset} columns but the model has {len(coef)} coefficients")
+
+    features, mean, scale, numerical_coef = numerical or ([], [], [], [])
+    return CompiledScorer.from_parts(categorical_weights, features, mean, scale, numerical_coef,
+                                     classifier.intercept_[0])
+
+
+def export_compiled_scorer(model_pipeline, X_check):
+    """
+    Compiles the pipeline and checks it against predict_proba on X_check. Returns
+    (registry attachments, max abs difference); the scorer is left out if it cannot be
+    compiled or differs by more than COMPILED_SCORER_TOLERANCE.
+    """
+    try:
+        scorer = compile_pipeline(model_pipeline)
+        difference = float(np.max(np.abs(
+            scorer.predict_proba(X_check)[:, 1] - model_pipeline.predict_proba(X_check)[:, 1]
+        ))) if len(X_check) else 0.0
+    except Exception as e:
+        print(f"Could not compile the model pipeline: {e}")
+        return {}, None
+    if difference > COMPILED_SCORER_TOLERANCE:
+        print(f"Compiled scorer differs from the pipeline by {difference:.3g}; not exporting it.")
+        return {}, difference
+    return {SCORER_FILE: scorer.to_json()}, difference
+
+
+def import_legacy_model():
+    """
+    Publishes the pre-registry job_success_model.joblib as the first version when the
+    registry has none, so existing deployments keep a model to serve.
+    """
+    if model_registry.list_versions(MODEL_NAME) or not os.path.exists(MODEL_FILE_PATH):
+        return None
+    model_pipeline = joblib.load(MODEL_FILE_PATH)
+    df = fetch_training_data()
+    X_check = build_model_features(df) if not df.empty else pd.DataFrame()
+    attachments, compiled_diff = export_compiled_scorer(model_pipeline, X_check)
+    return model_registry.publish(MODEL_NAME, model_pipeline, {
+        'source': os.path.basename(MODEL_FILE_PATH),
+        'feature_schema_hash': FEATURE_SCHEMA_HASH,
+        'features': {'categorical': CATEGORICAL_FEATURES, 'numerical': NUMERICAL_FEATURES},
+        'compiled_scorer_max_abs_diff': compiled_diff,
+    }, attachments=attachments)
+
+
 def load_model_and_preprocessor():
-    """Loads the trained model pipeline from disk."""
-    if os.path.exists(MODEL_FILE_PATH):
+    """Loads the active trained model pipeline from the registry."""
+    try:
+        import_legacy_model()
+        model_pipeline, metadata = model_registry.load(MODEL_NAME)
+    except Exception as e:
+        print(f"Error loading model: {e}")
+        return None
+    if model_pipeline is None:
+        print(f"No active {MODEL_NAME} model in {model_registry.REGISTRY_DIR}. Train the model first.")
+        return None
+    print(f"Model pipeline version {metadata['version']} loaded successfully")
+    return model_pipeline
+
+
+def get_model():
+    """
+    The active trained pipeline, kept loaded in this process. A newly activated version is
+    loaded in the background and swapped in. Returns None if no model has been trained.
+    """
+    if ACTIVE_MODEL.version is None:
         try:
-            model_pipeline = joblib.load(MODEL_FILE_PATH)
-            print(f"Model pipeline loaded successfully from {MODEL_FILE_PATH}")
-            return model_pipeline
+            import_legacy_model()
         except Exception as e:
-            print(f"Error loading model: {e}")
-            return None
-    else:
-        print(f"Model file not found at {MODEL_FILE_PATH}. Train the model first.")
+            print(f"Error importing {MODEL_FILE_PATH}: {e}")
+    return ACTIVE_MODEL.get()
+
+# --- Incremental (online) training ---
+
+_online_model = None
+_online_lock = threading.Lock()
+
+
+def load_incremental_model():
+    """Returns the persisted incremental model, or None if it has not been bootstrapped."""
+    if not os.path.exists(ONLINE_MODEL_FILE_PATH):
+        return None
+    try:
+        return joblib.load(ONLINE_MODEL_FILE_PATH)
+    except Exception as e:
+        print(f"Error loading incremental model: {e}")
         return None
 
+
+def _save_incremental_model(model):
+    tmp_path = ONLINE_MODEL_FILE_PATH + '.tmp'
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, ONLINE_MODEL_FILE_PATH)
+
+
+def fetch_completed_since(last_rowid, chunksize=TRAINING_CHUNK_ROWS):
+    """Completed tasks added to job_history after the given rowid, oldest first, in chunks."""
+    conn = get_db_connection()
+    try:
+        query = (f"SELECT jh.rowid AS history_rowid, {TRAINING_COLUMNS_SQL} {TRAINING_FROM_SQL} "
+                 "AND jh.rowid > ? ORDER BY jh.rowid")
+        yield from pd.read_sql_query(query, conn, params=(last_rowid,), chunksize=chunksize)
+    finally:
+        conn.close()
+
+
+def update_incremental_model(bootstrap=False):
+    """
+    Trains the incremental model on tasks completed since its last update and saves it.
+    With bootstrap=True a missing model is created from the whole history; otherwise
+    nothing happens until it exists. A saved model that cannot be loaded is rebuilt. Returns a summary dict, or None if not bootstrapped.
+    """
+    global _online_model
+    with _online_lock:
+        model = _online_model or load_incremental_model()
+        if model is None:
+            # A saved model that no longer loads is rebuilt, rather than silently never updated.
+            if not (bootstrap or os.path.exists(ONLINE_MODEL_FILE_PATH)):
+                return None
+            model = IncrementalSuccessModel()
+
+        start = time.perf_counter()
+        rows = 0
+        # A bootstrap over a long history is trained chunk by chunk, like any other backlog.
+        for batch in fetch_completed_since(model.last_rowid):
+            if batch.empty:
+                continue # pandas yields one empty chunk when nothing new was completed
+            model.update(batch)
+            model.last_rowid = int(batch['history_rowid'].max())
+            rows += len(batch)
+        if rows:
+            _save_incremental_model(model)
+        _online_model = model
+        return {
+            'rows': rows,
+            'rows_seen': model.rows_seen,
+            'last_rowid': model.last_rowid,
+            'milliseconds': round((time.perf_counter() - start) * 1000, 2),
+        }
+
+
+def run_drift_check(holdout_fraction=0.2, batch_size=50):
+    """
+    Compares incremental training with a full refit on the same data: both learn from the
+    oldest (1 - holdout_fraction) of the history (the incremental model in batches of
+    batch_size) and are scored on the most recent rows. A widening gap means the online
+    model has drifted from the batch optimum and a full refit is due.
+    """
+    df = fetch_training_data()
+    if df.empty:
+        return None
+    split = int(len(df) * (1 - holdout_fraction))
+    train_df, holdout_df = df.iloc[:split], df.iloc[split:]
+    y_holdout = (holdout_df['outcome_score'] >= 4).astype(int)
+
+    online = IncrementalSuccessModel()
+    for start in range(0, len(train_df), batch_size):
+        online.update(train_df.iloc[start:start + batch_size])
+    online_proba = online.predict_proba(holdout_df)
+
+    X_train, y_train, preprocessor = preprocess_data(train_df)
+    refit = Pipeline(steps=[
+        ('preprocessor', preprocessor),
+        ('classifier', LogisticRegression(solver='liblinear', random_state=42, class_weight='balanced'))
+    ]).fit(X_train, y_train)
+    # Holdout rows are scored as candidates: their features only see the training history.
+    X_holdout = build_model_features(holdout_df.drop(columns=['outcome_score']),
+                                     prior=summarize_job_history(train_df))
+    refit_proba = refit.predict_proba(X_holdout)[:, 1]
+
+    result = {
+        'train_rows': len(train_df),
+        'holdout_rows': len(holdout_df),
+        'incremental_auc': round(float(roc_auc_score(y_holdout, online_proba)), 4),
+        'full_refit_auc': round(float(roc_auc_score(y_holdout, refit_proba)), 4),
+    }
+    result['auc_gap'] = round(result['full_refit_auc'] - result['incremental_auc'], 4)
+    print(f"Drift check: {result}")
+    return result
+
+
 # Main execution block
 # (Keep all the functions from before: get_db_connection, fetch_training_data, etc.)
 
-def run_training_pipeline():
+def run_training_pipeline(select=False, workers=MODEL_SELECTION_WORKERS, include_trees=False):
     """
     Executes the full model training and evaluation pipeline.
-    This function can be called from other modules.
+    This function can be called from other modules. With select=True the classifier is
+    chosen by time-series cross-validation (select_model) first.
     """
     print("\n--- Starting AI Model Training Pipeline ---")
-    # 1. Fetch data
-    raw_data_df = fetch_training_data()
-
-    if not raw_data_df.empty:
-        # 2. Preprocess data
-        X_features, y_target, data_preprocessor = preprocess_data(raw_data_df)
+    # 1-2. Stream the history in chunks and build the features, without holding the raw rows
+    X_features, y_target, data_preprocessor, _ = load_training_set()
 
+    if not X_features.empty:
         if X_features is not None and not X_features.empty and y_target is not None and not y_target.empty:
-            # 3. Train and evaluate model
-            trained_model = train_and_evaluate_model(X_features, y_target, data_preprocessor)
+            # 3. Optionally pick the classifier by cross-validation, then train and evaluate it
+            classifier, selection = None, None
+            if select:
+                selection = select_model(X_features, y_target, data_preprocessor, workers, include_trees)
+                classifier = make_classifier(selection['best']['kind'], selection['best']['params'])
+            trained_model = train_and_evaluate_model(X_features, y_target, data_preprocessor, classifier, selection)
             
             if trained_model:
                 print("\n--- Model Training Pipeline Completed Successfully ---")
@@ -261,5 +658,23 @@ def run_training_pipeline():
 
 # Main execution block
 if __name__ == '__main__':
-    # Running this script directly will now execute the training pipeline
-    run_training_pipeline()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the job success model.")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Update the online model with newly completed tasks (bootstraps it if missing).")
+    parser.add_argument('--drift-check', action='store_true',
+                        help="Compare incremental training against a full refit on a recent holdout.")
+    parser.add_argument('--select', action='store_true',
+                        help="Choose the classifier by parallel time-series cross-validation before training.")
+    parser.add_argument('--trees', action='store_true', help="Include gradient-boosted trees in --select.")
+    parser.add_argument('--workers', type=int, default=MODEL_SELECTION_WORKERS,
+                        help="Worker processes for --select (default: all cores).")
+    args = parser.parse_args()
+
+    if args.incremental:
+        print(update_incremental_model(bootstrap=True))
+    elif args.drift_check:
+        run_drift_check()
+    else:
+        # Running this script directly will now execute the full training pipeline
+        run_training_pipeline(select=args.select, workers=args.workers, include_trees=args.trees)
\ No newline at end of file
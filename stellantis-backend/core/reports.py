@@ -3,7 +3,7 @@ import os
 
 # Database path
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATABASE_NAME = os.path.join(BASE_DIR, 'database', 'workshop.db')
+DATABASE_NAME = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database', 'workshop.db'))
 
 def get_db_connection():
     """Establishes a connection to the SQLite database."""
@@ -0,0 +1,398 @@
+# In core/scheduler.py
+"""
+In-process scheduler for the batch jobs: profile recomputation, history sync, model
+retraining and database maintenance.
+
+Each job has a cron-like schedule (five fields: minute hour day month weekday, with
+`*`, lists, ranges and `/step`, or @hourly/@daily/@weekly/@monthly), overridable per job
+with SCHEDULER_<JOB_NAME> (e.g. SCHEDULER_RETRAIN_MODEL='0 3 * * *', or 'off'). When
+SCHEDULER_ENABLED=1 the app starts one daemon thread per process that starts each due
+run on a worker thread of its own, off the request path, so a long retrain does not
+delay the other jobs. Slots missed while no process was running are not caught up.
+
+Under multi-worker serving every process runs a scheduler, so a job run is claimed
+through a lease row in scheduler_jobs (under BEGIN IMMEDIATE): a process only runs a
+slot that no one has claimed yet, and only while no unexpired lease is held. The lease
+is renewed while the job runs, so it only expires if its process dies. Every run
+is recorded in scheduler_runs with its duration and outcome; status() (and
+GET /api/v1/admin/scheduler) reports the last run and next run per job. Run a job by
+hand with `python -m core.scheduler --run <job>`.
+"""
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from core import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
+ENABLED = os.getenv('SCHEDULER_ENABLED', '0') == '1'
+# A lease not renewed for this long is treated as abandoned (its process died mid-run).
+LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', '7200'))
+HISTORY_DAYS = int(os.getenv('SCHEDULER_HISTORY_DAYS', '30'))
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SCHEDULER_RUNS = instrumentation.REGISTRY.counter(
+    'scheduler_runs_total', 'Scheduled job runs by job and status (succeeded, failed).', ('job', 'status'))
+SCHEDULER_DURATION = instrumentation.REGISTRY.histogram(
+    'scheduler_job_duration_seconds', 'Duration of scheduled job runs, by job.', ('job',),
+    (1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600))
+
+TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS scheduler_jobs (
+        Job_Name TEXT PRIMARY KEY,
+        Last_Scheduled_For TEXT,
+        Lease_Owner TEXT,
+        Lease_Expires_At TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS scheduler_runs (
+        Id INTEGER PRIMARY KEY,
+        Job_Name TEXT NOT NULL,
+        Scheduled_For TEXT NOT NULL,
+        Started_At TEXT NOT NULL,
+        Finished_At TEXT,
+        Duration_Seconds REAL,
+        Status TEXT NOT NULL, -- running, succeeded or failed
+        Error TEXT,
+        Owner TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_scheduler_runs_job ON scheduler_runs (Job_Name, Id)",
+]
+
+_tables_ready = set()
+
+
+# --- Schedules ------------------------------------------------------------------------
+
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *',
+}
+# (name, lowest, highest); weekday 0 is Sunday, and 7 is accepted for it too.
+CRON_FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+
+def _parse_field(text, name, lowest, highest):
+    values = set()
+    for part in text.split(','):
+        span, _, step = part.partition('/')
+        if span == '*':
+            start, end = lowest, highest
+        elif '-' in span:
+            start, end = (int(value) for value in span.split('-', 1))
+        else:
+            start = end = int(span)
+            if step:
+                end = highest
+        step = int(step) if step else 1
+        if not lowest <= start <= end <= highest or step < 1:
+            raise ValueError(f"Invalid cron {name} field '{text}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """A five-field cron expression; next_after() gives the next matching minute."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = CRON_ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression '{expression}' must have five fields")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(text, *spec) for text, spec in zip(fields, CRON_FIELDS))
+        self.weekdays = {day % 7 for day in weekdays}
+        # As in cron, when both day and weekday are restricted a date matching either one runs.
+        self.days_restricted, self.weekdays_restricted = fields[2] != '*', fields[4] != '*'
+
+    def _day_matches(self, moment):
+        day_match = moment.day in self.days
+        weekday_match = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.days_restricted and self.weekdays_restricted:
+            return day_match or weekday_match
+        return day_match and weekday_match
+
+    def next_after(self, moment):
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron expression '{self.expression}' never matches")
+
+
+# --- Jobs -----------------------------------------------------------------------------
+
+# Both batch entry points report failure by their return value rather than by raising.
+
+def analyze_profiles():
+    from core.engineer_analyzer import analyze_and_update_profiles
+    if not analyze_and_update_profiles():
+        raise RuntimeError("analyze_and_update_profiles reported a failure")
+
+
+def retrain_model():
+    from core.predictive_model import run_training_pipeline
+    if not run_training_pipeline():
+        raise RuntimeError("run_training_pipeline reported a failure")
+
+
+def sync_history():
+    """Applies completed tasks the feature store and engineer scores have not seen yet."""
+    from core.history_sync import catch_up
+    print(catch_up())
+
+
+def db_maintenance():
+    """Refreshes the query planner statistics, checkpoints a WAL and prunes old run history."""
+    conn = instrumentation.connect(DB_PATH, timeout=30)
+    try:
+        conn.execute("PRAGMA optimize")
+        if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cutoff = (datetime.now() - timedelta(days=HISTORY_DAYS)).strftime(TIME_FORMAT)
+        ensure_tables(conn)
+        conn.execute("DELETE FROM scheduler_runs WHERE Started_At < ? AND Status != 'running'", (cutoff,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# name -> (default schedule, function, description)
+JOBS = {
+    'analyze_profiles': ('30 2 * * *', analyze_profiles, "Recompute every engineer profile from the job history."),
+    'retrain_model': ('0 3 * * 0', retrain_model, "Retrain and publish the job success model."),
+    'sync_history': ('*/15 * * * *', sync_history,
+                     "Catch the feature store and engineer scores up with the job history."),
+    'db_maintenance': ('0 4 * * *', db_maintenance, "PRAGMA optimize, WAL checkpoint and run history pruning."),
+}
+
+
+def job_schedule(name):
+    """The job's CronSchedule, or None if SCHEDULER_<NAME>=off."""
+    expression = os.getenv(f"SCHEDULER_{name.upper()}", JOBS[name][0])
+    if expression.strip().lower() in ('', 'off'):
+        return None
+    return CronSchedule(expression)
+
+
+# --- Leases and run history -------------------------------------------------------------
+
+def connect():
+    conn = instrumentation.connect(DB_PATH, timeout=10)
+    ensure_tables(conn)
+    return conn
+
+
+def ensure_tables(conn):
+    if DB_PATH in _tables_ready:
+        return
+    for statement in TABLES_SQL:
+        conn.execute(statement)
+    conn.commit()
+    _tables_ready.add(DB_PATH)
+
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claim(conn, name, scheduled_for, owner):
+    """Takes the job's lease for one slot; returns the scheduler_runs Id, or None if another process has it."""
+    now = datetime.now()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("INSERT OR IGNORE INTO scheduler_jobs (Job_Name) VALUES (?)", (name,))
+        claimed = conn.execute("""
+            UPDATE scheduler_jobs SET Last_Scheduled_For = ?, Lease_Owner = ?, Lease_Expires_At = ?
+            WHERE Job_Name = ?
+              AND (Last_Scheduled_For IS NULL OR Last_Scheduled_For < ?)
+              AND (Lease_Owner IS NULL OR Lease_Expires_At < ?)
+        """, (scheduled_for, owner, (now + timedelta(seconds=LEASE_SECONDS)).strftime(TIME_FORMAT),
+              name, scheduled_for, now.strftime(TIME_FORMAT))).rowcount == 1
+        run_id = None
+        if claimed:
+            run_id = conn.execute("""
+                INSERT INTO scheduler_runs (Job_Name, Scheduled_For, Started_At, Status, Owner)
+                VALUES (?, ?, ?, 'running', ?)
+            """, (name, scheduled_for, now.strftime(TIME_FORMAT), owner)).lastrowid
+        conn.commit()
+        return run_id
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _keep_lease(name, owner, done):
+    """Renews the job's lease until `done` is set, so a long run keeps it however long it takes."""
+    while not done.wait(LEASE_SECONDS / 4):
+        try:
+            conn = connect()
+            try:
+                expires_at = (datetime.now() + timedelta(seconds=LEASE_SECONDS)).strftime(TIME_FORMAT)
+                conn.execute("UPDATE scheduler_jobs SET Lease_Expires_At = ? WHERE Job_Name = ? AND Lease_Owner = ?",
+                             (expires_at, name, owner))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Scheduler: could not renew the lease of {name}: {e}")
+
+
+def _finish(conn, name, run_id, owner, seconds, error):
+    status = 'failed' if error else 'succeeded'
+    conn.execute("""
+        UPDATE scheduler_runs SET Finished_At = ?, Duration_Seconds = ?, Status = ?, Error = ? WHERE Id = ?
+    """, (datetime.now().strftime(TIME_FORMAT), round(seconds, 3), status, error, run_id))
+    conn.execute("""
+        UPDATE scheduler_jobs SET Lease_Owner = NULL, Lease_Expires_At = NULL WHERE Job_Name = ? AND Lease_Owner = ?
+    """, (name, owner))
+    conn.commit()
+    return status
+
+
+def run_job(name, scheduled_for=None):
+    """
+    Runs one job under its lease. scheduled_for (default: now) identifies the slot, which
+    runs at most once across processes. Returns the run's status, or None if it was
+    claimed elsewhere.
+    """
+    scheduled_for = (scheduled_for or datetime.now()).strftime(TIME_FORMAT)
+    owner = _owner()
+    conn = connect()
+    try:
+        run_id = _claim(conn, name, scheduled_for, owner)
+        if run_id is None:
+            return None
+        print(f"Scheduler: running {name} (slot {scheduled_for})")
+        start = time.perf_counter()
+        error = None
+        done = threading.Event()
+        threading.Thread(target=_keep_lease, args=(name, owner, done), daemon=True,
+                         name=f'scheduler-lease-{name}').start()
+        try:
+            JOBS[name][1]()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            print(f"Scheduler: {name} failed: {error}")
+        finally:
+            done.set()
+        seconds = time.perf_counter() - start
+        status = _finish(conn, name, run_id, owner, seconds, error)
+        SCHEDULER_RUNS.inc(name, status)
+        SCHEDULER_DURATION.observe(seconds, name)
+        return status
+    finally:
+        conn.close()
+
+
+# --- The scheduler thread -----------------------------------------------------------------
+
+_next_runs = {}
+_thread = None
+_thread_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def _run_in_worker(name, slot):
+    try:
+        run_job(name, slot)
+    except Exception as e:
+        print(f"Scheduler: could not run {name}: {e}")
+
+
+def _run_loop():
+    schedules = {name: job_schedule(name) for name in JOBS}
+    schedules = {name: schedule for name, schedule in schedules.items() if schedule is not None}
+    now = datetime.now()
+    for name, schedule in schedules.items():
+        _next_runs[name] = schedule.next_after(now)
+    while schedules:
+        delay = (min(_next_runs.values()) - datetime.now()).total_seconds()
+        # Wake at least every minute so clock changes cannot stall a job for long.
+        if _stop.wait(timeout=min(max(delay, 0), 60)):
+            return
+        now = datetime.now()
+        for name, schedule in schedules.items():
+            if _next_runs[name] <= now:
+                slot = _next_runs[name]
+                _next_runs[name] = schedule.next_after(now)
+                # A slot due while the previous run still holds the lease is skipped by _claim().
+                threading.Thread(target=_run_in_worker, args=(name, slot), daemon=True,
+                                 name=f'scheduler-{name}').start()
+
+
+def start():
+    """Starts this process's scheduler thread (once); returns True if it is running."""
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _stop.clear()
+            _thread = threading.Thread(target=_run_loop, daemon=True, name='scheduler')
+            _thread.start()
+    return True
+
+
+def stop():
+    _stop.set()
+
+
+def status():
+    """Per job: schedule, next run in this process, the current lease and the last run."""
+    conn = connect()
+    try:
+        conn.row_factory = lambda cursor, row: dict(zip([column[0] for column in cursor.description], row))
+        leases = {row['Job_Name']: row for row in conn.execute("SELECT * FROM scheduler_jobs")}
+        last_runs = {row['Job_Name']: row for row in conn.execute("""
+            SELECT Job_Name, Scheduled_For, Started_At, Finished_At, Duration_Seconds, Status, Error, Owner
+            FROM scheduler_runs WHERE Id IN (SELECT MAX(Id) FROM scheduler_runs GROUP BY Job_Name)
+        """)}
+    finally:
+        conn.close()
+
+    jobs = []
+    for name, (_, _, description) in JOBS.items():
+        schedule = job_schedule(name)
+        next_run = _next_runs.get(name) or (schedule.next_after(datetime.now()) if schedule else None)
+        lease = leases.get(name, {})
+        last_run = last_runs.get(name)
+        if last_run:
+            last_run.pop('Job_Name')
+        jobs.append({
+            'name': name,
+            'description': description,
+            'schedule': schedule.expression if schedule else None,
+            'next_run': next_run.strftime(TIME_FORMAT) if schedule and next_run else None,
+            'running_on': lease.get('Lease_Owner'),
+            'last_run': last_run,
+        })
+    return {'enabled': ENABLED, 'running': _thread is not None and _thread.is_alive(), 'jobs': jobs}
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Run or inspect the scheduled batch jobs.")
+    parser.add_argument('--run', choices=sorted(JOBS), help="Run this job now (under its lease).")
+    args = parser.parse_args()
+
+    if args.run:
+        print(f"{args.run}: {run_job(args.run) or 'claimed by another process'}")
+    print(json.dumps(status(), indent=2))
@@ -0,0 +1,320 @@
+# In core/service_classifier.py
+"""
+Offline fast path for service mapping.
+
+classify() answers a Basic/Intermediate/Full Service bundle phrase directly (the prompt's
+own expansion rule). Anything else goes to a model trained on previously logged upstream
+answers (the service_mapping_cache table): TF-IDF character n-grams plus the per-service
+keyword and mileage rules as features, one calibrated logistic regression per service.
+Its confidence is the least certain of those per-service probabilities; callers only
+fall back to the LLM when it is below MIN_CONFIDENCE. Keyword matches on their own are
+candidates, not answers: they are what the local stand-in provider and the fallback
+for an unavailable upstream return.
+
+local_provider() is a deterministic stand-in for Gemini, selected with
+SERVICE_MAPPING_PROVIDER=local, for tests, benchmarks and offline development.
+
+Train the model with:  python -m core.service_classifier --train
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from core.job_card_creator import TASKS_DATA, BASIC_SERVICE_TASKS, INTERMEDIATE_SERVICE_TASKS, FULL_SERVICE_TASKS
+from core.mapping_cache import normalize_description
+from core.near_duplicate import MILEAGE_CACHE_BAND, split_cache_description
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv("WORKSHOP_DB_PATH", os.path.join(BASE_DIR, "database", "workshop.db"))
+MODEL_DIR = os.path.join(BASE_DIR, "models")
+MODEL_FILE_PATH = os.path.join(MODEL_DIR, "service_classifier.joblib")
+MIN_CONFIDENCE = float(os.getenv("LOCAL_CLASSIFIER_MIN_CONFIDENCE", "0.75"))
+MIN_TRAINING_EXAMPLES = 20
+# Services with at least this many positive and negative examples get cross-validated
+# (sigmoid) probability calibration.
+CALIBRATION_FOLDS = 3
+# Simulated upstream latency for the local stand-in provider (benchmarks).
+LOCAL_PROVIDER_LATENCY_MS = float(os.getenv("LOCAL_PROVIDER_LATENCY_MS", "0"))
+
+
+def _service_names(task_ids):
+    return [TASKS_DATA[task_id]['name'] for task_id in task_ids]
+
+
+# The job-card bundles (core/job_card_creator.py); results are listed in TASKS_DATA order,
+# like the upstream's answers.
+BASIC_SERVICE = _service_names(BASIC_SERVICE_TASKS)
+INTERMEDIATE_SERVICE = _service_names(INTERMEDIATE_SERVICE_TASKS)
+FULL_SERVICE = _service_names(FULL_SERVICE_TASKS)
+SERVICE_ORDER = {name: index for index, name in enumerate(_service_names(TASKS_DATA))}
+
+# Bundle phrases, checked from the largest bundle down.
+BUNDLE_RULES = [
+    (FULL_SERVICE, ["full service", "major service", "complete service", "annual service", "annual check",
+                    "yearly service", "comprehensive service", "full check"]),
+    (INTERMEDIATE_SERVICE, ["intermediate service", "interim service", "medium service", "standard service",
+                            "6 month service", "six month service"]),
+    (BASIC_SERVICE, ["basic service", "minor service", "oil service", "quick service", "small service"]),
+]
+
+KEYWORD_RULES = {
+    "Oil Change": ["oil change", "change oil", "change the oil", "engine oil", "oil"],
+    "Oil Filter Replacement": ["oil filter"],
+    "Air Filter Check": ["air filter", "engine filter"],
+    "Cabin Filter Replacement": ["cabin filter", "pollen filter", "musty", "ac smell", "air con smell"],
+    "Battery Check": ["battery", "wont start", "won t start", "not starting", "jump start", "slow crank", "cranking"],
+    "Brake Inspection": ["brake", "brakes", "braking", "squeak", "squeaking", "squeal", "squealing",
+                         "grinding", "brake pedal", "pads"],
+    "Exhaust System Inspection": ["exhaust", "smoke", "smoking", "muffler", "silencer", "fumes"],
+    "Fluid Levels Check": ["fluid", "fluids", "coolant", "leak", "leaking", "overheating", "washer fluid"],
+    "Fuel System Inspection": ["fuel", "petrol", "diesel", "injector", "injectors", "mpg", "fuel economy"],
+    "Lights and Wipers Check": ["light", "lights", "bulb", "headlight", "headlights", "wiper", "wipers",
+                                "indicator", "indicators"],
+    "Spark Plugs Replacement": ["spark plug", "spark plugs", "misfire", "misfiring", "rough idle", "hesitation"],
+    "Steering and Suspension Check": ["steering", "suspension", "clunk", "clunking", "knocking", "bumpy",
+                                      "shock absorber", "shocks"],
+    "Timing Belt Inspection": ["timing belt", "cambelt", "cam belt", "timing chain"],
+    "Transmission Check": ["transmission", "gearbox", "gear", "gears", "clutch", "shifting"],
+    "Tyre Condition and Alignment Check": ["tyre", "tyres", "tire", "tires", "tread", "bald", "puncture"],
+    "Tyre Pressure Check": ["tyre pressure", "tire pressure", "pressure", "flat tyre", "flat tire", "tpms"],
+    "Underbody Inspection": ["underbody", "underside", "under body", "rust", "chassis", "scraped"],
+    "Visual Inspection": ["visual", "look over", "check over", "dent", "scratch", "damage", "damaged"],
+    "Wheel Alignment and Balancing": ["alignment", "balancing", "pulls to", "pulling", "vibration",
+                                      "vibrates", "wobble", "wobbling"],
+    "Comprehensive Diagnostic Check": ["diagnostic", "diagnostics", "warning light", "engine light",
+                                       "check engine", "fault", "error code", "eml"],
+}
+
+# (minimum mileage, services added at or above it)
+MILEAGE_RULES = [
+    (60000, ["Spark Plugs Replacement"]),
+    (100000, ["Timing Belt Inspection", "Transmission Check"]),
+]
+# What the local stand-in provider answers when no rule matches.
+DEFAULT_SERVICES = ["Comprehensive Diagnostic Check", "Visual Inspection"]
+
+ClassificationResult = namedtuple("ClassificationResult", ["services", "confidence", "source"])
+
+
+def _compile(phrases):
+    return re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in phrases) + r")\b")
+
+
+_BUNDLE_PATTERNS = [(services, _compile(phrases)) for services, phrases in BUNDLE_RULES]
+_KEYWORD_PATTERNS = [(service, _compile(phrases)) for service, phrases in KEYWORD_RULES.items()]
+_MILEAGE_PATTERN = re.compile(
+    r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*(k)?\s*(?:miles|mile|mi|km|kms|kilometres|kilometers)\b")
+
+_model = None
+_model_mtime = None
+_model_lock = threading.Lock()
+
+
+def _ordered(services):
+    return sorted(set(services), key=lambda name: SERVICE_ORDER.get(name, len(SERVICE_ORDER)))
+
+
+def extract_mileage(description):
+    """Finds a mileage such as '85,000 miles' or '120k km' in free text. Returns an int or None."""
+    match = _MILEAGE_PATTERN.search(str(description).lower())
+    if not match:
+        return None
+    value = float(match.group(1).replace(",", ""))
+    if match.group(2):
+        value *= 1000
+    return int(value)
+
+
+def _mileage_services(mileage):
+    services = []
+    for threshold, extra in MILEAGE_RULES:
+        if mileage is not None and mileage >= threshold:
+            services.extend(extra)
+    return services
+
+
+def classify_with_rules(description, mileage=None):
+    """
+    Applies bundle, keyword and mileage rules. Returns a ClassificationResult: a bundle
+    phrase with confidence 1, otherwise the keyword candidates with confidence 0.
+    """
+    text = normalize_description(description)
+    for services, pattern in _BUNDLE_PATTERNS:
+        if pattern.search(text):
+            return ClassificationResult(_ordered(services), 1.0, 'rules')
+
+    matched = [service for service, pattern in _KEYWORD_PATTERNS if pattern.search(text)]
+    if not matched:
+        return ClassificationResult([], 0.0, 'rules')
+
+    if mileage is None:
+        mileage = extract_mileage(description)
+    return ClassificationResult(_ordered(matched + _mileage_services(mileage)), 0.0, 'rules')
+
+
+def _model_features(vectorizer, descriptions, mileages):
+    """TF-IDF n-grams of the normalized descriptions, plus one column per keyword and mileage rule."""
+    from scipy import sparse
+
+    rules = np.array([
+        [bool(pattern.search(text)) for _, pattern in _KEYWORD_PATTERNS]
+        + [mileage is not None and mileage >= threshold for threshold, _ in MILEAGE_RULES]
+        for text, mileage in zip(descriptions, mileages)
+    ], dtype=float).reshape(len(descriptions), len(_KEYWORD_PATTERNS) + len(MILEAGE_RULES))
+    return sparse.hstack([vectorizer.transform(descriptions), sparse.csr_matrix(rules)]).tocsr()
+
+
+def _probability(estimator, features):
+    # Services that were always or never in the logged answers are stored as their smoothed rate.
+    if isinstance(estimator, float):
+        return estimator
+    return float(estimator.predict_proba(features)[0, 1])
+
+
+def _load_model():
+    """Loads (or reloads, if the file changed) the trained model. Returns None if there is none."""
+    global _model, _model_mtime
+    try:
+        mtime = os.path.getmtime(MODEL_FILE_PATH)
+    except OSError:
+        return None
+    with _model_lock:
+        if _model is None or mtime != _model_mtime:
+            try:
+                _model = joblib.load(MODEL_FILE_PATH)
+                if 'estimators' not in _model:
+                    raise ValueError("it was trained by an older version; retrain with --train")
+                _model_mtime = mtime
+            except Exception as e:
+                print(f"Could not load service classifier from {MODEL_FILE_PATH}: {e}")
+                _model = None
+        return _model
+
+
+def classify_with_model(description, mileage=None):
+    """Scores every service with the trained model. Returns a ClassificationResult."""
+    model = _load_model()
+    if model is None:
+        return ClassificationResult([], 0.0, 'model')
+
+    if mileage is None:
+        mileage = extract_mileage(description)
+    features = _model_features(model['vectorizer'], [normalize_description(description)], [mileage])
+    probabilities = [_probability(estimator, features) for estimator in model['estimators']]
+    selected = [label for label, p in zip(model['labels'], probabilities) if p >= 0.5]
+    if not selected:
+        return ClassificationResult([], 0.0, 'model')
+    # Confidence is the least certain of the per-service yes/no decisions.
+    confidence = min(max(p, 1.0 - p) for p in probabilities)
+    return ClassificationResult(_ordered(selected), float(confidence), 'model')
+
+
+def classify(description, mileage=None):
+    """Best local answer: a bundle phrase, then the model. Low confidence means 'ask upstream'."""
+    result = classify_with_rules(description, mileage)
+    if result.confidence >= MIN_CONFIDENCE:
+        return result
+    model_result = classify_with_model(description, mileage)
+    if model_result.confidence > result.confidence:
+        return model_result
+    return result
+
+
+def local_provider(user_input, mileage=None):
+    """Deterministic stand-in for the Gemini call: rule matches, or DEFAULT_SERVICES."""
+    if LOCAL_PROVIDER_LATENCY_MS:
+        time.sleep(LOCAL_PROVIDER_LATENCY_MS / 1000.0)
+    result = classify_with_rules(user_input, mileage)
+    return result.services or list(DEFAULT_SERVICES)
+
+
+def load_training_examples(db_path=None):
+    """
+    Returns [(normalized description, mileage, [services])] logged in the service_mapping_cache
+    table. Keys for requests with a mileage carry a mileage band suffix; it is split off, and
+    the band's lower bound stands in for the mileage.
+    """
+    conn = sqlite3.connect(db_path or DB_PATH)
+    try:
+        rows = conn.execute("SELECT Description_Key, Services FROM service_mapping_cache").fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+    examples = []
+    for cache_description, services in rows:
+        services = [s for s in json.loads(services) if s in SERVICE_ORDER]
+        if services:
+            description, band = split_cache_description(cache_description)
+            mileage = None if band is None else band * MILEAGE_CACHE_BAND
+            examples.append((description, mileage, services))
+    return examples
+
+
+def train(examples=None, min_examples=MIN_TRAINING_EXAMPLES):
+    """
+    Fits one logistic regression per service on the logged descriptions (calibrated where
+    the service has enough examples) and saves the model to MODEL_FILE_PATH.
+    Returns (success, message).
+    """
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import MultiLabelBinarizer
+
+    if examples is None:
+        examples = load_training_examples()
+    if len(examples) < min_examples:
+        return False, f"Need at least {min_examples} logged descriptions to train, found {len(examples)}."
+
+    descriptions = [description for description, _, _ in examples]
+    binarizer = MultiLabelBinarizer(classes=FULL_SERVICE)
+    targets = binarizer.fit_transform([services for _, _, services in examples])
+
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4), sublinear_tf=True)
+    vectorizer.fit(descriptions)
+    features = _model_features(vectorizer, descriptions, [mileage for _, mileage, _ in examples])
+    estimators = []
+    for target in targets.T:
+        positives = int(target.sum())
+        if positives in (0, len(target)):
+            estimators.append((positives + 1) / (len(target) + 2))
+            continue
+        estimator = LogisticRegression(solver='liblinear', C=10.0)
+        if min(positives, len(target) - positives) >= CALIBRATION_FOLDS:
+            estimator = CalibratedClassifierCV(estimator, method='sigmoid', cv=CALIBRATION_FOLDS)
+        estimators.append(estimator.fit(features, target))
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    tmp_path = MODEL_FILE_PATH + ".tmp"
+    joblib.dump({
+        'vectorizer': vectorizer,
+        'estimators': estimators,
+        'labels': list(binarizer.classes_),
+        'examples': len(examples),
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }, tmp_path)
+    os.replace(tmp_path, MODEL_FILE_PATH)
+    return True, f"Trained service classifier on {len(examples)} descriptions; saved to {MODEL_FILE_PATH}."
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local service-mapping classifier.")
+    parser.add_argument("--train", action="store_true", help="Train on descriptions logged in service_mapping_cache.")
+    parser.add_argument("description", nargs="?", help="Classify this description.")
+    args = parser.parse_args()
+
+    if args.train:
+        ok, message = train()
+        print(message)
+    if args.description:
+        print(classify(args.description))
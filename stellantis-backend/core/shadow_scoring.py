@@ -0,0 +1,203 @@
+# In core/shadow_scoring.py
+"""
+Shadow evaluation of the job success model against the live recommender.
+
+When SHADOW_SCORING=1, the assignment routes call submit() with the recommender's
+decision after answering it. submit() only puts a tuple on a bounded queue (dropping it
+if the queue is full), so the request path does no extra work. A background thread then
+scores the same task with the challenger (the active job success model, through
+core.job_assigner) and writes both decisions to the shadow_decisions table.
+
+report() joins the decisions with the real Outcome_Score in job_history once the tasks
+are completed, and compares how well each recommender's score for the engineer who did
+the work predicted a high outcome (ROC AUC), plus how often the two agreed.
+Queue outcomes are exported on /metrics as shadow_scoring_events_total.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from core import instrumentation
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
+ENABLED = os.getenv('SHADOW_SCORING', '0') == '1'
+QUEUE_SIZE = int(os.getenv('SHADOW_SCORING_QUEUE_SIZE', '1000'))
+
+SHADOW_EVENTS = instrumentation.REGISTRY.counter(
+    'shadow_scoring_events_total', 'Shadow scoring requests by outcome (queued, dropped, scored, failed).',
+    ('outcome',))
+
+TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS shadow_decisions (
+        Id INTEGER PRIMARY KEY,
+        Created_At TEXT NOT NULL,
+        Job_Id TEXT NOT NULL,
+        Task_Id TEXT NOT NULL,
+        Primary_Engineer_Id TEXT,
+        Primary_Score REAL,
+        Challenger_Engineer_Id TEXT,
+        Challenger_Score REAL,
+        Challenger_Primary_Score REAL, -- The challenger's probability for the primary's engineer
+        Challenger_Version INTEGER,
+        Candidates INTEGER
+    )
+"""
+
+_queue = queue.Queue(maxsize=QUEUE_SIZE)
+_worker = None
+_worker_lock = threading.Lock()
+_table_ready = set()
+
+
+def submit(job_id, task_id, primary_engineer_id, primary_score):
+    """
+    Queues a primary decision for shadow scoring. Never blocks and never raises: when
+    shadow scoring is off this returns immediately, and when the queue is full the
+    decision is dropped. Returns True if it was queued.
+    """
+    if not ENABLED:
+        return False
+    _ensure_worker()
+    try:
+        _queue.put_nowait((datetime.now().strftime('%Y-%m-%d %H:%M:%S'), job_id, task_id,
+                           primary_engineer_id, primary_score))
+    except queue.Full:
+        SHADOW_EVENTS.inc('dropped')
+        return False
+    SHADOW_EVENTS.inc('queued')
+    return True
+
+
+def _ensure_worker():
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_run, daemon=True, name='shadow-scoring')
+                _worker.start()
+
+
+def _connect():
+    conn = instrumentation.connect(DB_PATH, timeout=10)
+    if DB_PATH not in _table_ready:
+        conn.execute(TABLE_SQL)
+        conn.commit()
+        _table_ready.add(DB_PATH)
+    return conn
+
+
+def _run():
+    while True:
+        item = _queue.get()
+        try:
+            score_decision(*item)
+            SHADOW_EVENTS.inc('scored')
+        except Exception as e:
+            SHADOW_EVENTS.inc('failed')
+            print(f"Shadow scoring failed for job {item[1]} task {item[2]}: {e}")
+
+
+def score_decision(created_at, job_id, task_id, primary_engineer_id, primary_score):
+    """
+    Scores one task with the challenger and records both decisions. The candidates are the
+    engineers available now plus the primary's choice (which the assignment just made
+    unavailable). Returns the challenger's choice, or None if the task or model is missing.
+    """
+    from core import job_assigner # Only the worker needs the model serving path
+
+    scorer = job_assigner.get_scorer()
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    try:
+        task = conn.execute("""
+            SELECT Task_Description AS job_description_text, Estimated_Standard_Time AS job_estimated_time,
+                   Make AS vehicle_make
+            FROM job_card WHERE Job_Id = ? AND Task_Id = ?
+        """, (job_id, task_id)).fetchone()
+        if task is None or scorer is None:
+            return None
+
+        engineer_ids = {row[0] for row in conn.execute(
+            "SELECT Engineer_ID FROM engineer_profiles WHERE Availability = 'Yes'")}
+        if primary_engineer_id:
+            engineer_ids.add(primary_engineer_id)
+        challenger_id, challenger_score, primary_by_challenger = None, None, None
+        if engineer_ids:
+            candidates, prior, prior_overall = job_assigner.get_candidate_features(
+                conn, task['job_description_text'], sorted(engineer_ids))
+            candidates['vehicle_make'] = task['vehicle_make']
+            candidates['job_estimated_time'] = task['job_estimated_time']
+            predictions = job_assigner.score_candidates(candidates, prior, prior_overall)
+            best = predictions['probability'].idxmax()
+            challenger_id = predictions.at[best, 'engineer_id']
+            challenger_score = float(predictions.at[best, 'probability'])
+            primary_rows = predictions[predictions['engineer_id'] == primary_engineer_id]
+            if not primary_rows.empty:
+                primary_by_challenger = float(primary_rows['probability'].iloc[0])
+
+        conn.execute("""
+            INSERT INTO shadow_decisions (
+                Created_At, Job_Id, Task_Id, Primary_Engineer_Id, Primary_Score, Challenger_Engineer_Id,
+                Challenger_Score, Challenger_Primary_Score, Challenger_Version, Candidates
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (created_at, job_id, task_id, primary_engineer_id,
+              None if primary_score is None else float(primary_score), challenger_id, challenger_score,
+              primary_by_challenger, job_assigner.ACTIVE_SCORER.version, len(engineer_ids)))
+        conn.commit()
+        return challenger_id
+    finally:
+        conn.close()
+
+
+def _roc_auc(scores, labels):
+    """Rank-based ROC AUC (ties share ranks); None unless both classes and scores are present."""
+    mask = scores.notna()
+    scores, labels = scores[mask], labels[mask]
+    positives = int(labels.sum())
+    negatives = len(labels) - positives
+    if positives == 0 or negatives == 0:
+        return None
+    ranks = scores.rank()
+    return round(float((ranks[labels == 1].sum() - positives * (positives + 1) / 2) / (positives * negatives)), 4)
+
+
+def report():
+    """
+    Summary of the shadow decisions so far, joined with the outcomes of completed tasks:
+    counts, agreement rate, and each recommender's ROC AUC for a high outcome (>= 4).
+    """
+    conn = _connect()
+    try:
+        df = pd.read_sql_query("""
+            SELECT sd.*, jh.Outcome_Score
+            FROM shadow_decisions sd
+            LEFT JOIN job_history jh
+                ON jh.Job_ID = sd.Job_Id AND jh.Task_Id = sd.Task_Id AND jh.Engineer_Id = sd.Primary_Engineer_Id
+        """, conn)
+    finally:
+        conn.close()
+
+    agree = df['Primary_Engineer_Id'] == df['Challenger_Engineer_Id']
+    completed = df[df['Outcome_Score'].notna()]
+    completed_agree = agree[completed.index]
+    high_outcome = (completed['Outcome_Score'] >= 4).astype(int)
+
+    def mean_outcome(rows):
+        return round(float(rows['Outcome_Score'].mean()), 3) if len(rows) else None
+
+    return {
+        'decisions': len(df),
+        'with_outcome': len(completed),
+        'agreement_rate': round(float(agree.mean()), 4) if len(df) else None,
+        'mean_outcome_when_agreeing': mean_outcome(completed[completed_agree]),
+        'mean_outcome_when_disagreeing': mean_outcome(completed[~completed_agree]),
+        'primary_auc': _roc_auc(completed['Primary_Score'], high_outcome),
+        'challenger_auc': _roc_auc(completed['Challenger_Primary_Score'], high_outcome),
+        'challenger_versions': sorted(int(v) for v in df['Challenger_Version'].dropna().unique()),
+        'queue_depth': _queue.qsize(),
+    }
@@ -0,0 +1,144 @@
+# In core/slow_query_log.py
+"""
+Opt-in slow-query recorder for every instrumented SQLite connection.
+
+Enable it with the SLOW_QUERY_LOG_MS environment variable (threshold in ms) or
+by calling enable(threshold_ms). Statements at or above the threshold are logged
+with their bound parameters and aggregated per distinct statement; the first time
+a statement is seen as slow its EXPLAIN QUERY PLAN is captured on the same
+connection. summarize() returns the top offenders by total time.
+"""
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from core import instrumentation
+
+MAX_TRACKED_STATEMENTS = 500
+MAX_LOGGED_PARAM_CHARS = 200
+# Only these statement kinds have a meaningful query plan.
+EXPLAINABLE_KINDS = {'SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE'}
+
+_lock = threading.Lock()
+_threshold_seconds = None
+_stats = {}
+# Set while this module runs its own EXPLAIN so it is never recorded recursively.
+_local = threading.local()
+
+
+def _normalize(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+def _format_params(parameters):
+    text = repr(parameters)
+    if len(text) > MAX_LOGGED_PARAM_CHARS:
+        text = text[:MAX_LOGGED_PARAM_CHARS] + '...'
+    return text
+
+
+def _explain(connection, sql, parameters):
+    """Runs EXPLAIN QUERY PLAN on a plain (uninstrumented) cursor of the same connection."""
+    cursor = sqlite3.Connection.cursor(connection, sqlite3.Cursor)
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _observe(connection, sql, parameters, elapsed):
+    if _threshold_seconds is None or elapsed < _threshold_seconds or getattr(_local, 'explaining', False):
+        return
+
+    key = _normalize(sql)
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            if len(_stats) >= MAX_TRACKED_STATEMENTS:
+                return
+            entry = _stats[key] = {
+                'statement': key,
+                'count': 0,
+                'total_seconds': 0.0,
+                'max_seconds': 0.0,
+                'last_parameters': None,
+                'last_seen': None,
+                'query_plan': None,
+            }
+        entry['count'] += 1
+        entry['total_seconds'] += elapsed
+        entry['max_seconds'] = max(entry['max_seconds'], elapsed)
+        entry['last_parameters'] = _format_params(parameters)
+        entry['last_seen'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        needs_plan = entry['query_plan'] is None
+
+    print(f"[slow-query] {elapsed * 1000:.1f} ms: {key[:300]} params={_format_params(parameters)}")
+
+    kind = key.split(' ', 1)[0].upper()
+    # executemany/executescript report no parameters; their plans are skipped.
+    if needs_plan and parameters is not None and kind in EXPLAINABLE_KINDS:
+        _local.explaining = True
+        try:
+            plan = _explain(connection, sql, parameters)
+        except sqlite3.Error as e:
+            # e.g. the connection was closed before the cursor was collected; retry next time
+            print(f"[slow-query] Could not capture query plan: {e}")
+            plan = None
+        finally:
+            _local.explaining = False
+        if plan is not None:
+            with _lock:
+                entry['query_plan'] = plan
+
+
+def enable(threshold_ms):
+    """Starts recording statements that take at least threshold_ms milliseconds."""
+    global _threshold_seconds
+    _threshold_seconds = float(threshold_ms) / 1000.0
+    instrumentation.add_statement_observer(_observe)
+    print(f"Slow-query log enabled with a {threshold_ms} ms threshold.")
+
+
+def disable():
+    global _threshold_seconds
+    _threshold_seconds = None
+
+
+def enable_from_env():
+    """Enables the recorder when SLOW_QUERY_LOG_MS is set. Returns True if enabled."""
+    threshold_ms = os.getenv('SLOW_QUERY_LOG_MS')
+    if not threshold_ms:
+        return False
+    try:
+        enable(float(threshold_ms))
+    except ValueError:
+        print(f"Ignoring invalid SLOW_QUERY_LOG_MS value: {threshold_ms!r}")
+        return False
+    return True
+
+
+def is_enabled():
+    return _threshold_seconds is not None
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def summarize(limit=10):
+    """Returns the slowest distinct statements ordered by total time spent."""
+    with _lock:
+        entries = [dict(entry) for entry in _stats.values()]
+    entries.sort(key=lambda entry: entry['total_seconds'], reverse=True)
+    for entry in entries:
+        entry['avg_seconds'] = entry['total_seconds'] / entry['count']
+    return {
+        'enabled': is_enabled(),
+        'threshold_ms': _threshold_seconds * 1000 if _threshold_seconds is not None else None,
+        'distinct_statements': len(entries),
+        'top_statements': entries[:limit],
+    }
@@ -2,18 +2,22 @@
 import pandas as pd
 import random
 import sqlite3
-from faker import Faker
 from datetime import datetime, timedelta
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
+from core import analytics_engine
+from core.engineer_analyzer import calculate_overall_performance
+
 # --- Configuration ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 DATA_DIR = os.path.join(BASE_DIR, 'data')
 FLAT_FILE_EXCEL_PATH = os.path.join(DATA_DIR, 'generated_flat_job_test.xlsx')
 MAPPING_Excel_PATH = os.path.join(DATA_DIR, 'Job_Task_Mapping.xlsx')
-DB_PATH = os.path.join(BASE_DIR, 'database/workshop.db')
+DB_PATH = os.getenv('WORKSHOP_DB_PATH', os.path.join(BASE_DIR, 'database/workshop.db'))
 ENGINEER_EXCEL_PATH = os.path.join(DATA_DIR, 'engineer_profiles.xlsx')
 NUM_RECORDS = 250
 
@@ -161,28 +165,6 @@ def get_tenure_from_level(level):
     else:
         return random.randint(1, 60) # Fallback
 
-def calculate_overall_performance(engineer_df):
-    print("Calculating credible Overall_Performance_Score...")
-    score_columns = [col for col in engineer_df.columns if col.endswith('_Score') and 'Overall_Performance_Score' not in col]
-    
-    engineer_df['Quality_Score'] = engineer_df[score_columns].mean(axis=1)
-    engineer_df['Normalized_Customer_Rating'] = ((engineer_df['Customer_Rating'] - 1) / 4) * 100
-    
-    global_avg_time = engineer_df['Avg_Job_Completion_Time'].mean()
-    speed_factor = global_avg_time / engineer_df['Avg_Job_Completion_Time']
-    
-    engineer_df['Timeliness_Score'] = np.clip(speed_factor * 75, 0, 100)
-    
-    weights = {'quality': 0.75, 'customer': 0.05, 'timeliness': 0.20}
-    final_score = (engineer_df['Quality_Score'] * weights['quality'] + engineer_df['Normalized_Customer_Rating'] * weights['customer'] + engineer_df['Timeliness_Score'] * weights['timeliness'])
-    
-    engineer_df['Overall_Performance_Score'] = np.clip(final_score.round().astype(int), 0, 100)
-    
-    columns_to_drop = ['Quality_Score', 'Normalized_Customer_Rating', 'Timeliness_Score']
-    
-    engineer_df.drop(columns=columns_to_drop, inplace=True, errors='ignore')
-    return engineer_df
-
 # --- MODIFIED FUNCTION TO GENERATE AND CALCULATE ENGINEER PROFILES ---
 def generate_and_save_engineer_profiles():
     """Generates engineer profiles using data from the generated history file."""
@@ -215,25 +197,11 @@ def generate_and_save_engineer_profiles():
     engineer_df = pd.DataFrame(engineer_records)
 
     print("Calculating real metrics from history data...")
-    # The groupby operations now use the GUARANTEED standard column names
-    engineer_stats = df_history.groupby('Engineer_Id').agg(
-        Avg_Job_Completion_Time=('Time_Taken_minutes', 'mean'),
-        Customer_Rating=('Outcome_Score', 'mean')
-    ).reset_index()
-
-    job_scores = df_history.groupby(['Engineer_Id', 'Job_Name'])['Outcome_Score'].mean().unstack()
-    job_scores = ((job_scores - 1) / 4) * 100
-    job_scores.columns = [f"Overall_{col.replace(' ', '_')}_Score" for col in job_scores.columns]
-
-    task_scores = df_history.groupby(['Engineer_Id', 'Task_Description'])['Outcome_Score'].mean().unstack()
-    task_scores = ((task_scores - 1) / 4) * 100
-    task_scores.columns = [f"{col.replace(' ', '_').replace('(', '').replace(')', '').replace(',', '')}_Score" for col in task_scores.columns]
-    
+    # The aggregations use the GUARANTEED standard column names
+    metrics = analytics_engine.profile_metrics(df_history)
+
     print("Merging all calculated scores into engineer profiles...")
-    engineer_df = pd.merge(engineer_df, engineer_stats, left_on='Engineer_ID', right_on='Engineer_Id', how='left')
-    engineer_df.drop(columns=['Engineer_Id'], inplace=True, errors='ignore') # Clean up after merge
-    engineer_df = pd.merge(engineer_df, job_scores, left_on='Engineer_ID', right_index=True, how='left')
-    engineer_df = pd.merge(engineer_df, task_scores, left_on='Engineer_ID', right_index=True, how='left')
+    engineer_df = pd.merge(engineer_df, metrics, left_on='Engineer_ID', right_index=True, how='left')
     
     score_cols_to_fill = [col for col in engineer_df.columns if '_Score' in col]
     engineer_df[score_cols_to_fill] = engineer_df[score_cols_to_fill].fillna(75.0)
@@ -246,98 +214,250 @@ def generate_and_save_engineer_profiles():
     return engineer_df_final
 
 # --- Main Generation Logic ---
+# History is generated as NumPy arrays, a shard of SHARD_JOBS jobs at a time. Each shard has
+# its own seed (derived from the run's seed and the shard's index), so the same arguments
+# give the same rows whether the shards run in one process or many.
+
+HISTORY_COLUMNS = (
+    'Job_ID', 'Job_Name', 'Task_Id', 'Task_Description', 'Status', 'Date_Completed', 'Urgency', 'VIN',
+    'Make', 'Model', 'Mileage', 'Engineer_Id', 'Engineer_Name', 'Engineer_Level', 'Time_Started',
+    'Time_Ended', 'Time_Taken_minutes', 'Estimated_Standard_Time', 'Outcome_Score',
+    'Dynamic_Estimated_Time', 'Suitability_Score'
+)
+HISTORY_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS job_history (
+        "Job_ID" TEXT, "Job_Name" TEXT, "Task_Id" TEXT, "Task_Description" TEXT, "Status" TEXT,
+        "Date_Completed" TIMESTAMP, "Urgency" TEXT, "VIN" TEXT, "Make" TEXT, "Model" TEXT, "Mileage" INTEGER,
+        "Engineer_Id" TEXT, "Engineer_Name" TEXT, "Engineer_Level" TEXT, "Time_Started" TEXT, "Time_Ended" TEXT,
+        "Time_Taken_minutes" INTEGER, "Estimated_Standard_Time" INTEGER, "Outcome_Score" INTEGER,
+        "Dynamic_Estimated_Time" INTEGER, "Suitability_Score" FLOAT
+    )
+"""
+SHARD_JOBS = 100000
+DEFAULT_SEED = 42
+ENGINEER_LEVELS = ['Junior', 'Senior', 'Master']
+VIN_ALPHABET = np.frombuffer(b"ABCDEFGHJKLMNPRSTUVWXYZ0123456789", dtype='S1')
+
+TASK_IDS = list(TASKS_DATA.keys())
+TASK_TIMES = np.array([TASKS_DATA[task_id]['time'] for task_id in TASK_IDS])
+# Task indexes per job type, padded; Custom Service jobs draw their tasks at random instead.
+JOB_TASK_TABLE = np.zeros((len(available_jobs), len(TASK_IDS)), dtype=np.int64)
+for _job_index, _job_name in enumerate(available_jobs):
+    _tasks = [TASK_IDS.index(task_id) for task_id in JOB_TO_TASKS_MAPPING[_job_name]]
+    JOB_TASK_TABLE[_job_index, :len(_tasks)] = _tasks
+JOB_TASK_COUNTS = np.array([len(JOB_TO_TASKS_MAPPING[job_name]) for job_name in available_jobs])
+CUSTOM_JOB_INDEX = available_jobs.index('Custom Service')
+CUSTOM_TASKS = (2, 5)
+
+def engineer_directory(num_engineers):
+    """IDs, names and levels of ENG001..ENGnnn; the first 18 are the ENGINEERS_DATA engineers."""
+    ids, names, levels = [], [], []
+    for index in range(num_engineers):
+        engineer_id = f"ENG{index + 1:03d}"
+        known = ENGINEERS_DATA.get(engineer_id)
+        ids.append(engineer_id)
+        names.append(known['name'] if known else f"Engineer {engineer_id[3:]}")
+        levels.append(known['level'] if known else ENGINEER_LEVELS[index % len(ENGINEER_LEVELS)])
+    return ids, names, levels
+
+def plan_history(num_rows=None, num_jobs=None, seed=DEFAULT_SEED, first_job_number=1001):
+    """
+    Draws each job's type and task count, for num_jobs jobs or until num_rows task rows
+    (the last job is cut short), and splits them into shards.
+    Returns a list of (shard_index, first_job_number, job_types, task_counts).
+    """
+    rng = np.random.default_rng([seed, 0])
+    mean_tasks = (JOB_TASK_COUNTS.sum() + sum(CUSTOM_TASKS) / 2) / len(available_jobs)
+    job_types = np.empty(0, dtype=np.int64)
+    task_counts = np.empty(0, dtype=np.int64)
+    while (num_jobs is not None and len(job_types) < num_jobs) or \
+            (num_jobs is None and task_counts.sum() < num_rows):
+        batch = num_jobs - len(job_types) if num_jobs is not None else \
+            int((num_rows - task_counts.sum()) / mean_tasks * 1.05) + 16
+        types = rng.integers(0, len(available_jobs), batch)
+        counts = JOB_TASK_COUNTS[types]
+        custom = types == CUSTOM_JOB_INDEX
+        counts[custom] = rng.integers(CUSTOM_TASKS[0], CUSTOM_TASKS[1] + 1, custom.sum())
+        job_types, task_counts = np.concatenate([job_types, types]), np.concatenate([task_counts, counts])
+    if num_jobs is None and len(job_types):
+        ends = np.cumsum(task_counts)
+        jobs = int(np.searchsorted(ends, num_rows)) + 1
+        job_types, task_counts = job_types[:jobs], task_counts[:jobs].copy()
+        task_counts[-1] -= ends[jobs - 1] - num_rows
+    return [(index, first_job_number + start, job_types[start:start + SHARD_JOBS], task_counts[start:start + SHARD_JOBS])
+            for index, start in enumerate(range(0, len(job_types), SHARD_JOBS))]
+
+def generate_history_shard(shard, seed=DEFAULT_SEED, num_engineers=len(ENGINEERS_DATA), num_sites=1,
+                           start_date=None, end_date=None):
+    """
+    The job_history columns for one shard of plan_history() as a dict of NumPy arrays.
+    Engineers are split evenly across num_sites sites, and every task of a job is done by
+    an engineer of the job's site. Jobs complete between start_date and end_date
+    (default: the last year); non-urgent tasks may finish up to two days after their job.
+    """
+    shard_index, first_job_number, job_types, task_counts = shard
+    rng = np.random.default_rng([seed, 1, shard_index])
+    end_date = np.datetime64(end_date or (datetime.now() - timedelta(days=1)).date(), 'D')
+    start_date = np.datetime64(start_date or (datetime.now() - timedelta(days=365)).date(), 'D')
+    span_days = max(int((end_date - start_date).astype(int)) - 1, 1)
+    num_jobs, num_rows = len(job_types), int(task_counts.sum())
+
+    # Job-level draws
+    makes = list(CAR_MODELS.keys())
+    model_counts = np.array([len(CAR_MODELS[make]) for make in makes])
+    model_names = np.array([model for make in makes for model in CAR_MODELS[make]], dtype=object)
+    urgency = rng.integers(0, len(URGENCY_LEVELS), num_jobs)
+    make = rng.integers(0, len(makes), num_jobs)
+    model = (np.cumsum(model_counts) - model_counts)[make] + (rng.random(num_jobs) * model_counts[make]).astype(np.int64)
+    vin = VIN_ALPHABET[rng.integers(0, len(VIN_ALPHABET), (num_jobs, 17))].view('S17').ravel().astype('U17')
+    mileage = rng.integers(10000, 200001, num_jobs)
+    day = rng.integers(0, span_days, num_jobs)
+    site = rng.integers(0, num_sites, num_jobs)
+    job_ids = np.strings.add('JOB', (first_job_number + np.arange(num_jobs)).astype('U'))
+
+    # Task rows
+    job = np.repeat(np.arange(num_jobs), task_counts)
+    position = np.arange(num_rows) - np.repeat(np.cumsum(task_counts) - task_counts, task_counts)
+    task = JOB_TASK_TABLE[job_types[job], position]
+    custom_jobs = np.flatnonzero(job_types == CUSTOM_JOB_INDEX)
+    if len(custom_jobs):
+        custom_tasks = rng.random((len(custom_jobs), len(TASK_IDS))).argsort(axis=1)
+        custom_rank = np.full(num_jobs, -1)
+        custom_rank[custom_jobs] = np.arange(len(custom_jobs))
+        custom_rows = job_types[job] == CUSTOM_JOB_INDEX
+        task[custom_rows] = custom_tasks[custom_rank[job[custom_rows]], position[custom_rows]]
+
+    high = urgency[job] == URGENCY_LEVELS.index('High')
+    variation = np.where(high, rng.integers(-5, 31, num_rows), rng.integers(-5, 61, num_rows))
+    estimated = TASK_TIMES[task]
+    time_taken = estimated + variation
+    outcome = rng.integers(3, 6, num_rows) # Default good outcome score
+    penalized = high & (variation > 18) # Penalize late urgent work heavily
+    outcome[penalized] = rng.integers(1, 3, penalized.sum())
+    overrun = ~penalized & (variation > 50) # Any task more than 50 minutes over is also a poor outcome
+    outcome[overrun] = rng.integers(2, 4, overrun.sum())
+
+    completed_day = start_date + day[job] + np.where(high, 0, rng.integers(0, 3, num_rows))
+    time_ended = completed_day.astype('datetime64[m]') + rng.integers(8 * 60, 21 * 60, num_rows) # 08:00-20:59
+    time_started = time_ended - time_taken
+
+    site_first = np.arange(num_sites) * num_engineers // num_sites
+    site_size = np.diff(np.append(site_first, num_engineers))
+    engineer = site_first[site[job]] + (rng.random(num_rows) * site_size[site[job]]).astype(np.int64)
+    engineer_ids, engineer_names, engineer_levels = (np.array(values, dtype=object)
+                                                     for values in engineer_directory(num_engineers))
+
+    def timestamps(values):
+        return np.strings.replace(np.datetime_as_string(values, unit='s'), 'T', ' ')
+
+    return {
+        'Job_ID': job_ids[job],
+        'Job_Name': np.array(available_jobs, dtype=object)[job_types[job]],
+        'Task_Id': np.array(TASK_IDS, dtype=object)[task],
+        'Task_Description': np.array([TASKS_DATA[task_id]['name'] for task_id in TASK_IDS], dtype=object)[task],
+        'Status': np.full(num_rows, 'Completed', dtype=object),
+        'Date_Completed': timestamps(completed_day.astype('datetime64[s]')),
+        'Urgency': np.array(URGENCY_LEVELS, dtype=object)[urgency[job]],
+        'VIN': vin[job],
+        'Make': np.array(makes, dtype=object)[make[job]],
+        'Model': model_names[model[job]],
+        'Mileage': mileage[job],
+        'Engineer_Id': engineer_ids[engineer],
+        'Engineer_Name': engineer_names[engineer],
+        'Engineer_Level': engineer_levels[engineer],
+        'Time_Started': timestamps(time_started),
+        'Time_Ended': timestamps(time_ended),
+        'Time_Taken_minutes': time_taken,
+        'Estimated_Standard_Time': estimated,
+        'Outcome_Score': outcome,
+        'Dynamic_Estimated_Time': np.full(num_rows, None, dtype=object),
+        'Suitability_Score': np.full(num_rows, None, dtype=object),
+    }
+
+def insert_history(conn, columns):
+    """Bulk-inserts one generated shard into job_history; the caller commits. Returns the row count."""
+    placeholders = ", ".join("?" for _ in HISTORY_COLUMNS)
+    # tolist() hands sqlite3 plain Python values, column by column.
+    rows = zip(*(columns[col].tolist() for col in HISTORY_COLUMNS))
+    conn.executemany(f"INSERT INTO job_history ({', '.join(HISTORY_COLUMNS)}) VALUES ({placeholders})", rows)
+    return len(columns['Job_ID'])
+
+def _write_shard(shard, options, target, output_format):
+    """Generates one shard into its own SQLite file or Parquet part (run in worker processes)."""
+    columns = generate_history_shard(shard, **options)
+    if output_format == 'parquet':
+        pd.DataFrame(columns).to_parquet(target, index=False)
+        return len(columns['Job_ID'])
+    conn = sqlite3.connect(target)
+    try:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute(HISTORY_TABLE_SQL)
+        rows = insert_history(conn, columns)
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
+
+def write_history(target, output_format='sqlite', num_rows=None, num_jobs=None, processes=1, replace=False,
+                  seed=DEFAULT_SEED, first_job_number=1001, **options):
+    """
+    Generates a synthetic job history straight into `target`: the job_history table of a
+    SQLite database (created if missing; emptied first with replace=True), or a directory
+    of Parquet parts (one per shard). With processes > 1 the shards are generated in
+    parallel; for SQLite each worker fills a scratch file that is then copied in, in shard
+    order. `options` are passed on to generate_history_shard(). Returns the row count.
+    """
+    shards = plan_history(num_rows, num_jobs, seed, first_job_number)
+    options = dict(options, seed=seed)
+    if output_format == 'parquet':
+        try:
+            import pyarrow # pandas' Parquet engine, checked before any worker starts
+        except ImportError as e:
+            raise RuntimeError("Parquet output needs the pyarrow package: pip install pyarrow") from e
+        os.makedirs(target, exist_ok=True)
+        parts = [os.path.join(target, f"part-{shard[0]:05d}.parquet") for shard in shards]
+        if processes > 1:
+            with ProcessPoolExecutor(processes) as pool:
+                return sum(pool.map(_write_shard, shards, [options] * len(shards), parts, ['parquet'] * len(shards)))
+        return sum(_write_shard(shard, options, part, 'parquet') for shard, part in zip(shards, parts))
+
+    conn = sqlite3.connect(target)
+    try:
+        conn.execute(HISTORY_TABLE_SQL)
+        if replace:
+            conn.execute("DELETE FROM job_history")
+        rows = 0
+        if processes > 1:
+            with tempfile.TemporaryDirectory(prefix='history-shards-') as scratch:
+                files = [os.path.join(scratch, f"shard-{shard[0]:05d}.db") for shard in shards]
+                with ProcessPoolExecutor(processes) as pool:
+                    list(pool.map(_write_shard, shards, [options] * len(shards), files, ['sqlite'] * len(shards)))
+                conn.commit()
+                for path in files:
+                    conn.execute("ATTACH DATABASE ? AS shard", (path,))
+                    rows += conn.execute(f"""
+                        INSERT INTO job_history ({', '.join(HISTORY_COLUMNS)})
+                        SELECT {', '.join(HISTORY_COLUMNS)} FROM shard.job_history ORDER BY rowid
+                    """).rowcount
+                    conn.commit()
+                    conn.execute("DETACH DATABASE shard")
+        else:
+            for shard in shards:
+                rows += insert_history(conn, generate_history_shard(shard, **options))
+        conn.commit()
+        return rows
+    finally:
+        conn.close()
 
 def generate_flat_data(num_jobs):
     """
     Generates a single, denormalized DataFrame where each row is a task,
     but car and job info is repeated.
     """
-    fake = Faker()
-    all_records = []
-
-    task_id_list = list(TASKS_DATA.keys())
-    
-
-    
-    for i in range(num_jobs):
-        # 1. Create a unique high-level job for a single car
-        job_id = f"JOB{1001 + i}" # Unique auto-incrementing Job ID
-        job_name = random.choice(available_jobs)
-        urgency = random.choice(URGENCY_LEVELS)
-        car_make = random.choice(list(CAR_MODELS.keys()))
-        car_model = random.choice(CAR_MODELS[car_make])
-        car_vin = fake.vin()
-        car_mileage = random.randint(10000, 200000)
-
-        tasks_to_perform = JOB_TO_TASKS_MAPPING[job_name]
-
-        if job_name == 'Custom Service':
-            tasks_to_perform = random.sample(list(TASKS_DATA.keys()), k=random.randint(2, 5))
-
-        base_job_completion_time = datetime.now() - timedelta(days=random.randint(1, 365))
-
-        for task_id in tasks_to_perform:
-            task_name = TASKS_DATA[task_id]['name']
-
-            engineer_id = random.choice(list(ENGINEERS_DATA.keys()))
-            engineer_info = ENGINEERS_DATA[engineer_id]
-
-            estimated_time = TASKS_DATA[task_id]['time'] # Placeholder for estimated time per task
-
-            if urgency == 'High':
-                date_completed = base_job_completion_time.date()
-                time_variation_minutes = random.randint(-5, 30)
-            else:
-                day_variation = timedelta(days=random.randint(0, 2))
-                date_completed = (base_job_completion_time + day_variation).date()
-                time_variation_minutes = random.randint(-5, 60)
-
-            time_taken = estimated_time + time_variation_minutes
-            outcome_score = random.randint(3, 5) # Default good outcome score
-            if urgency == 'High' and time_variation_minutes > 18:
-                outcome_score = random.randint(1, 2) # Penalize score heavily
-            # If any job takes more than 50 minutes over, it's also a poor outcome
-            elif time_variation_minutes > 50:
-                outcome_score = random.randint(2, 3)
-
-            time_ended = datetime(
-                date_completed.year, date_completed.month, date_completed.day,
-                hour=random.randint(8, 20), minute=random.randint(0, 59)
-            )    
-
-            time_started = time_ended - timedelta(minutes=time_taken)
-            
-
-            
-
-            # Assemble the full record for this one task
-            # Car and Job info is repeated for each task row
-            record = {
-                'Job_ID': job_id,
-                'Job_Name': job_name,
-                'Task_Id': task_id,
-                'Task_Description': task_name,
-                'Status': 'Completed',
-                'Date_Completed': date_completed,
-                'Urgency': urgency,
-                'VIN': car_vin,
-                'Make': car_make,
-                'Model': car_model,
-                'Mileage': car_mileage,
-                'Assigned_Engineer_Id': engineer_id,
-                'Engineer_Name': engineer_info['name'],
-                'Engineer_Level': engineer_info['level'],
-                #'Task_Sequence': task_sequence,
-                'Time_Started': time_started,
-                'Time_Ended': time_ended,
-                'Time_Taken_minutes': time_taken,
-                'Estimated_Standard_Time': estimated_time,
-                'Outcome_Score': outcome_score,
-                
-            }
-            all_records.append(record)
-
-    return pd.DataFrame(all_records)
+    seed = random.randrange(2**32)
+    shards = plan_history(num_jobs=num_jobs, seed=seed)
+    return pd.concat([pd.DataFrame(generate_history_shard(shard, seed=seed)) for shard in shards], ignore_index=True)
 
 def populate_database(df_history, engineer_df_final, db_path):
     print("\n--- Populating Database ---")
@@ -355,6 +475,33 @@ def populate_database(df_history, engineer_df_final, db_path):
         if conn: conn.close()
 
 if __name__ == '__main__':
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic job history. Without --rows, regenerates the Excel files and the "
+                    "database tables as before; with --rows, writes history straight to SQLite or Parquet.")
+    parser.add_argument('--rows', type=int, help="Task rows to generate.")
+    parser.add_argument('--sqlite', metavar='PATH', default=DB_PATH, help="Database to write job_history into.")
+    parser.add_argument('--parquet', metavar='DIR', help="Write Parquet parts to this directory instead.")
+    parser.add_argument('--replace', action='store_true', help="Empty job_history before writing.")
+    parser.add_argument('--engineers', type=int, default=len(ENGINEERS_DATA))
+    parser.add_argument('--sites', type=int, default=1)
+    parser.add_argument('--start-date', help="First completion date (YYYY-MM-DD); default a year ago.")
+    parser.add_argument('--end-date', help="Last completion date (YYYY-MM-DD); default yesterday.")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--processes', type=int, default=1, help="Generate shards in this many processes.")
+    args = parser.parse_args()
+
+    if args.rows:
+        start = time.perf_counter()
+        rows = write_history(
+            args.parquet or args.sqlite, 'parquet' if args.parquet else 'sqlite', num_rows=args.rows,
+            processes=args.processes, replace=args.replace, seed=args.seed, num_engineers=args.engineers,
+            num_sites=args.sites, start_date=args.start_date, end_date=args.end_date)
+        seconds = time.perf_counter() - start
+        print(f"Wrote {rows:,} history rows to {args.parquet or args.sqlite} in {seconds:.1f}s ({rows / seconds:,.0f} rows/s)")
+        raise SystemExit(0)
+
     # Ensure the /data directory exists
     os.makedirs(DATA_DIR, exist_ok=True)
     
@@ -365,10 +512,6 @@ if __name__ == '__main__':
         print(f"Generating {NUM_RECORDS} unique jobs, each with multiple random tasks...")
         flat_data_df = generate_flat_data(NUM_RECORDS)
 
-        # Convert datetime columns to a readable string format for Excel
-        flat_data_df['Time_Started'] = flat_data_df['Time_Started'].dt.strftime('%Y-%m-%d %H:%M:%S')
-        flat_data_df['Time_Ended'] = flat_data_df['Time_Ended'].dt.strftime('%Y-%m-%d %H:%M:%S')
-
         # Save the final, single DataFrame to an Excel file
         flat_data_df.to_excel(FLAT_FILE_EXCEL_PATH, index=False)
         
@@ -386,4 +529,4 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"An error occurred: {e}")
 
-    print("\nProcess complete.")
\ No newline at end of file
+    print("\nProcess complete.")
@@ -1,12 +1,14 @@
+import os
 import sqlite3
 import pandas as pd
 from generate_and_load import get_level_from_experience
 from recommender import recommend_engineers_memory_cf
+from core import instrumentation
 
-DB_PATH = "database/workshop.db"
+DB_PATH = os.getenv("WORKSHOP_DB_PATH", "database/workshop.db")
 
 def get_connection():
-    return sqlite3.connect(DB_PATH, timeout=10, check_same_thread=False)
+    return instrumentation.connect(DB_PATH, timeout=10, check_same_thread=False)
 
 
 def fetch_all_jobs():
@@ -136,7 +138,7 @@ def get_all_engineer_profiles_df(db_path=DB_PATH):
     Returns:
         pd.DataFrame: DataFrame containing all engineers' profiles.
     """
-    conn = sqlite3.connect(db_path)
+    conn = instrumentation.connect(db_path)
     try:
         query = "SELECT * FROM engineer_profiles"
         df = pd.read_sql_query(query, conn)
@@ -170,6 +172,109 @@ def mark_engineer_available(conn, engineer_id):
     # The commit will be handled by the calling function, ensuring it's part of the same transaction.
     print(f"Engineer {engineer_id} availability status updated.")
 
+def complete_tasks_in_bulk(conn, tasks, time_ended):
+    """
+    Moves a batch of tasks from job_card to job_history in a single transaction.
+
+    `tasks` is a list of (job_id, task_id, outcome_score) tuples. Rows are staged
+    in a temp table and moved with set-based statements:
+    1. Classify every requested task (ready, not started, already completed, not found).
+    2. INSERT ... SELECT the ready rows into job_history, computing Time_Taken_minutes in SQL.
+    3. Free the engineers of the moved rows with one UPDATE.
+    4. DELETE the moved rows from job_card with a (Job_Id, Task_Id) row-value IN.
+
+    Retrying the same batch is safe: tasks that already left job_card are reported
+    as 'already_completed' instead of being inserted twice.
+    Returns a dict of task lists keyed by outcome.
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS bulk_completion (
+            Job_Id TEXT NOT NULL,
+            Task_Id TEXT NOT NULL,
+            Outcome_Score INTEGER,
+            PRIMARY KEY (Job_Id, Task_Id)
+        )
+    """)
+    # BEGIN IMMEDIATE takes the write lock up front so no other writer can
+    # complete or reassign the same rows between classification and the move.
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        cursor.execute("DELETE FROM bulk_completion")
+        # Later duplicates of the same (job, task) win, like repeated single calls would.
+        cursor.executemany(
+            "INSERT OR REPLACE INTO bulk_completion (Job_Id, Task_Id, Outcome_Score) VALUES (?, ?, ?)",
+            tasks
+        )
+
+        cursor.execute("""
+            SELECT
+                b.Job_Id, b.Task_Id,
+                CASE
+                    WHEN jc.Task_Id IS NOT NULL AND jc.Time_Started IS NOT NULL THEN 'ready'
+                    WHEN jc.Task_Id IS NOT NULL THEN 'not_started'
+                    WHEN EXISTS (
+                        SELECT 1 FROM job_history jh
+                        WHERE jh.Job_ID = b.Job_Id AND jh.Task_Id = b.Task_Id
+                    ) THEN 'already_completed'
+                    ELSE 'not_found'
+                END AS outcome
+            FROM bulk_completion b
+            LEFT JOIN job_card jc ON jc.Job_Id = b.Job_Id AND jc.Task_Id = b.Task_Id
+        """)
+        results = {'completed': [], 'already_completed': [], 'not_started': [], 'not_found': []}
+        for job_id, task_id, outcome in cursor.fetchall():
+            key = 'completed' if outcome == 'ready' else outcome
+            results[key].append({'job_id': job_id, 'task_id': task_id})
+
+        # Only keep the rows that can actually be moved.
+        cursor.execute("""
+            DELETE FROM bulk_completion
+            WHERE (Job_Id, Task_Id) NOT IN (
+                SELECT Job_Id, Task_Id FROM job_card WHERE Time_Started IS NOT NULL
+            )
+        """)
+
+        cursor.execute("""
+            INSERT INTO job_history (
+                Job_ID, Job_Name, Task_Id, Task_Description, Status, Date_Completed, Urgency, VIN, Make, Model, Mileage,
+                Engineer_Id, Engineer_Name, Engineer_Level, Time_Started, Time_Ended, Time_Taken_Minutes, Estimated_Standard_Time,
+                Outcome_Score, Suitability_Score, Dynamic_Estimated_Time
+            )
+            SELECT
+                jc.Job_Id, jc.Job_Name, jc.Task_Id, jc.Task_Description, 'Completed', :time_ended, jc.Urgency, jc.VIN,
+                jc.Make, jc.Model, jc.Mileage, jc.Engineer_Id, jc.Engineer_Name, jc.Engineer_Level, jc.Time_Started,
+                :time_ended,
+                (CAST(strftime('%s', :time_ended) AS INTEGER) - CAST(strftime('%s', jc.Time_Started) AS INTEGER)) / 60,
+                jc.Estimated_Standard_Time, b.Outcome_Score, jc.Suitability_Score, jc.Dynamic_Estimated_Time
+            FROM job_card jc
+            JOIN bulk_completion b ON b.Job_Id = jc.Job_Id AND b.Task_Id = jc.Task_Id
+        """, {'time_ended': time_ended})
+
+        cursor.execute("""
+            UPDATE engineer_profiles SET Availability = 'Yes'
+            WHERE Engineer_ID IN (
+                SELECT jc.Engineer_Id FROM job_card jc
+                JOIN bulk_completion b ON b.Job_Id = jc.Job_Id AND b.Task_Id = jc.Task_Id
+                WHERE jc.Engineer_Id IS NOT NULL
+            )
+        """)
+        freed_engineers = cursor.rowcount
+
+        cursor.execute("""
+            DELETE FROM job_card
+            WHERE (Job_Id, Task_Id) IN (SELECT Job_Id, Task_Id FROM bulk_completion)
+        """)
+
+        cursor.execute("DELETE FROM bulk_completion")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+
+    results['freed_engineers'] = freed_engineers
+    return results
+
 def get_task_ids_for_job(job_card_id): # Renamed for clarity: plural 'ids'
     """
     Retrieves all Task_IDs for a given Job_Card_ID.
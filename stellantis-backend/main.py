@@ -37,12 +37,8 @@ def main():
         elif choice == '2':
             # This logic now assigns individual tasks, not jobs
             if show_pending_jobs(): # We can rename this to show_pending_tasks
-                try:
-                    # In a real app, you might get job_card_id here
-                    job_id = int(input("Enter the Job Card ID to assign: "))
-                    assign_job_to_engineer(job_id)
-                except ValueError:
-                    print("Invalid input. Please enter a number for the ID.")
+                job_id = input("Enter the Job Card ID to assign: ").strip()
+                assign_job_to_engineer(job_id)
         elif choice == '3':
             print("Exiting the application. Goodbye!")
             break
@@ -1,12 +1,15 @@
+import os
 import pandas as pd
 import numpy as np
 import sqlite3
 import re
 
+from core import instrumentation
+
 # Load historical job data and build task-performance profiles
 data_path = "data/generated_flat_job_history.xlsx"
 df_jobs = pd.read_excel(data_path)
-DB_PATH = "database/workshop.db"
+DB_PATH = os.getenv("WORKSHOP_DB_PATH", "database/workshop.db")
 
 # Compute per-job features
 df_jobs['Job_Duration_Deviation'] = df_jobs['Time_Taken_minutes'] - df_jobs['Estimated_Standard_Time']
@@ -42,13 +45,14 @@ def scale(value, min_val, max_val, invert=False):
     return 1.0 - v if invert else v
 
 
+@instrumentation.timed("calculate_single_engineer_suitability_score")
 def calculate_single_engineer_suitability_score(task_id: str, engineer_id: str) -> float:
     """
     Calculates an absolute suitability score for a single engineer-task pair,
     using static features and dynamically selected task-specific score(s) 
     matching regex ending with 'score', enhancing scoring beyond core features.
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = instrumentation.connect(DB_PATH)
     cursor = conn.cursor()
 
     # Fetch engineer profile including all columns ending with 'score' (case-insensitive)
@@ -137,7 +141,7 @@ def calculate_single_engineer_suitability_score(task_id: str, engineer_id: str)
 
 # Database path and helper to fetch availability
 def get_available_engineers_from_db():
-    conn = sqlite3.connect(DB_PATH)
+    conn = instrumentation.connect(DB_PATH)
     cursor = conn.execute(
         "SELECT Engineer_ID FROM engineer_profiles WHERE Availability='Yes'"
     )
@@ -152,6 +156,7 @@ def safe_zscore(series):
     else:
         return (series - series.mean()) / std
 
+@instrumentation.timed("recommend_engineers_memory_cf")
 def recommend_engineers_memory_cf(task_id, top_n=5):
     """
     Recommend top-n engineers for a task using learned weights:
@@ -183,7 +188,7 @@ def recommend_engineers_memory_cf(task_id, top_n=5):
 
     placeholders = ",".join("?" for _ in available_perf_series)
     sql = f"SELECT Engineer_ID, Years_of_Experience, Customer_Rating, Avg_Job_Completion_Time, Specialization FROM engineer_profiles WHERE Engineer_ID IN ({placeholders})"
-    conn = sqlite3.connect(DB_PATH)
+    conn = instrumentation.connect(DB_PATH)
     df_static = pd.read_sql(sql, conn, params=list(available_perf_series.index))
     conn.close()
     df_static = df_static.set_index('Engineer_ID').loc[available_perf_series.index]
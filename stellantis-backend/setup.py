@@ -28,6 +28,7 @@ setup(
     entry_points={
         'console_scripts': [
             'garage-assigner=main:main', # This creates a command 'garage-assigner' that runs the main() function in main.py
+            'garage-assigner-bench=benchmarks.micro:main', # Micro-benchmarks of the core hot paths (see README "Load Testing")
         ],
     },
 )
\ No newline at end of file
@@ -0,0 +1,40 @@
+# In tests/test_analytics_engine.py
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import analytics_engine
+
+pytest.importorskip('polars')
+
+HISTORY = pd.DataFrame({
+    'Engineer_Id': ['E1', 'E1', 'E1', 'E2', 'E2', 'E3'],
+    'Job_Name': ['Full Service', 'Full Service', 'Brake Service', 'Brake Service', 'Full Service', 'Brake Service'],
+    'Task_Description': ['Oil Change', 'Air Filter', 'Brake Pads', 'Brake Pads', 'Oil Change', 'Brake Discs'],
+    'Time_Taken_minutes': [30.0, 15.0, 60.0, 75.0, np.nan, 90.0],
+    'Outcome_Score': [5.0, 4.0, 3.0, 2.0, 4.0, np.nan],
+})
+
+
+def assert_same_metrics(expected, actual):
+    pd.testing.assert_frame_equal(expected.sort_index(), actual.sort_index(), check_dtype=False, rtol=1e-9)
+
+
+def test_engines_agree_on_a_dataframe():
+    expected = analytics_engine.profile_metrics(HISTORY, engine='pandas')
+    actual = analytics_engine.profile_metrics(HISTORY, engine='polars')
+    assert_same_metrics(expected, actual)
+    assert expected.loc['E1', 'Customer_Rating'] == 4.0
+
+
+def test_engines_agree_on_the_database(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'workshop.db'))
+    HISTORY.assign(Status='Completed').to_sql('job_history', conn, index=False)
+    try:
+        expected = analytics_engine.profile_metrics(analytics_engine.load_history('pandas', conn=conn), 'pandas')
+        actual = analytics_engine.profile_metrics(analytics_engine.load_history('polars', conn=conn), 'polars')
+    finally:
+        conn.close()
+    assert_same_metrics(expected, actual)
@@ -0,0 +1,43 @@
+# In tests/test_background.py
+import threading
+import time
+
+from core.background import coalescing_worker
+
+
+def test_requests_made_during_a_run_are_coalesced_into_one_more():
+    started, release = threading.Event(), threading.Event()
+    runs = []
+
+    def work():
+        runs.append(None)
+        started.set()
+        release.wait(1)
+
+    request = coalescing_worker('test-worker', work)
+    request()
+    assert started.wait(1)
+    started.clear()
+    for _ in range(5):
+        request() # While the first run is still going
+    release.set()
+    assert started.wait(1)
+    time.sleep(0.1)
+    assert len(runs) == 2
+
+
+def test_a_failing_run_does_not_stop_the_worker():
+    failed, done = threading.Event(), threading.Event()
+
+    def work():
+        if not failed.is_set():
+            failed.set()
+            raise RuntimeError("boom")
+        done.set()
+
+    request = coalescing_worker('test-failing-worker', work)
+    request()
+    assert failed.wait(1)
+    time.sleep(0.05)
+    request()
+    assert done.wait(1)
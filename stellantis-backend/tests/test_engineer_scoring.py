@@ -0,0 +1,34 @@
+# In tests/test_engineer_scoring.py
+import sqlite3
+
+import pandas as pd
+
+from core import engineer_scoring
+
+
+def test_reseed_stays_inside_the_callers_transaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(engineer_scoring, '_tables_ready', set())
+    conn = sqlite3.connect(str(tmp_path / 'workshop.db'))
+    conn.execute("CREATE TABLE engineer_profiles (Engineer_ID TEXT, Avg_Job_Completion_Time REAL)")
+    conn.commit()
+
+    conn.execute("INSERT INTO engineer_profiles VALUES ('E1', 40.0)")
+    engineer_scoring.reseed_global_average(conn)
+    assert engineer_scoring._read_state(conn) == {'avg_time_sum': 40.0, 'avg_time_count': 1}
+    conn.rollback() # The caller's transaction, reseed included, is undone as a whole
+
+    assert conn.execute("SELECT COUNT(*) FROM engineer_profiles").fetchone()[0] == 0
+    assert not engineer_scoring._tables_ready
+    conn.close()
+
+
+def test_history_rows_without_job_or_task_names_still_count():
+    rows = pd.DataFrame({
+        'Engineer_Id': ['E1', 'E1'], 'Job_Name': [None, 'Full Service'], 'Task_Description': ['Oil Change', None],
+        'Time_Taken_minutes': [30, 50], 'Outcome_Score': [4, 2],
+    })
+    deltas = engineer_scoring._history_deltas(rows).set_index('Profile_Column')
+    assert deltas.loc['Avg_Job_Completion_Time', 'count'] == 2
+    assert deltas.loc['Customer_Rating', 'sum'] == 6
+    assert deltas.loc['Overall_Full_Service_Score', 'count'] == 1
+    assert deltas.loc['Oil_Change_Score', 'count'] == 1
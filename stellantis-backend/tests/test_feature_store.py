@@ -0,0 +1,58 @@
+# In tests/test_feature_store.py
+import sqlite3
+
+import pytest
+
+from core import feature_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'workshop.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE job_history (
+            Engineer_Id TEXT, Task_Description TEXT, Outcome_Score REAL, Time_Taken_minutes REAL, Time_Ended TEXT
+        )
+    """)
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(feature_store, 'DB_PATH', db_path)
+    return db_path
+
+
+def add_history(db_path, *rows):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO job_history VALUES ('E1', 'Brake Pads', ?, 30, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def totals(as_of=None):
+    features = feature_store.read_features([('E1', 'Brake Pads')], as_of=as_of)
+    return features.loc[0, 'score_sum'], features.loc[0, 'count']
+
+
+def test_late_completion_is_applied_in_completion_order(store):
+    add_history(store, (4, '2024-01-01 10:00:00'), (2, '2024-01-01 12:00:00'))
+    feature_store.update_from_history()
+    add_history(store, (5, '2024-01-01 11:00:00')) # Written after a task that completed later
+
+    summary = feature_store.update_from_history()
+
+    assert summary['rows'] == 1 and summary['replayed'] == 1
+    assert totals('2024-01-01 11:30:00') == (9, 2)
+    assert totals('2024-01-01 12:30:00') == (11, 3)
+    assert totals() == (11, 3)
+
+
+def test_in_order_completions_replay_nothing(store):
+    add_history(store, (4, '2024-01-01 10:00:00'))
+    feature_store.update_from_history()
+    add_history(store, (2, '2024-01-01 12:00:00'))
+
+    summary = feature_store.update_from_history()
+
+    assert summary['replayed'] == 0
+    assert totals('2024-01-01 11:00:00') == (4, 1)
+    assert totals() == (6, 2)
@@ -0,0 +1,16 @@
+# In tests/test_gemini_mapping.py
+import pytest
+
+pytest.importorskip('google.generativeai')
+
+from core import gemini_mapping, mapping_cache
+
+
+def test_cached_answers_skip_the_classifier(monkeypatch):
+    monkeypatch.setattr(mapping_cache, 'lookup', lambda key: ["Brake Inspection"] if key.endswith("band 4") else None)
+
+    def classify(*args):
+        raise AssertionError("the classifier ran on a cache hit")
+
+    monkeypatch.setattr(gemini_mapping.service_classifier, 'classify', classify)
+    assert gemini_mapping.get_matching_services("brakes squeak", mileage=45000) == ["Brake Inspection"]
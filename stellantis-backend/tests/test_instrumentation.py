@@ -0,0 +1,23 @@
+# In tests/test_instrumentation.py
+from core import instrumentation
+
+
+def test_iterating_a_cursor_records_the_statement_when_rows_run_out(monkeypatch):
+    observed = []
+    monkeypatch.setattr(instrumentation, '_statement_observers', [lambda conn, sql, params, elapsed: observed.append(sql)])
+    conn = instrumentation.connect(':memory:')
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(3)])
+    del observed[:]
+
+    cursor = conn.execute("SELECT x FROM t")
+    rows = []
+    for row in cursor:
+        assert observed == [] # Still being consumed
+        rows.append(row[0])
+
+    assert rows == [0, 1, 2]
+    assert observed == ["SELECT x FROM t"]
+    cursor.close()
+    assert observed == ["SELECT x FROM t"] # Recorded once
+    conn.close()
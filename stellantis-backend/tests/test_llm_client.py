@@ -0,0 +1,99 @@
+# In tests/test_llm_client.py
+import time
+
+import pytest
+
+from core.llm_client import CLOSED, HALF_OPEN, OPEN, LLMUnavailable, ResilientClient
+
+
+class UpstreamError(Exception):
+    def __init__(self, code):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FlakyUpstream:
+    def __init__(self, code=503):
+        self.failing = True
+        self.code = code
+        self.calls = 0
+
+    def __call__(self, prompt, timeout=None):
+        self.calls += 1
+        if self.failing:
+            raise UpstreamError(self.code)
+        return f"answer to {prompt}"
+
+
+def open_client(**kwargs):
+    """A client whose breaker has just opened after one failed call."""
+    upstream = FlakyUpstream()
+    options = dict(deadline=1.0, max_retries=0, failure_threshold=1, reset_timeout=0.05, max_concurrency=1)
+    options.update(kwargs)
+    client = ResilientClient('test', upstream, **options)
+    with pytest.raises(LLMUnavailable):
+        client.call('q')
+    assert client.breaker.state == OPEN
+    return client, upstream
+
+
+def test_breaker_closes_after_deadline_expiry_in_half_open():
+    client, upstream = open_client()
+    time.sleep(0.06)
+
+    client.deadline = 0 # Expires before the trial call could be made
+    with pytest.raises(LLMUnavailable):
+        client.call('q')
+    assert not client.breaker._trial_in_flight
+
+    client.deadline = 1.0
+    upstream.failing = False
+    assert client.call('q') == "answer to q"
+    assert client.breaker.state == CLOSED
+
+
+def test_half_open_trial_is_released_when_rejected_busy():
+    client, upstream = open_client(deadline=0.05)
+    time.sleep(0.06)
+
+    client._slots.acquire() # Every slot busy: the trial is rejected locally
+    try:
+        with pytest.raises(LLMUnavailable, match="concurrency limit"):
+            client.call('q')
+    finally:
+        client._slots.release()
+    assert client.breaker.state == HALF_OPEN
+    assert not client.breaker._trial_in_flight
+
+    upstream.failing = False
+    assert client.call('q') == "answer to q"
+    assert client.breaker.state == CLOSED
+
+
+def test_failed_half_open_trial_reopens_the_breaker():
+    client, _ = open_client()
+    time.sleep(0.06)
+    with pytest.raises(LLMUnavailable):
+        client.call('q')
+    assert client.breaker.state == OPEN
+    with pytest.raises(LLMUnavailable, match="circuit open"):
+        client.call('q')
+
+
+@pytest.mark.parametrize('code', [400, 401, 403])
+def test_request_errors_fail_fast_without_tripping_the_breaker(code):
+    upstream = FlakyUpstream(code)
+    client = ResilientClient('test', upstream, deadline=1.0, max_retries=2, failure_threshold=1, backoff_base=0.001)
+    with pytest.raises(LLMUnavailable, match="request failed"):
+        client.call('q')
+    assert upstream.calls == 1
+    assert client.breaker.state == CLOSED
+
+
+@pytest.mark.parametrize('code', [429, 500, 503])
+def test_transient_errors_are_retried(code):
+    upstream = FlakyUpstream(code)
+    client = ResilientClient('test', upstream, deadline=1.0, max_retries=2, failure_threshold=5, backoff_base=0.001)
+    with pytest.raises(LLMUnavailable, match="no answer"):
+        client.call('q')
+    assert upstream.calls == 3
@@ -0,0 +1,50 @@
+# In tests/test_near_duplicate.py
+import json
+import sqlite3
+import time
+
+from core import near_duplicate
+from core.near_duplicate import NearDuplicateIndex
+
+
+def test_expired_entries_are_not_matched():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("squeaky brakes when stopping", ["Brake Inspection"], expires_at=time.time() - 1)
+    assert index.lookup("brakes squeak when stopping") is None
+    assert len(index) == 0
+
+
+def test_unexpired_entries_are_matched():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("squeaky brakes when stopping", ["Brake Inspection"])
+    services, similarity = index.lookup("brakes squeak when stopping")
+    assert services == ["Brake Inspection"]
+    assert similarity >= 0.5
+
+
+def test_add_drops_oldest_entries_once_expired():
+    index = NearDuplicateIndex()
+    index.add("engine warning light on", ["Engine Diagnostics"], expires_at=time.time() - 1)
+    index.add("oil change due", ["Oil Change"])
+    assert len(index) == 1
+
+
+def test_a_failed_warm_up_is_retried(tmp_path, monkeypatch):
+    db_path = str(tmp_path / 'workshop.db')
+    monkeypatch.setattr(near_duplicate, 'DB_PATH', db_path)
+    monkeypatch.setattr(near_duplicate, 'INDEX', NearDuplicateIndex(threshold=0.5))
+    monkeypatch.setattr(near_duplicate, '_warmed', False)
+    monkeypatch.setattr(near_duplicate, '_warm_retry_at', 0.0)
+
+    assert near_duplicate.lookup("brakes squeak when stopping") is None # No cache table yet
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE service_mapping_cache (Description_Key TEXT, Services TEXT, Created_At REAL, Expires_At REAL)")
+    conn.execute("INSERT INTO service_mapping_cache VALUES (?, ?, ?, ?)",
+                 ("squeaky brakes when stopping", json.dumps(["Brake Inspection"]), time.time(), time.time() + 60))
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(near_duplicate, '_warm_retry_at', 0.0) # As if WARM_RETRY_SECONDS had passed
+
+    services, _ = near_duplicate.lookup("brakes squeak when stopping")
+    assert services == ["Brake Inspection"]
@@ -115,7 +115,10 @@ export function NewJobForm() {
         {
           method: "POST",
           headers: { "Content-Type": "application/json" },
-          body: JSON.stringify({ description: watchedDescription }),
+          body: JSON.stringify({
+            description: watchedDescription,
+            mileage: form.getValues("mileage") || null,
+          }),
         },
       );
       if (!res.ok) {